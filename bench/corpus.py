@@ -0,0 +1,178 @@
+import argparse
+import os
+import random
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+SYNTHETIC_DIR = os.path.join(CORPUS_DIR, "synthetic")
+RECORDED_DIR = os.path.join(CORPUS_DIR, "recorded")
+KINDS = ["bus", "train", "hotel"]
+SIZES = {"small": 10, "typical": 120, "large": 5000}
+# React server-rendered markup splits text nodes with empty comments (`SL ₹<!-- -->450`); the parsers must skip them.
+SSR_CARDS = 120
+
+# ---- Synthetic Page Generators ----
+# Markup mirrors the class names and data-testid attributes the parsers read on abhibus and booking.com,
+# wrapped in enough unrelated chrome (filters, headers, scripts) to keep the parse honest.
+OPERATORS = ["Orange Travels", "SRS Travels", "VRL Travels", "Kaveri Travels", "Jabbar Travels", "Morning Star"]
+BUS_TYPES = ["A/C Sleeper (2+1)", "Volvo Multi-Axle AC Seater", "Non-AC Seater Sleeper", "Bharat Benz AC Sleeper", "Normal"]
+TRAIN_NAMES = ["VANDE BHARAT EXP", "SF EXP", "SPL", "KACHEGUDA EXP", "DURONTO SF SPL", "PASSENGER"]
+STATIONS = ["SC", "KCG", "SBC", "YPR", "MAS", "BZA"]
+CITIES = ["London", "Soho", "Camden", "Westminster", "Kensington", "Shoreditch"]
+
+def _page(title, results):
+    chrome = "".join(f'<li class="filter-item"><span class="label">Filter {i}</span></li>' for i in range(40))
+    scripts = '<script>window.__STATE__ = {"k": "' + "x" * 2000 + '"};</script>'
+    return (f"<!DOCTYPE html><html><head><title>{title}</title>{scripts}</head><body>"
+            f'<header class="site-header"><nav>{chrome}</nav></header>'
+            f'<aside class="filters"><ul>{chrome}</ul></aside>'
+            f'<main id="results">{results}</main><footer>{chrome}</footer></body></html>')
+
+def bus_card(rng, i):
+    government = rng.random() < 0.2
+    title = f"APSRTC Service Number {3000 + i}" if government else rng.choice(OPERATORS)
+    fare = rng.randint(450, 2500)
+    dep_h, dep_m = rng.randint(0, 23), rng.choice([0, 15, 30, 45])
+    return (f'<div class="container card service" id="service-{i}"><div class="row">'
+            f'<div class="col operator"><h5 class="title">{title}</h5><p class="sub-title">{rng.choice(BUS_TYPES)}</p>'
+            f'<div class="amenities">{"<i></i>" * 6}</div></div>'
+            f'<div class="col"><span class="departure-time text-sm">{dep_h:02d}:{dep_m:02d}</span>'
+            f'<div class="source-name">Hyderabad</div></div>'
+            f'<div class="col"><div class="travel-time">{rng.randint(6, 14)}h {rng.choice([0, 15, 30, 45])}m</div></div>'
+            f'<div class="col"><span class="arrival-time">{(dep_h + 9) % 24:02d}:{dep_m:02d}</span>'
+            f'<div class="destination-name">Bangalore</div></div>'
+            f'<div class="col price"><strong><span class="fare">₹{fare:,}</span></strong>'
+            f'<small class="seats">{rng.randint(1, 40)} Seats left</small></div>'
+            f'</div></div>')
+
+def train_card(rng, i):
+    src, dst = rng.sample(STATIONS, 2)
+    days = "".join(f'<span class="{"running" if rng.random() < 0.8 else "not-running"}">{d}</span>' for d in "MTWTFSS")
+    classes = rng.sample(["SL", "3A", "2A", "1A", "CC"], rng.randint(1, 4))
+    prices = "".join(f'<div class="avail-cls"><span>{c}</span><span>₹{rng.randint(300, 3500):,}</span></div>' for c in classes)
+    return (f'<div class="train-card" id="train-{i}"><div class="train-name"><a class="name">{12700 + i} {rng.choice(TRAIN_NAMES)}</a></div>'
+            f'<div class="trainTime"><span>{rng.randint(0, 23):02d}:{rng.choice(["00", "30"])} {src}</span>'
+            f'<span class="duration">{rng.randint(4, 20)}h {rng.choice([0, 30])}m</span>'
+            f'<span>{rng.randint(0, 23):02d}:{rng.choice(["00", "30"])} {dst}</span><span class="spacer"></span></div>'
+            f'<div class="days-of-run">{days}</div>'
+            f'<div class="react-horizontal-scrolling-menu--scroll-container">{prices}</div></div>')
+
+def hotel_card(rng, i):
+    stars = "".join("<div></div>" for _ in range(rng.randint(1, 5))) if rng.random() < 0.7 else None
+    stars_html = f'<div data-testid="rating-stars">{stars}</div>' if stars else ""
+    return (f'<div data-testid="property-card"><div data-testid="property-card-container">'
+            f'<div data-testid="title">Hotel {i} {rng.choice(CITIES)}<span class="sr-only">Opens in new window</span></div>'
+            f'{stars_html}<span data-testid="address">{rng.choice(CITIES)}<br/>London</span>'
+            f'<h4>{rng.choice(["Double Room", "Studio Apartment", "Deluxe King Room"])}</h4>'
+            f'<span data-testid="price-and-discounted-price">£ {rng.randint(60, 900):,}</span>'
+            f'</div></div>')
+
+GENERATORS = {"bus": bus_card, "train": train_card, "hotel": hotel_card}
+
+# ---- Synthetic API Payloads ----
+# Shaped like the search responses the capture mode reads, for the mapping benchmarks and bench/standin.py.
+def bus_record_json(rng, i):
+    government = rng.random() < 0.2
+    dep_h, dep_m = rng.randint(0, 23), rng.choice([0, 15, 30, 45])
+    return {"serviceId": 3000 + i, "travelsName": f"APSRTC Service Number {3000 + i}" if government else rng.choice(OPERATORS),
+            "busTypeName": rng.choice(BUS_TYPES), "departureTime": f"2024-05-01T{dep_h:02d}:{dep_m:02d}:00",
+            "arrivalTime": f"2024-05-02T{(dep_h + 9) % 24:02d}:{dep_m:02d}:00", "sourceName": "Hyderabad",
+            "destinationName": "Bangalore", "travelTime": f"{rng.randint(6, 14)}h {rng.choice([0, 15, 30, 45])}m",
+            "fare": rng.randint(450, 2500), "seatsAvailable": rng.randint(1, 40), "amenities": ["wifi", "charging"]}
+
+def train_record_json(rng, i):
+    src, dst = rng.sample(STATIONS, 2)
+    classes = rng.sample(["SL", "3A", "2A", "1A", "CC"], rng.randint(1, 4))
+    return {"trainNumber": str(12700 + i), "trainName": rng.choice(TRAIN_NAMES), "fromStnCode": src, "toStnCode": dst,
+            "departureTime": f"{rng.randint(0, 23):02d}:{rng.choice(['00', '30'])}",
+            "arrivalTime": f"{rng.randint(0, 23):02d}:{rng.choice(['00', '30'])}",
+            "duration": f"{rng.randint(4, 20)}h {rng.choice([0, 30])}m",
+            "runningDays": "".join("1" if rng.random() < 0.8 else "0" for _ in range(7)),
+            "classes": [{"classCode": c, "fare": rng.randint(300, 3500)} for c in classes]}
+
+def hotel_record_json(rng, i):
+    stars = rng.randint(1, 5) if rng.random() < 0.7 else None
+    return {"displayName": {"text": f"Hotel {i} {rng.choice(CITIES)}"},
+            "basicPropertyData": {"pageName": f"hotel-{i}", "location": {"address": rng.choice(CITIES), "city": "London"},
+                                  "starRating": {"value": stars} if stars else None},
+            "matchingUnitConfigurations": {"commonConfiguration": {"name": rng.choice(["Double Room", "Studio Apartment", "Deluxe King Room"])}},
+            "priceDisplayInfoIrene": {"displayPrice": {"amountPerStay": {"amount": f"£ {rng.randint(60, 900):,}"}}}}
+
+PAYLOADS = {
+    "bus": lambda records: {"status": "success", "data": {"services": records}},
+    "train": lambda records: {"trains": records, "quota": "GN"},
+    "hotel": lambda records: {"data": {"searchQueries": {"search": {"results": records, "pagination": {"nbResultsTotal": len(records)}}}}},
+}
+RECORD_GENERATORS = {"bus": bus_record_json, "train": train_record_json, "hotel": hotel_record_json}
+
+def synthetic_payload(kind, cards, seed=7):
+    rng = random.Random(seed)
+    return PAYLOADS[kind]([RECORD_GENERATORS[kind](rng, i) for i in range(cards)])
+
+def synthetic_page(kind, cards, seed=7, ssr=False):
+    rng = random.Random(seed)
+    html = _page(f"{kind} results", "".join(GENERATORS[kind](rng, i) for i in range(cards)))
+    if ssr:
+        html = html.replace("₹", "₹<!-- -->").replace("</span><span>", "</span><!-- --><span>")
+    return html
+
+def ensure_corpus(sizes=SIZES, kinds=KINDS, ssr=True):
+    os.makedirs(SYNTHETIC_DIR, exist_ok=True)
+    pages = [(size, cards, False) for size, cards in sizes.items()] + ([("ssr", SSR_CARDS, True)] if ssr else [])
+    paths = []
+    for kind in kinds:
+        for size, cards, comments in pages:
+            path = os.path.join(SYNTHETIC_DIR, f"{kind}_{size}.html")
+            if not os.path.exists(path):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(synthetic_page(kind, cards, ssr=comments))
+            paths.append((kind, size, path))
+    return paths
+
+def recorded_pages(kinds=KINDS):
+    # Saved live pages are named <kind>_<label>.html, e.g. bus_hyd-blr.html.
+    if not os.path.isdir(RECORDED_DIR):
+        return []
+    pages = []
+    for name in sorted(os.listdir(RECORDED_DIR)):
+        kind, _, label = name.rpartition(".")[0].partition("_")
+        if kind in kinds and name.endswith(".html"):
+            pages.append((kind, f"recorded:{label}", os.path.join(RECORDED_DIR, name)))
+    return pages
+
+def record_page(kind, url, label):
+    from scraper.abhibus import load_bus_page, load_train_page
+    from scraper.blocking import navigate
+    from scraper.booking import scroll_to_load_all_cards
+    from scraper.driver_pool import get_driver_pool
+    os.makedirs(RECORDED_DIR, exist_ok=True)
+    with get_driver_pool().borrow() as driver:
+        if kind == "bus":
+            page_source = load_bus_page(driver, url)
+        elif kind == "train":
+            page_source = load_train_page(driver, url)
+        else:
+            navigate(driver, url)
+            scroll_to_load_all_cards(driver)
+            page_source = driver.page_source
+    path = os.path.join(RECORDED_DIR, f"{kind}_{label}.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(page_source)
+    print(f"Saved {len(page_source)} characters to {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate or record benchmark pages.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("generate", help="Write the synthetic small/typical/large pages and the SSR (comment node) pages.")
+    record = sub.add_parser("record", help="Save a live page source into the recorded corpus.")
+    record.add_argument("kind", choices=KINDS)
+    record.add_argument("url")
+    record.add_argument("label")
+    args = parser.parse_args()
+    if args.command == "generate":
+        for kind, size, path in ensure_corpus():
+            print(f"{kind:5} {size:8} {os.path.getsize(path):>10} bytes  {path}")
+    else:
+        record_page(args.kind, args.url, args.label)
+
+if __name__ == "__main__":
+    main()
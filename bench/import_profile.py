@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from bench.run_bench import git_commit
+
+# ---- Import-Time Profile ----
+# Each target is imported in a fresh interpreter with `-X importtime`, so nothing is shared through sys.modules.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = ["scraper", "scraper.standardize", "scraper.normalize", "scraper.abhibus", "scraper.booking",
+           "scraper.driver_pool", "scraper.fetcher", "scraper.batch", "scraper.history", "scraper.planner", "main"]
+PAGES = ["Home", "Bus Scraper 🚌", "Train Scraper 🚆", "Hotel Scraper 🏨", "Price History 📈", "Journey Planner 🧭"]
+# Packages whose presence after a page run means the lazy imports leaked.
+HEAVY_MODULES = ["streamlit", "selenium.webdriver.remote.webdriver", "webdriver_manager", "pandas", "pyarrow", "lxml.html", "requests"]
+
+PAGE_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+page, heavy = sys.argv[1], sys.argv[2].split(",")
+start = time.perf_counter()
+at = AppTest.from_file("main.py", default_timeout=120).run()
+if page != "Home":
+    at.sidebar.radio[0].set_value(page).run()
+print(json.dumps({"seconds": time.perf_counter() - start, "exceptions": [str(e.value) for e in at.exception],
+                  "loaded": [m for m in heavy if m in sys.modules]}))
+"""
+
+def parse_importtime(stderr):
+    # Lines look like "import time:  self [us] | cumulative | <indent>package"; top level has no indent.
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us), len(name) - len(name.lstrip()) <= 1))
+    return modules
+
+def profile_import(target, top):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target}"], cwd=ROOT,
+                          capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        return {"target": target, "error": proc.stderr.strip().splitlines()[-1]}
+    modules = parse_importtime(proc.stderr)
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in modules:
+        by_package[name.split(".")[0]] += self_us
+    return {
+        "target": target,
+        "import_seconds": round(sum(cumulative for _, _, cumulative, top_level in modules if top_level) / 1e6, 4),
+        "process_seconds": round(wall, 4),
+        "modules": len(modules),
+        "heaviest": [{"package": p, "seconds": round(us / 1e6, 4)}
+                     for p, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]],
+    }
+
+def profile_page(page):
+    proc = subprocess.run([sys.executable, "-c", PAGE_SCRIPT, page, ",".join(HEAVY_MODULES)], cwd=ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"page": page, "error": proc.stderr.strip().splitlines()[-1]}
+    record = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {"page": page, "first_run_seconds": round(record["seconds"], 4), "loaded": record["loaded"],
+            "exceptions": record["exceptions"]}
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of the scraper modules and the Streamlit pages.")
+    parser.add_argument("--targets", default=",".join(TARGETS), help="Comma-separated modules to import.")
+    parser.add_argument("--pages", default=",".join(PAGES), help="Comma-separated pages to render once (empty to skip).")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest packages to list per target.")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file.")
+    args = parser.parse_args()
+    imports = []
+    for target in [t for t in args.targets.split(",") if t]:
+        record = profile_import(target, args.top)
+        imports.append(record)
+        if "error" in record:
+            print(f"{target:22} failed: {record['error']}")
+            continue
+        heaviest = ", ".join(f"{h['package']} {h['seconds'] * 1000:.0f}" for h in record["heaviest"])
+        print(f"{target:22} {record['import_seconds'] * 1000:>8.1f} ms  {record['modules']:>5} modules  (ms: {heaviest})")
+    pages = []
+    for page in [p for p in args.pages.split(",") if p]:
+        record = profile_page(page)
+        pages.append(record)
+        if "error" in record:
+            print(f"{page:22} failed: {record['error']}")
+            continue
+        print(f"{page:22} {record['first_run_seconds'] * 1000:>8.1f} ms first run  loaded: {', '.join(record['loaded']) or '-'}")
+    if args.output:
+        report = {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                  "python": platform.python_version(), "imports": imports, "pages": pages}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {len(imports)} import and {len(pages)} page results to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import pandas as pd
+from bench.run_bench import git_commit
+from scraper.abhibus import BUS_COLUMNS, TRAIN_COLUMNS
+from scraper.planner import OBJECTIVES, JourneyPlanner
+
+# ---- Journey Planner Benchmark ----
+# Synthetic bus and train legs between `stops` places; half the train legs use station codes so the alias table
+# is exercised too.
+STATIONS = {"Hyderabad": "SC", "Bangalore": "SBC", "Chennai": "MAS", "Vijayawada": "BZA"}
+
+def synthetic_legs(legs, stops, seed=1):
+    rng = random.Random(seed)
+    places = list(STATIONS) + [f"Town {i}" for i in range(max(0, stops - len(STATIONS)))]
+    bus_rows, train_rows = [], []
+    for i in range(legs):
+        src, dst = rng.sample(places, 2)
+        departure = f"{rng.randint(0, 23):02d}:{rng.choice(['00', '15', '30', '45'])}"
+        minutes = rng.randint(60, 900)
+        duration = f"{minutes // 60}h {minutes % 60}m"
+        fare = rng.randint(150, 3000)
+        if i % 2:
+            code = lambda place: STATIONS.get(place, place)
+            train_rows.append((f"{12000 + i} EXPRESS", "Express", departure, "N/A", code(src), duration, code(dst),
+                               f"SL {fare} - {fare + 150}", "D", "Train-Route"))
+        else:
+            bus_rows.append((f"Travels {i % 400}", "AC Sleeper", departure, "N/A", src, duration, dst,
+                             f"{fare} - {fare + 300}", "Bus-Route"))
+    return pd.DataFrame(bus_rows, columns=BUS_COLUMNS), pd.DataFrame(train_rows, columns=TRAIN_COLUMNS), places
+
+def main():
+    parser = argparse.ArgumentParser(description="Time journey planner indexing and queries over synthetic legs.")
+    parser.add_argument("--legs", type=int, default=30000)
+    parser.add_argument("--stops", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file.")
+    args = parser.parse_args()
+    bus_df, train_df, places = synthetic_legs(args.legs, args.stops)
+    start = time.perf_counter()
+    planner = JourneyPlanner.from_frames(bus_df, train_df)
+    build_seconds = time.perf_counter() - start
+    print(f"Indexed {args.legs} legs ({len(planner.dep)} connections, {len(planner.stop_names)} stops) in {build_seconds:.2f}s")
+    rng = random.Random(2)
+    queries = [(*rng.sample(places, 2), rng.randint(0, 23) * 60) for _ in range(args.queries)]
+    results = []
+    for objective in OBJECTIVES:
+        timings, found = [], 0
+        for origin, destination, depart_after in queries:
+            start = time.perf_counter()
+            found += planner.plan(origin, destination, depart_after, objective) is not None
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        record = {"objective": objective, "queries": len(timings), "found": found,
+                  "median_ms": round(timings[len(timings) // 2] * 1000, 3),
+                  "p95_ms": round(timings[int(len(timings) * 0.95) - 1] * 1000, 3), "max_ms": round(timings[-1] * 1000, 3)}
+        results.append(record)
+        print(f"{objective:9} median {record['median_ms']:>8.2f} ms  p95 {record['p95_ms']:>8.2f} ms  "
+              f"max {record['max_ms']:>8.2f} ms  ({found}/{len(timings)} found)")
+    if args.output:
+        report = {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                  "python": platform.python_version(), "legs": args.legs, "stops": args.stops,
+                  "build_seconds": round(build_seconds, 3), "results": results}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote planner results to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
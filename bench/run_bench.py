@@ -0,0 +1,216 @@
+import argparse
+import contextlib
+import functools
+import gc
+import http.server
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import pandas as pd
+import requests
+from bench.corpus import CORPUS_DIR, KINDS, SIZES, ensure_corpus, recorded_pages, synthetic_payload
+from scraper.abhibus import (BUS_COLUMNS, BUS_FIELDS, TRAIN_COLUMNS, TRAIN_FIELDS, bus_records_from_json, element_text, field_hits, parse_html,
+                             scrape_buses_from_source, scrape_trains_from_source, train_records_from_json)
+from scraper.booking import extract_hotel_cards_from_source, hotel_cards_from_json
+from scraper.normalize import normalize
+from scraper.reporting import QuietReporter, set_reporter
+from scraper.standardize import standardize_Gov_bus_name, standardize_bus_type, standardize_train_name
+
+# ---- Benchmarks ----
+# Each benchmark takes the page HTML and returns a callable that reports how many cards or values it processed.
+def bench_bus_parse(html):
+    return lambda: len(scrape_buses_from_source(html, "Bus-Route"))
+
+def bench_train_parse(html):
+    return lambda: len(scrape_trains_from_source(html, "Train-Route"))
+
+def bench_hotel_extract(html):
+    return lambda: len(extract_hotel_cards_from_source(html))
+
+def _raw_field_texts(html, field_classes, field):
+    return [element_text(e) for e, f in field_hits(parse_html(html), field_classes) if f == field]
+
+def bench_standardize_bus(html):
+    titles = _raw_field_texts(html, BUS_FIELDS, "title")
+    subtitles = _raw_field_texts(html, BUS_FIELDS, "subtitle")
+    def run():
+        [standardize_Gov_bus_name(t) for t in titles]
+        [standardize_bus_type(s) for s in subtitles]
+        return len(titles)
+    return run
+
+def bench_standardize_train(html):
+    names = _raw_field_texts(html, TRAIN_FIELDS, "name")
+    return lambda: len([standardize_train_name(n) for n in names])
+
+# Capture mode maps the search API's JSON instead of parsing the page; these take the response body text.
+def bench_bus_capture(payload_text):
+    return lambda: len(bus_records_from_json(json.loads(payload_text)))
+
+def bench_train_capture(payload_text):
+    return lambda: len(train_records_from_json(json.loads(payload_text)))
+
+def bench_hotel_capture(payload_text):
+    return lambda: len(hotel_cards_from_json(json.loads(payload_text)))
+
+def bench_normalize(mode, scrape, columns):
+    def factory(html):
+        df = pd.DataFrame(scrape(html, "Route"), columns=columns)
+        return lambda: len(normalize(mode, df))
+    return factory
+
+BENCHMARKS = {
+    "bus": [("bus_parse", bench_bus_parse), ("bus_standardize", bench_standardize_bus),
+            ("bus_normalize", bench_normalize("bus", scrape_buses_from_source, BUS_COLUMNS))],
+    "train": [("train_parse", bench_train_parse), ("train_standardize", bench_standardize_train),
+              ("train_normalize", bench_normalize("train", scrape_trains_from_source, TRAIN_COLUMNS))],
+    "hotel": [("hotel_extract", bench_hotel_extract)],
+}
+CAPTURE_BENCHMARKS = {
+    "bus": ("bus_capture_map", bench_bus_capture),
+    "train": ("train_capture_map", bench_train_capture),
+    "hotel": ("hotel_capture_map", bench_hotel_capture),
+}
+
+# ---- Measurement ----
+def measure(fn, repeat):
+    sink = io.StringIO()
+    timings = []
+    cards = 0
+    for _ in range(repeat):
+        gc.collect()
+        with contextlib.redirect_stdout(sink):
+            start = time.perf_counter()
+            cards = fn()
+            timings.append(time.perf_counter() - start)
+        sink.seek(0); sink.truncate()
+    # Memory is measured in a separate run because tracing slows allocation-heavy code several-fold.
+    gc.collect()
+    gen0_before = gc.get_stats()[0]["collections"]
+    tracemalloc.start()
+    with contextlib.redirect_stdout(sink):
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    retained_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    gen0_runs = gc.get_stats()[0]["collections"] - gen0_before
+    best = min(timings)
+    return {
+        "cards": cards,
+        "seconds_best": round(best, 6),
+        "seconds_mean": round(sum(timings) / len(timings), 6),
+        "cards_per_sec": round(cards / best, 1) if best > 0 else None,
+        "peak_bytes": peak,
+        "retained_blocks": retained_blocks,
+        "gc_gen0_runs": gen0_runs,
+    }
+
+# ---- Page Sources ----
+@contextlib.contextmanager
+def stub_server(directory):
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def load_page(path, base_url=None):
+    start = time.perf_counter()
+    if base_url:
+        rel = os.path.relpath(path, CORPUS_DIR).replace(os.sep, "/")
+        response = requests.get(f"{base_url}/{rel}", timeout=60)
+        response.encoding = "utf-8"
+        html = response.text
+    else:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+    return html, time.perf_counter() - start
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run_one(name, size, text, fetch_seconds, factory, repeat):
+    record = {"benchmark": name, "page": size, "page_bytes": len(text.encode("utf-8")),
+              "fetch_seconds": round(fetch_seconds, 6)}
+    record.update(measure(factory(text), repeat))
+    print(f"{name:18} {size:18} {record['cards']:>6} cards  {record['seconds_best'] * 1000:>9.2f} ms  "
+          f"{record['cards_per_sec'] or 0:>10.0f} cards/s  peak {record['peak_bytes'] / 1e6:>7.2f} MB  "
+          f"gc0 {record['gc_gen0_runs']:>5}")
+    return record
+
+def run(kinds, sizes, repeat, source, include_recorded):
+    pages = ensure_corpus({s: SIZES[s] for s in sizes}, kinds)
+    if include_recorded:
+        pages += recorded_pages(kinds)
+    results = []
+    with contextlib.ExitStack() as stack:
+        base_url = stack.enter_context(stub_server(CORPUS_DIR)) if source == "http" else None
+        for kind, size, path in pages:
+            html, fetch_seconds = load_page(path, base_url)
+            for name, factory in BENCHMARKS[kind]:
+                results.append(run_one(name, size, html, fetch_seconds, factory, repeat))
+            if size in SIZES:
+                name, factory = CAPTURE_BENCHMARKS[kind]
+                results.append(run_one(name, size, json.dumps(synthetic_payload(kind, SIZES[size])), 0.0, factory, repeat))
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "source": source,
+        "results": results,
+    }
+
+def compare(report, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(r["benchmark"], r["page"]): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline.get('commit')} ({baseline_path}): time ratio < 1.0 is faster")
+    for record in report["results"]:
+        old = previous.get((record["benchmark"], record["page"]))
+        if not old or not old["seconds_best"]:
+            continue
+        time_ratio = record["seconds_best"] / old["seconds_best"]
+        mem_ratio = record["peak_bytes"] / old["peak_bytes"] if old["peak_bytes"] else float("nan")
+        print(f"{record['benchmark']:18} {record['page']:18} time x{time_ratio:5.2f}  peak mem x{mem_ratio:5.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bus/train/hotel parsers against the offline corpus.")
+    parser.add_argument("--kinds", default=",".join(KINDS), help="Comma-separated subset of bus,train,hotel.")
+    parser.add_argument("--sizes", default=",".join(SIZES), help="Comma-separated subset of small,typical,large.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--source", choices=["file", "http"], default="file", help="Read pages from disk or a local stub server.")
+    parser.add_argument("--no-recorded", action="store_true", help="Skip pages saved under bench/corpus/recorded.")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file.")
+    parser.add_argument("--compare", help="Print time/memory ratios against an earlier results JSON file.")
+    args = parser.parse_args()
+    # Progress messages from the parsers would otherwise be printed inside every timed run.
+    set_reporter(QuietReporter())
+    report = run([k for k in args.kinds.split(",") if k], [s for s in args.sizes.split(",") if s],
+                 max(1, args.repeat), args.source, not args.no_recorded)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {len(report['results'])} results to {args.output}")
+    if args.compare:
+        compare(report, args.compare)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import argparse
+import http.server
+import json
+import urllib.parse
+from bench.corpus import KINDS, synthetic_page, synthetic_payload
+
+# ---- Stand-in Search Site ----
+# Serves /<kind>?cards=N as a server-rendered synthetic results page that also fetches /api/<kind>/search?cards=N,
+# the way the real sites load results over XHR. Add api=0 to leave the fetch out and exercise the DOM fallback,
+# render=js to send an empty shell that builds the cards in the browser, or gov=N to add N collapsed government-bus
+# sections; the last two make the plain HTTP tier (scraper/fetcher.py) escalate to the browser:
+#   python -m bench.standin --port 8765
+#   http://127.0.0.1:8765/bus?cards=120
+FETCH_SCRIPT = '<script>fetch("/api/{kind}/search?cards={cards}").then(r => r.json()).then(d => {{ window.__results = d; }});</script>'
+RENDER_SCRIPT = '<script>document.body.innerHTML = {body};</script>'
+GOV_SECTION = '<a class="btn dark filled primary sm rounded-sm inactive button">Show Government Buses</a>'
+
+class StandinHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        parts = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(parts.query)
+        cards = int(query.get("cards", ["120"])[0])
+        segments = [s for s in parts.path.split("/") if s]
+        if len(segments) == 3 and segments[0] == "api" and segments[1] in KINDS and segments[2] == "search":
+            self._send(json.dumps(synthetic_payload(segments[1], cards)), "application/json")
+        elif len(segments) == 1 and segments[0] in KINDS:
+            kind = segments[0]
+            html = synthetic_page(kind, cards)
+            gov_sections = int(query.get("gov", ["0"])[0])
+            if gov_sections:
+                html = html.replace("<body>", "<body>" + GOV_SECTION * gov_sections, 1)
+            if query.get("render", [""])[0] == "js":
+                head, _, rest = html.partition("<body>")
+                body, _, tail = rest.rpartition("</body>")
+                html = f"{head}<body>{RENDER_SCRIPT.format(body=json.dumps(body))}</body>{tail}"
+            if query.get("api", ["1"])[0] != "0":
+                html = html.replace("</body>", FETCH_SCRIPT.format(kind=kind, cards=cards) + "</body>")
+            self._send(html, "text/html; charset=utf-8")
+        else:
+            self.send_error(404)
+
+    def _send(self, text, content_type):
+        body = text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve(host="127.0.0.1", port=0):
+    return http.server.ThreadingHTTPServer((host, port), StandinHandler)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic search pages plus their JSON API for capture testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = serve(args.host, args.port)
+    base_url = f"http://{args.host}:{server.server_port}"
+    for kind in KINDS:
+        print(f"{kind:5} {base_url}/{kind}?cards=120   (DOM only: {base_url}/{kind}?cards=120&api=0, "
+              f"client-rendered: {base_url}/{kind}?cards=120&render=js)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
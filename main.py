@@ -1,590 +1,641 @@
+import os
 import time
-import pandas as pd
 import streamlit as st
-import urllib.parse
-import random
-import requests
-import json
-import re
 import traceback
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+from scraper.metrics import serve_metrics
+from scraper.reporting import StreamlitReporter, set_reporter
 
-# Streamlit Page Config
-st.set_page_config(page_title="Hotel & Travel Scraper", page_icon="🛠", layout="wide")
+# Selenium, pandas and pyarrow are imported inside the pages and helpers that use them, so the Home page (and every
+# rerun of it) starts without the browser stack. `python -m bench.import_profile` measures the difference.
 
-# Global error log
-error_log = []
+def download_frame(dataframe, filename, key_prefix="", positions=None):
+    # The rows (`positions`, or the whole frame) are only taken and written to disk in chunks when the button is
+    # clicked, so reruns copy nothing and the displayed frame is never converted in place. Streamlit reads the
+    # returned export file itself.
+    from scraper.export import EXPORT_FORMATS, export_to_disk
+    if (len(dataframe) if positions is None else len(positions)) == 0:
+        st.warning(f"No data to download for {filename}.")
+        return
+    output_format = st.session_state.get("export_format", "csv.gz")
+    name = f"{filename.rsplit('.', 1)[0]}.{output_format}"
+    def export():
+        frame = dataframe if positions is None else dataframe.iloc[positions]
+        return open(export_to_disk(frame, name, output_format), "rb")
+    st.download_button(label=f"📥 Download {name}", data=export, file_name=name, mime=EXPORT_FORMATS[output_format],
+                       key=f"{key_prefix}{filename}")
 
-# ---- Standardization Functions ----
-def standardize_Gov_bus_name(raw_titles):
-    if "service number" in raw_titles.lower():
-        return "Government Bus"
-    return raw_titles
+# ---- Result Cache ----
+def cached_result(kind, url, variant, force_refresh):
+    from scraper.result_cache import format_age, get_result_cache
+    if force_refresh:
+        return None
+    cached = get_result_cache().get(kind, url, variant)
+    if cached is None:
+        return None
+    df, created_at = cached
+    st.info(f"⚡ Showing cached results from {format_age(created_at)} ago ({len(df)} rows). Tick *Force refresh* to scrape again.")
+    return df
 
-def standardize_bus_type(bus_type_raw):
-    bt_lower = bus_type_raw.lower()
-    if "normal" in bt_lower:
-        return "Non-AC Seater"
-    has_non_ac = "non-ac" in bt_lower or "a/c" in bt_lower or "a.c." in bt_lower
-    has_seater = "seater" in bt_lower
-    has_sleeper = "sleeper" in bt_lower
-    if has_non_ac:
-        if has_seater and has_sleeper: return "Non-AC Seater-Sleeper"
-        elif has_sleeper: return "Non-AC Sleeper"
-        elif has_seater: return "Non-AC Seater"
-    else:
-        if has_seater and has_sleeper: return "AC Seater-Sleeper"
-        elif has_sleeper: return "AC Sleeper"
-        elif has_seater: return "AC Seater"
-    print(f"Bus type '{bus_type_raw}' did not match a standard category, returning as is.")
-    return bus_type_raw
+# ---- Kept Results ----
+# Widget interactions rerun the whole script, so the latest foreground result of each page is kept in session state
+# and shown again on every rerun; each shown frame's ResultIndex is kept too, so filtering never re-parses it.
+def keep_result(mode, df):
+    st.session_state[f"{mode}_result"] = df
 
-def standardize_train_name(train_name_raw):
-    if not train_name_raw or train_name_raw == "N/A":
-        return "N/A"
-    name_lower = train_name_raw.lower()
-    name_lower_trim = name_lower.replace(" ", "")
-    if "vande bharat" in name_lower_trim or "vandebharat" in name_lower_trim: return "VandeBharat"
-    if "sf" in name_lower_trim and "spl" in name_lower_trim: return "Superfast Special"
-    if "sf" in name_lower_trim and ("exp" in name_lower_trim or "ex" in name_lower_trim): return "Superfast Express"
-    if "sf" in name_lower_trim: return "Superfast"
-    if "spl" in name_lower_trim and ("exp" in name_lower_trim or "ex" in name_lower_trim): return "Special Express"
-    if "spl" in name_lower_trim: return "Special"
-    if "exp" in name_lower_trim or "ex" in name_lower_trim: return "Express"
-    return train_name_raw
+def show_kept_result(mode, show_results):
+    df = st.session_state.get(f"{mode}_result")
+    if df is None:
+        return
+    col_caption, col_clear = st.columns([6, 1])
+    col_caption.caption(f"Latest {mode} results ({len(df)} rows), kept until the next scrape on this page.")
+    if col_clear.button("Clear", key=f"{mode}_clear_result"):
+        del st.session_state[f"{mode}_result"]
+        return
+    show_results(df)
 
-# ---- Setup Selenium WebDriver ----
-def setup_driver():
-    service = Service(ChromeDriverManager().install())
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-    options.page_load_strategy = 'normal'
-    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
-    return webdriver.Chrome(service=service, options=options)
+def result_index(mode, df):
+    from scraper.explore import ResultIndex
+    indexes = st.session_state.setdefault("result_indexes", {})
+    entry = indexes.get(id(df))
+    # The frame is stored with its index so its id cannot be reused by another frame while the entry exists.
+    if entry is None or entry[0] is not df:
+        indexes[id(df)] = entry = (df, ResultIndex(mode, df))
+        while len(indexes) > 6:
+            indexes.pop(next(iter(indexes)))
+    return entry[1]
 
-# ---- Helper Functions ----
-def extract_bs_text(elements):
-    extracted_text = []
-    for elem in elements:
-        temp = elem.get_text(strip=True)
-        if temp:
-            extracted_text.append(temp)
-    return extracted_text
+def explore_panel(mode, df, key_prefix=""):
+    # Returns the index and the positions of the rows that pass the filters, in the chosen order.
+    import datetime
+    from scraper.explore import CATEGORY_FILTERS, GROUP_BY, RANGE_FILTERS
+    index = result_index(mode, df)
+    key = f"{key_prefix}{mode}_explore"
+    categories, ranges = {}, {}
+    with st.expander("Filter, sort and summarize"):
+        columns = st.columns(len(CATEGORY_FILTERS[mode]))
+        for column, name in zip(columns, CATEGORY_FILTERS[mode]):
+            categories[name] = column.multiselect(name, index.options(name), key=f"{key}_{name}")
+        columns = st.columns(len(RANGE_FILTERS[mode]))
+        for column, name in zip(columns, RANGE_FILTERS[mode]):
+            bounds = index.bounds(name)
+            if bounds is None or bounds[0] == bounds[1]:
+                continue
+            if name == "Departure":
+                window = column.slider("Departure window", value=(datetime.time(0, 0), datetime.time(23, 59)),
+                                       step=datetime.timedelta(minutes=15), key=f"{key}_{name}")
+                selected = tuple(t.hour * 60 + t.minute for t in window)
+                full = (0, 23 * 60 + 59)
+            else:
+                full = (float(bounds[0]), float(bounds[1]))
+                selected = column.slider(name, min_value=full[0], max_value=full[1], value=full, key=f"{key}_{name}")
+            # An untouched slider keeps rows with no value for that column.
+            if tuple(selected) != full:
+                ranges[name] = selected
+        col_sort, col_order, col_group = st.columns([2, 1, 2])
+        sort_by = col_sort.selectbox("Sort by", [None] + list(RANGE_FILTERS[mode]), format_func=lambda n: n or "Scraped order",
+                                     key=f"{key}_sort")
+        descending = col_order.checkbox("Descending", key=f"{key}_descending")
+        group_by = col_group.selectbox("Summarize by", [None] + GROUP_BY[mode], format_func=lambda n: n or "No summary",
+                                       key=f"{key}_group")
+        positions = index.sort(index.filter(categories, ranges), sort_by, descending)
+        st.caption(f"{len(positions)} of {len(index)} rows match.")
+        if group_by:
+            st.dataframe(index.summary(positions, group_by), hide_index=True)
+    return index, positions
 
-def expand_government_buses(driver):
-    st.write("Attempting to expand government bus sections (if needed)...")
-    print("Attempting to expand government bus sections (if needed)...")
-    try:
-        wait = WebDriverWait(driver, 10)
-        dropdown_selector = 'a.btn.dark.filled.primary.sm.rounded-sm.inactive.button'
-        dropdown_buttons = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, dropdown_selector)))
-        if not dropdown_buttons:
-            print("No government bus dropdown buttons found with the primary selector.")
-        else:
-            print(f"Found {len(dropdown_buttons)} potential government dropdown button(s).")
-            for i, button in enumerate(dropdown_buttons):
-                try:
-                    button_text = button.text.lower() if button.text else ""
-                    if button.is_displayed() and button.is_enabled() and "hide" not in button_text:
-                        print(f"Attempting to click dropdown #{i + 1} (text: '{button.text}')")
-                        driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center', inline: 'nearest'});", button)
-                        time.sleep(0.5)
-                        button.click()
-                        print(f"Clicked dropdown #{i + 1}.")
-                        st.write(f"Clicked dropdown #{i + 1} (text was: '{button.text}').")
-                        time.sleep(2.5)
-                    elif "hide" in button_text:
-                        print(f"Skipped clicking dropdown #{i + 1} (text: '{button.text}')")
-                except Exception as click_error:
-                    print(f"Failed to interact with or click dropdown #{i + 1}: {click_error}")
-                    st.warning(f"Error with dropdown button #{i+1}: {click_error}")
-    except TimeoutException:
-        print(f"Timed out waiting for government bus dropdown buttons.")
-    except Exception as e:
-        print(f"Error in expand_government_buses: {e}")
+def show_table(index, positions, filename, key_prefix=""):
+    from scraper.explore import DISPLAY_ROWS
+    st.dataframe(index.rows(positions, DISPLAY_ROWS))
+    if len(positions) > DISPLAY_ROWS:
+        st.caption(f"Showing the first {DISPLAY_ROWS} of {len(positions)} rows; the download has all of them.")
+    download_frame(index.df, filename, key_prefix, positions)
 
-def scrape_buses_from_source(page_source_html, route_type):
-    all_buses_data = []
-    st.write("Parsing HTML with BeautifulSoup and extracting bus data...")
-    print("Parsing HTML with BeautifulSoup and extracting bus data...")
-    try:
-        soup = BeautifulSoup(page_source_html, 'lxml')
-        raw_titles_bs = extract_bs_text(soup.find_all(class_="title"))
-        titles = [standardize_Gov_bus_name(rt) for rt in raw_titles_bs]
-        raw_subtitles_bs = extract_bs_text(soup.find_all(class_="sub-title"))
-        subtitles = [standardize_bus_type(st) for st in raw_subtitles_bs]
-        departures = extract_bs_text(soup.find_all(class_="departure-time"))
-        arrivals = extract_bs_text(soup.find_all(class_="arrival-time"))
-        sources = extract_bs_text(soup.find_all(class_="source-name"))
-        durations = extract_bs_text(soup.find_all(class_="travel-time"))
-        destinations = extract_bs_text(soup.find_all(class_="destination-name"))
-        fares_raw_elements_bs = soup.select("span.fare")
-        fares_raw_text = extract_bs_text(fares_raw_elements_bs)
-        fares_processed = []
-        for fare_text in fares_raw_text:
-            fare_clean = fare_text.replace("₹", "").replace(",", "").strip()
-            try:
-                base_price = int(float(fare_clean))
-                new_price = base_price + 300
-                fares_processed.append(f"{base_price} - {new_price}")
-            except ValueError:
-                fares_processed.append(fare_text)
-        counts_msg = (f"BS Extracted counts: Titles={len(titles)}, Subtitles={len(subtitles)}, "
-                      f"Departures={len(departures)}, Arrivals={len(arrivals)}, Sources={len(sources)}, "
-                      f"Durations={len(durations)}, Destinations={len(destinations)}, Fares={len(fares_processed)}")
-        print(counts_msg)
-        st.write(counts_msg)
-        data_lists = [titles, subtitles, departures, arrivals, sources, durations, destinations, fares_processed]
-        non_empty_lists = [lst for lst in data_lists if lst]
-        if not non_empty_lists:
-            st.warning("All data fields returned empty from BeautifulSoup parsing.")
-            print("Warning: All data fields returned empty from BeautifulSoup parsing.")
-            return []
-        min_len = min(len(lst) for lst in non_empty_lists)
-        if min_len == 0 and any(len(lst) > 0 for lst in data_lists):
-            st.warning("BS: Critical data list might be empty. Min_len is 0.")
-            print("BS Warning: Min_len is 0, but some lists have data.")
-            return []
-        if min_len > 0:
-            titles = titles[:min_len]
-            subtitles = subtitles[:min_len]
-            departures = departures[:min_len]
-            arrivals = arrivals[:min_len]
-            sources = sources[:min_len]
-            durations = durations[:min_len]
-            destinations = destinations[:min_len]
-            fares_processed = fares_processed[:min_len]
-            route_types_list = [route_type] * min_len
-            all_buses_data = list(zip(titles, subtitles, departures, arrivals, sources, durations, destinations, fares_processed, route_types_list))
-        else:
-            st.warning("BS: Could not extract any consistent bus data (min_len is 0).")
-            print("BS: Min_len is 0. No bus data formed.")
-            all_buses_data = []
-    except Exception as e:
-        st.error(f"An unexpected error occurred in BeautifulSoup bus scraping: {e}")
-        print(f"Unexpected error in BeautifulSoup bus scraping: {e}")
-        print(traceback.format_exc())
-    st.write(f"BeautifulSoup bus scraping finished. Found {len(all_buses_data)} bus entries.")
-    print(f"BeautifulSoup bus scraping finished. Found {len(all_buses_data)} bus entries.")
-    return all_buses_data
+# ---- Result Display ----
+def show_bus_results(df_bus, key_prefix=""):
+    if df_bus.empty:
+        st.warning("No bus data was processed into the DataFrame.")
+        return
+    index, positions = explore_panel("bus", df_bus, key_prefix)
+    operators = index.split(positions, "Operator")
+    if len(operators["Government"]):
+        st.write("### Government/RTC Buses 🏛")
+        show_table(index, operators["Government"], "government_buses.csv", key_prefix)
+    if len(operators["Private"]):
+        st.write("### Private Buses 🚍")
+        show_table(index, operators["Private"], "private_buses.csv", key_prefix)
+    if not len(positions):
+        st.info("No buses match the filters.")
+    show_typed_results(index, positions, key_prefix)
 
-def scrape_trains_from_source(page_source_html, route_type):
-    all_trains_data = []
-    st.write("Parsing HTML with BeautifulSoup and extracting train data...")
-    print("Parsing HTML with BeautifulSoup and extracting train data...")
-    try:
-        soup = BeautifulSoup(page_source_html, 'lxml')
-        raw_train_names_bs = extract_bs_text(soup.find_all(class_="name"))
-        standardized_train_types = [standardize_train_name(tn) for tn in raw_train_names_bs]
-        durations_bs = extract_bs_text(soup.find_all(class_="duration"))
-        train_time_elements_bs = soup.find_all(class_="trainTime")
-        departures, arrivals, sources, destinations = [], [], [], []
-        for element in train_time_elements_bs:
-            spans = element.find_all("span")
-            if len(spans) >= 2:
-                raw_departure_text = spans[0].get_text(strip=True)
-                departure_time = raw_departure_text[:5]
-                source_code = raw_departure_text[6:].strip()
-                raw_arrival_text = spans[-2].get_text(strip=True)
-                arrival_time = raw_arrival_text[:5]
-                destination_code = raw_arrival_text[6:].strip()
-                departures.append(departure_time)
-                arrivals.append(arrival_time)
-                sources.append(source_code)
-                destinations.append(destination_code)
-            else:
-                departures.append("N/A"); arrivals.append("N/A"); sources.append("N/A"); destinations.append("N/A")
-        prices_list_final = []
-        price_containers_bs = soup.find_all(class_="react-horizontal-scrolling-menu--scroll-container")
-        for container in price_containers_bs:
-            price_entries_raw = extract_bs_text(container.find_all(class_="avail-cls"))
-            current_train_prices = []
-            for price_entry in price_entries_raw:
-                parts = price_entry.split("₹")
-                if len(parts) == 2:
-                    cls = parts[0].strip()
-                    try:
-                        base_price = int(float(parts[1].replace(",", "").strip()))
-                        extended_price = base_price + (150 if cls == "SL" else 400)
-                        current_train_prices.append(f"{cls} {base_price} - {extended_price}")
-                    except ValueError:
-                        current_train_prices.append(price_entry)
-                else:
-                    current_train_prices.append(price_entry)
-            prices_list_final.append("; ".join(current_train_prices) if current_train_prices else "N/A")
-        frequencies_list_final = []
-        frequency_containers_bs = soup.find_all(class_="days-of-run")
-        for container in frequency_containers_bs:
-            running_days_elements = container.find_all(class_="running")
-            running_days_text = [day.get_text(strip=True) for day in running_days_elements if day.get_text(strip=True)]
-            if len(running_days_text) == 7:
-                frequencies_list_final.append("D")
-            elif running_days_text:
-                frequencies_list_final.append(", ".join(running_days_text))
-            else:
-                frequencies_list_final.append("N/A")
-        train_counts_msg = (f"BS Train Counts: Names={len(raw_train_names_bs)}, Types={len(standardized_train_types)}, "
-                            f"Departures={len(departures)}, Arrivals={len(arrivals)}, Sources={len(sources)}, "
-                            f"Durations={len(durations_bs)}, Destinations={len(destinations)}, "
-                            f"Prices={len(prices_list_final)}, Frequencies={len(frequencies_list_final)}")
-        print(train_counts_msg)
-        st.write(train_counts_msg)
-        all_data_lists_train = [raw_train_names_bs, standardized_train_types, departures, arrivals, sources,
-                                durations_bs, destinations, prices_list_final, frequencies_list_final]
-        max_len = 0
-        non_empty_train_lists = [lst for lst in all_data_lists_train if lst]
-        if non_empty_train_lists:
-            max_len = max(len(lst) for lst in non_empty_train_lists)
-        else:
-            st.warning("BS: All train data fields returned empty.")
-            print("BS Warning: All train data fields returned empty.")
-            return []
-        if max_len > 0:
-            raw_train_names_padded = raw_train_names_bs + ["N/A"] * (max_len - len(raw_train_names_bs))
-            standardized_train_types_padded = standardized_train_types + ["N/A"] * (max_len - len(standardized_train_types))
-            departures_padded = departures + ["N/A"] * (max_len - len(departures))
-            arrivals_padded = arrivals + ["N/A"] * (max_len - len(arrivals))
-            sources_padded = sources + ["N/A"] * (max_len - len(sources))
-            durations_padded = durations_bs + ["N/A"] * (max_len - len(durations_bs))
-            destinations_padded = destinations + ["N/A"] * (max_len - len(destinations))
-            prices_list_final_padded = prices_list_final + ["N/A"] * (max_len - len(prices_list_final))
-            frequencies_list_final_padded = frequencies_list_final + ["N/A"] * (max_len - len(frequencies_list_final))
-            route_types_list = [route_type] * max_len
-            all_trains_data = list(zip(raw_train_names_padded, standardized_train_types_padded, departures_padded,
-                                       arrivals_padded, sources_padded, durations_padded, destinations_padded,
-                                       prices_list_final_padded, frequencies_list_final_padded, route_types_list))
-        else:
-            st.warning("BS: Could not extract any consistent train data (max_len is 0).")
-            print("BS: Max_len for train data is 0. No train data formed.")
-            all_trains_data = []
-    except Exception as e:
-        st.error(f"Error fetching train details with BeautifulSoup: {e}")
-        print(f"Error fetching train details with BeautifulSoup: {e}")
-        print(traceback.format_exc())
-    st.write(f"BeautifulSoup train scraping finished. Found {len(all_trains_data)} train entries.")
-    print(f"BeautifulSoup train scraping finished. Found {len(all_trains_data)} train entries.")
-    return all_trains_data
+def show_train_results(df_train, key_prefix=""):
+    if df_train.empty:
+        st.warning("No train data was processed into the DataFrame.")
+        return
+    index, positions = explore_panel("train", df_train, key_prefix)
+    show_table(index, positions, "train_details.csv", key_prefix)
+    show_typed_results(index, positions, key_prefix)
 
-def get_google_maps_link(hotel_name, city_name=None, card_index=0):
-    if not hotel_name or hotel_name == 'N/A': return None
-    query = f"{hotel_name}, {city_name}" if city_name else hotel_name
-    try:
-        response = requests.get("https://nominatim.openstreetmap.org/search", params={"q": query, "format": "json", "limit": 1},
-                               headers={"User-Agent": "HotelLocatorScript/1.0"}, timeout=10)
-        response.raise_for_status()
-        results = response.json()
-        if results:
-            result = results[0]; lat, lon = result["lat"], result["lon"]
-            return f"https://www.google.com/maps/search/?api=1&query={urllib.parse.quote(hotel_name)}&query_place_id={lat},{lon}"
-        else:
-            return f"https://www.google.com/maps/search/?api=1&query={urllib.parse.quote(query)}"
-    except requests.RequestException:
-        return None
+def show_hotel_results(df_hotel, key_prefix=""):
+    st.write("### Hotel Data 🏨")
+    if df_hotel.empty:
+        st.warning("No hotel data was processed into the DataFrame.")
+        return
+    index, positions = explore_panel("hotel", df_hotel, key_prefix)
+    show_table(index, positions, "hotel_details.csv", key_prefix)
+    show_typed_results(index, positions, key_prefix)
 
-def scroll_to_load_all_cards(driver, max_wait=10, pause_time=2):
-    last_count = 0; stable_time = 0; start_time = time.time()
-    while True:
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(pause_time)
-        try:
-            current_count = len(driver.find_elements(By.CSS_SELECTOR, 'div[data-testid="property-card"]'))
-            if current_count > last_count:
-                last_count = current_count; stable_time = 0
-            else:
-                stable_time += pause_time
-            if stable_time >= max_wait:
-                print(f"✅ Done scrolling. Found {current_count} cards."); break
-            if time.time() - start_time > 300:
-                error_log.append("Warning: Scrolling timed out after 5 minutes."); break
-        except Exception as e:
-            error_log.append(f"Error: Scrolling failed with exception: {e}"); break
+def show_typed_results(index, positions, key_prefix=""):
+    from scraper.explore import DISPLAY_ROWS
+    from scraper.normalize import train_fares_long
+    mode = index.mode
+    with st.expander("Typed columns (numeric fares, minutes, times of day)"):
+        st.caption(f"{index.typed.memory_usage(deep=True).sum() / 1e3:.0f} kB typed vs {index.df.memory_usage(deep=True).sum() / 1e3:.0f} kB as text")
+        st.dataframe(index.typed.iloc[positions[:DISPLAY_ROWS]])
+        download_frame(index.typed, f"{mode}_typed.csv", key_prefix, positions)
+        if mode == "train":
+            st.write("Fares per class")
+            fares = train_fares_long(index.rows(positions))
+            st.dataframe(fares.iloc[:DISPLAY_ROWS])
+            download_frame(fares, "train_fares_by_class.csv", key_prefix)
+
+# ---- Background Jobs ----
+def submit_job(kind, label, target, *args):
+    from scraper.jobs import get_job_queue
+    job = get_job_queue().submit(kind, label, target, *args)
+    st.session_state.setdefault("job_ids", []).append(job.id)
+    st.info(f"Queued job `{job.id}`: {label}. Progress and results appear under *Background jobs*; the page stays usable meanwhile.")
+    return job
 
-def get_filter_price_range(driver):
-    try:
-        wait = WebDriverWait(driver, 5)
-        selector = 'div[data-testid="filters-group-slider"] span[role="status"]'
-        price_filter_element = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", price_filter_element)
-        time.sleep(0.5)
-        text = price_filter_element.text
-        if '-' in text:
-            parts = text.split('-')
-            min_price = int(re.sub(r'[^\d]', '', parts[0]))
-            max_price = int(re.sub(r'[^\d]', '', parts[1]))
-            st.success(f"Found price filter range: Min={min_price}, Max={max_price}. Estimating ratings...")
-            return min_price, max_price
-    except TimeoutException:
-        error_log.append("Warning: Price filter slider not found on page. Cannot estimate ratings.")
-    except Exception as e:
-        error_log.append(f"Warning: Could not get price filter. Reason: {e}")
-    return None, None
+def jobs_panel(kind, show_results):
+    # Lists this session's jobs of one kind. While any is queued or running the panel re-renders itself every two
+    # seconds without rerunning the rest of the page.
+    from scraper.jobs import ACTIVE_STATUSES, get_job_queue
+    job_queue = get_job_queue()
+    def session_jobs():
+        return [job for job in job_queue.jobs(st.session_state.get("job_ids", [])) if job.kind == kind]
+    was_active = any(job.status in ACTIVE_STATUSES for job in session_jobs())
+    def render():
+        jobs = session_jobs()
+        if not jobs:
+            return
+        st.write("### Background jobs")
+        for job in reversed(jobs):
+            col_label, col_rows, col_cancel = st.columns([6, 1, 1])
+            col_label.write(f"`{job.id}` **{job.status}** ({job.elapsed():.0f}s) {job.label}: {job.message}")
+            if job.status in ACTIVE_STATUSES and job.total:
+                col_label.progress(job.done / job.total)
+            col_rows.write(f"{len(job.rows)} rows")
+            if job.status in ACTIVE_STATUSES and col_cancel.button("Cancel", key=f"cancel_job_{job.id}"):
+                job_queue.cancel(job.id)
+            if job.error:
+                col_label.error(job.error)
+        viewable = [job for job in reversed(jobs) if job.rows or job.result is not None]
+        if viewable:
+            job = st.selectbox("Show results of", viewable, format_func=lambda j: f"{j.id} ({j.status}) {j.label}",
+                               key=f"{kind}_job_results")
+            if job.result is not None:
+                show_results(job.result, key_prefix=f"job_{job.id}_")
+                if "status" in job.extra:
+                    st.write("### Per-URL Status")
+                    st.dataframe(job.extra["status"])
+                if job.extra.get("log"):
+                    st.write("### Extraction Log ⚠️")
+                    st.write("\n".join(f"- {line}" for line in job.extra["log"]))
+            else:
+                st.write(f"Partial results so far ({len(job.rows)} rows):")
+                st.dataframe(job_frame(job))
+        if was_active and not any(job.status in ACTIVE_STATUSES for job in jobs):
+            # Last job finished: one full rerun stops the polling.
+            st.rerun()
+    st.fragment(render, run_every=2 if was_active else None)()
 
-def extract_text_hybrid(card_element, selector, clean_func, card_index, field_name):
-    try:
-        element = card_element.find_element(By.CSS_SELECTOR, selector)
-        text = element.text.strip()
-        if text:
-            return clean_func(text)
-        return 'N/A'
-    except Exception as e:
-        if not isinstance(e, NoSuchElementException):
-            error_log.append(f"Card {card_index}: Failed to extract '{field_name}'. Reason: {e}")
-        return 'N/A'
+def job_frame(job):
+    import pandas as pd
+    from scraper.batch import MODES
+    return pd.DataFrame(job.partial_rows(), columns=MODES[job.kind][2])
 
-def scrape_hotels_from_source(driver, url):
-    global error_log
-    error_log = []
-    st.write("Selenium: Navigating to hotel URL and scraping data...")
-    print(f"Navigating to hotel URL: {url}")
-    driver.get(url)
-    wait = WebDriverWait(driver, 10)
-    try:
-        accept_button = wait.until(EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler")))
-        accept_button.click()
-        time.sleep(1)
-    except TimeoutException:
-        print("ℹ️ Cookie consent banner not found.")
-    scroll_to_load_all_cards(driver)
-    min_filter_price, max_filter_price = get_filter_price_range(driver)
-    cards = driver.find_elements(By.CSS_SELECTOR, 'div[data-testid="property-card"]')
-    st.info(f"Found {len(cards)} hotel cards to process.")
-    hotel_data = []
+def batch_scrape_ui(mode, route_types, key_prefix):
+    from scraper.batch import (BATCH_WORKERS, PER_HOST_LIMIT, PER_HOST_DELAY, parse_url_list, read_url_csv,
+                               run_batch, merge_batch_results)
+    from scraper.capture import CAPTURE_NETWORK
+    urls_text = st.text_area("Search URLs (one per line, optionally `url,route type`):", key=f"{key_prefix}_batch_urls")
+    urls_file = st.file_uploader("...or upload a CSV with a `url` column (and optional `route_type`):", type=["csv"], key=f"{key_prefix}_batch_csv")
+    default_route_type = st.radio("Default Route Type", route_types, key=f"{key_prefix}_batch_route_type")
+    col_workers, col_host_limit, col_host_delay = st.columns(3)
+    workers = col_workers.number_input("Parallel browsers", min_value=1, max_value=16, value=BATCH_WORKERS, key=f"{key_prefix}_batch_workers")
+    per_host_limit = col_host_limit.number_input("Max concurrent requests per host", min_value=1, max_value=16, value=PER_HOST_LIMIT, key=f"{key_prefix}_batch_host_limit")
+    per_host_delay = col_host_delay.number_input("Min seconds between requests per host", min_value=0.0, value=PER_HOST_DELAY, step=0.5, key=f"{key_prefix}_batch_host_delay")
+    capture = st.checkbox("Read the site's search API responses (falls back to the rendered page)", value=CAPTURE_NETWORK, disabled=not CAPTURE_NETWORK, help="Needs SCRAPER_CAPTURE_NETWORK=1, which makes the browsers record their network log.", key=f"{key_prefix}_batch_capture")
+    force_refresh = st.checkbox("Force refresh (ignore cached results)", key=f"{key_prefix}_batch_force_refresh")
+    background = st.checkbox("Run in the background", value=True, key=f"{key_prefix}_batch_background")
+    if not st.button(f"Scrape {mode.title()} Batch", key=f"{key_prefix}_batch_button"):
+        return None
+    jobs = parse_url_list(urls_text or "", default_route_type)
+    if urls_file is not None:
+        jobs += read_url_csv(urls_file, default_route_type)
+    if not jobs:
+        st.warning("⚠ Please paste or upload at least one URL.")
+        return None
+    if background:
+        from scraper.jobs import batch_job
+        submit_job(mode, f"{mode.title()} batch of {len(jobs)} URLs", batch_job, mode, jobs, int(workers),
+                   int(per_host_limit), float(per_host_delay), capture, force_refresh)
+        return None
+    st.info(f"Scraping {len(jobs)} URLs across {min(int(workers), len(jobs))} browser workers...")
     progress_bar = st.progress(0)
-    for i, card in enumerate(cards):
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", card)
-        clean_title = lambda t: t.split('\n')[0].strip()
-        clean_address = lambda a: a.replace('\n', ', ').strip()
-        clean_price = lambda p: re.sub(r'[^\d,.]', '', p).strip()
-        clean_type = lambda t: t.strip()
-        title = extract_text_hybrid(card, '[data-testid="title"]', clean_title, i, "Title")
-        address = extract_text_hybrid(card, '[data-testid="address"]', clean_address, i, "Address")
-        price = extract_text_hybrid(card, '[data-testid="price-and-discounted-price"]', clean_price, i, "Price")
-        hotel_type = extract_text_hybrid(card, '[data-testid="property-card-container"] h4', clean_type, i, "Type")
-        try:
-            stars_container = card.find_element(By.CSS_SELECTOR, '[data-testid="rating-stars"]')
-            rating = f"{len(stars_container.find_elements(By.TAG_NAME, 'div'))}"
-        except NoSuchElementException:
-            rating = 'N/A'
-        if rating == 'N/A':
-            try:
-                hotel_price_numeric = int(re.sub(r'[^\d]', '', price)) if price and price != 'N/A' else None
-                if hotel_price_numeric is not None and min_filter_price is not None and max_filter_price is not None:
-                    base_price = max_filter_price / 2
-                    if min_filter_price <= hotel_price_numeric <= base_price:
-                        rating = f"{random.uniform(3.0, 3.5):.1f}"
-                    elif base_price < hotel_price_numeric <= max_filter_price:
-                        rating = f"{random.uniform(3.5, 4.0):.1f}"
-                    else:
-                        rating = f"{random.uniform(2.5, 3.0):.1f}"
-                else:
-                    rating = f"{random.uniform(3.0, 4.0):.1f}"
-            except Exception as e:
-                rating = f"{random.uniform(2.5, 3.5):.1f}"
-                error_log.append(f"Card {i}: Failed rating estimation due to error: {e}")
-        location_link = get_google_maps_link(title, address.split(',')[0] if address != 'N/A' else None, i)
-        hotel_data.append({
-            "Hotel Name": title,
-            "Address": address,
-            "Rating": rating,
-            "Price": price,
-            "Type": hotel_type,
-            "Google Maps Link": location_link
-        })
-        progress_bar.progress((i + 1) / len(cards))
-    return pd.DataFrame(hotel_data)
+    status_line = st.empty()
+    def on_result(result, done, total):
+        progress_bar.progress(done / total)
+        status_line.write(f"[{done}/{total}] {result['status']} in {result['seconds']}s: {result['url']}")
+    start_time_total = time.time()
+    results = run_batch(mode, jobs, workers=int(workers), per_host_limit=int(per_host_limit),
+                        per_host_delay=float(per_host_delay), capture=capture,
+                        force_refresh=force_refresh, on_result=on_result)
+    df, status = merge_batch_results(mode, results)
+    failed = int((status["Status"] == "failed").sum())
+    cached = int((status["Status"] == "cached").sum())
+    st.success(f"Batch completed in {round(time.time() - start_time_total, 2)} seconds ⏱️ "
+               f"{len(df)} rows from {len(jobs) - failed}/{len(jobs)} URLs ({cached} from cache).")
+    st.write("### Per-URL Status")
+    st.dataframe(status)
+    return df
 
-def download_csv(dataframe, filename):
-    if dataframe.empty:
-        st.warning(f"No data to download for {filename}.")
+# ---- Pages ----
+def network_usage_sidebar():
+    from scraper.blocking import network_stats
+    with st.sidebar.expander("Network usage"):
+        net = network_stats.snapshot()
+        st.write(f"Requests: {net['requests']}, downloaded {net['transferred_bytes'] / 1e6:.1f} MB")
+        st.write(f"Blocked: {net['blocked_requests']} requests, ~{net['blocked_bytes_est'] / 1e6:.1f} MB saved")
+        if net["blocked_by_type"]:
+            st.write(", ".join(f"{t}: {n}" for t, n in sorted(net["blocked_by_type"].items(), key=lambda kv: -kv[1])))
+
+def stage_timings_sidebar():
+    from scraper.metrics import registry
+    summary = registry.stage_summary()
+    if not summary:
         return
-    for col in dataframe.columns:
-        dataframe[col] = dataframe[col].astype(str)
-    csv_data = dataframe.to_csv(index=False, encoding="utf-8-sig").encode("utf-8-sig")
-    st.download_button(label=f"📥 Download {filename}", data=csv_data, file_name=filename, mime="text/csv", key=filename)
+    import pandas as pd
+    with st.sidebar.expander("Stage timings"):
+        st.dataframe(pd.DataFrame(summary).fillna(""), hide_index=True)
+        if registry.recent:
+            latest = registry.recent[-1]
+            st.caption(f"Last scrape: {latest['name']} in {latest['seconds']}s ({latest.get('status', latest.get('error', 'ok'))})")
+        st.download_button("Prometheus metrics", registry.prometheus_text, file_name="metrics.prom", key="metrics_download")
 
-# ---- Page Routing ----
-st.sidebar.title("Navigation 🔍")
-page = st.sidebar.radio("Go to", ["Home", "Bus Scraper 🚌", "Train Scraper 🚆", "Hotel Scraper 🏨"])
+def jobs_sidebar():
+    from scraper.jobs import get_job_queue
+    stats = get_job_queue().stats()
+    if stats["queued"] or stats["running"]:
+        st.sidebar.caption(f"Background jobs: {stats['running']} running, {stats['queued']} queued ({stats['workers']} workers)")
 
-if page == "Home":
+def home_page():
     st.title("🚀 Hotel & Travel Scraper")
     st.write("""
-    This tool scrapes bus, train, and hotel data using Selenium and BeautifulSoup.
+    This tool scrapes bus, train, and hotel data using Selenium and lxml.
     *Steps to Use:*
     1. Select *Bus Scraper 🚌*, *Train Scraper 🚆*, or *Hotel Scraper 🏨* from the sidebar.
     2. Enter the appropriate URL (e.g., Abhibus for buses/trains, Booking.com for hotels).
     3. Click *Scrape*.
-    4. Download the results as *CSV*.
+    4. Download the results as *CSV* (gzipped or plain), *Parquet* or *JSON Lines*.
     """)
 
-elif page == "Bus Scraper 🚌":
+def bus_page():
+    import pandas as pd
+    from selenium.common.exceptions import TimeoutException
+    from scraper.abhibus import BUS_COLUMNS, scrape_bus_results
+    from scraper.batch import save_result
+    from scraper.capture import CAPTURE_NETWORK
+    from scraper.fetcher import fetch_results
+    from scraper.jobs import scrape_job
+    from scraper.metrics import trace
     st.title("🚌 Bus Scraper")
-    url_bus = st.text_input("Enter Bus Search URL:", placeholder="https://www.abhibus.com/bus_search/...", key="bus_url_input")
-    route_type_bus = st.radio("Route Type", ["Bus-Route", "Bus-Enroute"], key="bus_route_type_radio")
-    if st.button("Scrape Buses", key="scrape_buses_button"):
-        if url_bus:
-            driver = None
-            all_bus_data_result = []
-            try:
-                with st.spinner("Selenium: Setting up driver, navigating, and waiting for page load..."):
-                    start_time_total = time.time()
-                    driver = setup_driver()
-                    st.write(f"Navigating to URL: {url_bus}")
-                    print(f"Navigating to URL: {url_bus}")
-                    driver.get(url_bus)
-                    expand_government_buses(driver)
-                    st.write("Selenium: Waiting for final page content after expansions (e.g., 'span.fare')...")
-                    print("Selenium: Waiting for final page content after expansions (e.g., 'span.fare')...")
-                    WebDriverWait(driver, 20).until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "span.fare")))
-                    time.sleep(1)
-                    st.write("Selenium: Final content detected. Getting page source.")
-                    print("Selenium: Final content detected. Getting page source.")
-                    page_source = driver.page_source
-                if page_source:
-                    with st.spinner("BeautifulSoup: Parsing HTML and extracting bus data..."):
-                        all_bus_data_result = scrape_buses_from_source(page_source, route_type_bus)
-                else:
-                    st.error("Failed to retrieve page source from Selenium.")
-                    print("Error: page_source was empty.")
-                end_time_total = time.time()
-                st.success(f"Bus scraping completed in {round(end_time_total - start_time_total, 2)} seconds ⏱️ Found {len(all_bus_data_result)} buses.")
-                print(f"Bus scraping completed in {round(end_time_total - start_time_total, 2)} seconds.")
-                if all_bus_data_result:
-                    df_bus = pd.DataFrame(all_bus_data_result, columns=["Bus Name", "Bus Type", "Departure", "Arrival", "Starting Place", "Duration", "Ending Place", "Price", "Route Type"])
-                    is_gov_by_std_name = df_bus["Bus Name"] == "Government Bus"
-                    is_gov_by_rtc_in_name = df_bus["Bus Name"].str.contains("RTC", case=False, na=False)
-                    is_gov_by_rtc_in_type = df_bus["Bus Type"].str.contains("RTC", case=False, na=False)
-                    gov_condition = is_gov_by_std_name | is_gov_by_rtc_in_name | is_gov_by_rtc_in_type
-                    df_gov = df_bus[gov_condition].copy()
-                    df_private = df_bus[~gov_condition].copy()
-                    if not df_gov.empty:
-                        st.write("### Government/RTC Buses 🏛")
-                        st.dataframe(df_gov)
-                        download_csv(df_gov, "government_buses.csv")
-                    if not df_private.empty:
-                        st.write("### Private Buses 🚍")
-                        st.dataframe(df_private)
-                        download_csv(df_private, "private_buses.csv")
-                    if df_gov.empty and df_private.empty and not df_bus.empty:
-                        st.write("### All Buses")
-                        st.dataframe(df_bus)
-                        download_csv(df_bus, "all_buses.csv")
-                    elif df_bus.empty:
-                        st.warning("No bus data was processed into the DataFrame from BeautifulSoup.")
-                else:
-                    st.warning("No bus data extracted by BeautifulSoup. Check page source and selectors.")
-            except TimeoutException as te_selenium:
-                st.error(f"Selenium timed out waiting for page elements (e.g., 'span.fare' after expansions): {te_selenium}")
-                print(f"Selenium TimeoutException: {te_selenium}")
-                print(traceback.format_exc())
-            except Exception as e:
-                st.error(f"An error occurred during the bus scraping process: {e}")
-                print(f"An error occurred during the bus scraping process: {e}")
-                print(traceback.format_exc())
-            finally:
-                if driver:
-                    driver.quit()
-                    print("WebDriver closed for buses.")
-        else:
-            st.warning("⚠ Please enter a valid Bus URL.")
+    input_mode_bus = st.radio("Input", ["Single URL", "Batch"], horizontal=True, key="bus_input_mode")
+    if input_mode_bus == "Batch":
+        df_bus = batch_scrape_ui("bus", ["Bus-Route", "Bus-Enroute"], "bus")
+        if df_bus is not None:
+            if df_bus.empty:
+                st.warning("No bus data extracted from any URL in the batch.")
+            else:
+                keep_result("bus", df_bus)
+    else:
+        url_bus = st.text_input("Enter Bus Search URL:", placeholder="https://www.abhibus.com/bus_search/...", key="bus_url_input")
+        route_type_bus = st.radio("Route Type", ["Bus-Route", "Bus-Enroute"], key="bus_route_type_radio")
+        capture_bus = st.checkbox("Read the site's search API response (falls back to the rendered page)", value=CAPTURE_NETWORK, disabled=not CAPTURE_NETWORK, help="Needs SCRAPER_CAPTURE_NETWORK=1, which makes the browsers record their network log.", key="bus_capture_checkbox")
+        force_bus = st.checkbox("Force refresh (ignore cached results)", key="bus_force_refresh")
+        background_bus = st.checkbox("Run in the background", value=True, key="bus_background")
+        if st.button("Scrape Buses", key="scrape_buses_button"):
+            df_bus_cached = cached_result("bus", url_bus, route_type_bus, force_bus) if url_bus else None
+            if df_bus_cached is not None:
+                keep_result("bus", df_bus_cached)
+            elif url_bus and background_bus:
+                submit_job("bus", f"Bus: {url_bus}", scrape_job, "bus", url_bus, route_type_bus, capture_bus, force_bus)
+            elif url_bus:
+                all_bus_data_result = []
+                try:
+                    with trace("scrape-bus", mode="bus", url=url_bus, route_type=route_type_bus):
+                        with st.spinner("Fetching the page (plain HTTP first, a warm browser if the results need one)..."):
+                            start_time_total = time.time()
+                            bus_records, page_source, tier_bus, reason_bus = fetch_results("bus", url_bus, capture_bus)
+                        st.caption(f"Fetched with {'plain HTTP' if tier_bus == 'http' else 'the browser'}" + (f" ({reason_bus})" if reason_bus else "") + ".")
+                        if bus_records or page_source:
+                            with st.spinner("lxml: Parsing HTML and extracting bus data..."):
+                                all_bus_data_result = scrape_bus_results(bus_records, page_source, route_type_bus, source="dom" if tier_bus == "http" else "api")
+                        else:
+                            st.error("Failed to retrieve page source from Selenium.")
+                            print("Error: page_source was empty.")
+                        end_time_total = time.time()
+                        st.success(f"Bus scraping completed in {round(end_time_total - start_time_total, 2)} seconds ⏱️ Found {len(all_bus_data_result)} buses.")
+                        print(f"Bus scraping completed in {round(end_time_total - start_time_total, 2)} seconds.")
+                        if all_bus_data_result:
+                            df_bus = pd.DataFrame(all_bus_data_result, columns=BUS_COLUMNS)
+                            save_result("bus", url_bus, route_type_bus, df_bus)
+                            keep_result("bus", df_bus)
+                        else:
+                            st.warning("No bus data extracted from the page. Check page source and selectors.")
+                except TimeoutException as te_selenium:
+                    st.error(f"Selenium timed out waiting for page elements (e.g., 'span.fare' after expansions): {te_selenium}")
+                    print(f"Selenium TimeoutException: {te_selenium}")
+                    print(traceback.format_exc())
+                except Exception as e:
+                    st.error(f"An error occurred during the bus scraping process: {e}")
+                    print(f"An error occurred during the bus scraping process: {e}")
+                    print(traceback.format_exc())
+            else:
+                st.warning("⚠ Please enter a valid Bus URL.")
+    show_kept_result("bus", show_bus_results)
+    jobs_panel("bus", show_bus_results)
 
-elif page == "Train Scraper 🚆":
+def train_page():
+    import pandas as pd
+    from selenium.common.exceptions import TimeoutException
+    from scraper.abhibus import TRAIN_COLUMNS, scrape_train_results
+    from scraper.batch import save_result
+    from scraper.capture import CAPTURE_NETWORK
+    from scraper.fetcher import fetch_results
+    from scraper.jobs import scrape_job
+    from scraper.metrics import trace
     st.title("🚆 Train Scraper")
-    url_train = st.text_input("Enter Train Search URL:", placeholder="https://www.abhibus.com/trains/results/...", key="train_url_input")
-    route_type_train = st.radio("Route Type", ["Train-Route", "Train-Enroute"], key="train_route_type_radio")
-    if st.button("Scrape Trains", key="scrape_trains_button"):
-        if url_train:
-            driver = None
-            all_train_data_result = []
-            try:
-                with st.spinner("Selenium: Setting up driver, navigating, and waiting for page load..."):
-                    start_time_total = time.time()
-                    driver = setup_driver()
-                    st.write(f"Navigating to URL: {url_train}")
-                    print(f"Navigating to URL: {url_train}")
-                    driver.get(url_train)
-                    st.write("Selenium: Waiting for final train page content (e.g., train 'name')...")
-                    print("Selenium: Waiting for final train page content (e.g., train 'name')...")
-                    WebDriverWait(driver, 25).until(EC.presence_of_all_elements_located((By.CLASS_NAME, "name")))
-                    time.sleep(1)
-                    st.write("Selenium: Final train content detected. Getting page source.")
-                    print("Selenium: Final train content detected. Getting page source.")
-                    page_source = driver.page_source
-                if page_source:
-                    with st.spinner("BeautifulSoup: Parsing HTML and extracting train data..."):
-                        all_train_data_result = scrape_trains_from_source(page_source, route_type_train)
-                else:
-                    st.error("Failed to retrieve page source from Selenium for trains.")
-                    print("Error: page_source was empty for trains.")
-                end_time_total = time.time()
-                st.success(f"Train scraping completed in {round(end_time_total - start_time_total, 2)} seconds ⏱️ Found {len(all_train_data_result)} trains.")
-                print(f"Train scraping completed in {round(end_time_total - start_time_total, 2)} seconds.")
-                if all_train_data_result:
-                    df_train = pd.DataFrame(all_train_data_result, columns=["Train Name", "Train Type", "Departure", "Arrival", "Starting Station", "Duration", "Destination Station", "Prices", "Frequency", "Route Type"])
-                    st.dataframe(df_train)
-                    download_csv(df_train, "train_details.csv")
-                else:
-                    st.warning("No train data extracted by BeautifulSoup. Check page source and selectors.")
-            except TimeoutException as te_selenium:
-                st.error(f"Selenium timed out waiting for train page elements (e.g., 'name'): {te_selenium}")
-                print(f"Selenium TimeoutException for trains: {te_selenium}")
-                print(traceback.format_exc())
-            except Exception as e:
-                st.error(f"An error occurred during train scraping: {e}")
-                print(f"An error occurred during train scraping: {e}")
-                print(traceback.format_exc())
-            finally:
-                if driver:
-                    driver.quit()
-                    print("WebDriver closed for trains.")
-        else:
-            st.warning("⚠ Please enter a valid Train URL.")
+    input_mode_train = st.radio("Input", ["Single URL", "Batch"], horizontal=True, key="train_input_mode")
+    if input_mode_train == "Batch":
+        df_train = batch_scrape_ui("train", ["Train-Route", "Train-Enroute"], "train")
+        if df_train is not None:
+            if df_train.empty:
+                st.warning("No train data extracted from any URL in the batch.")
+            else:
+                keep_result("train", df_train)
+    else:
+        url_train = st.text_input("Enter Train Search URL:", placeholder="https://www.abhibus.com/trains/results/...", key="train_url_input")
+        route_type_train = st.radio("Route Type", ["Train-Route", "Train-Enroute"], key="train_route_type_radio")
+        capture_train = st.checkbox("Read the site's search API response (falls back to the rendered page)", value=CAPTURE_NETWORK, disabled=not CAPTURE_NETWORK, help="Needs SCRAPER_CAPTURE_NETWORK=1, which makes the browsers record their network log.", key="train_capture_checkbox")
+        force_train = st.checkbox("Force refresh (ignore cached results)", key="train_force_refresh")
+        background_train = st.checkbox("Run in the background", value=True, key="train_background")
+        if st.button("Scrape Trains", key="scrape_trains_button"):
+            df_train_cached = cached_result("train", url_train, route_type_train, force_train) if url_train else None
+            if df_train_cached is not None:
+                keep_result("train", df_train_cached)
+            elif url_train and background_train:
+                submit_job("train", f"Train: {url_train}", scrape_job, "train", url_train, route_type_train, capture_train, force_train)
+            elif url_train:
+                all_train_data_result = []
+                try:
+                    with trace("scrape-train", mode="train", url=url_train, route_type=route_type_train):
+                        with st.spinner("Fetching the page (plain HTTP first, a warm browser if the results need one)..."):
+                            start_time_total = time.time()
+                            train_records, page_source, tier_train, reason_train = fetch_results("train", url_train, capture_train)
+                        st.caption(f"Fetched with {'plain HTTP' if tier_train == 'http' else 'the browser'}" + (f" ({reason_train})" if reason_train else "") + ".")
+                        if train_records or page_source:
+                            with st.spinner("lxml: Parsing HTML and extracting train data..."):
+                                all_train_data_result = scrape_train_results(train_records, page_source, route_type_train, source="dom" if tier_train == "http" else "api")
+                        else:
+                            st.error("Failed to retrieve page source from Selenium for trains.")
+                            print("Error: page_source was empty for trains.")
+                        end_time_total = time.time()
+                        st.success(f"Train scraping completed in {round(end_time_total - start_time_total, 2)} seconds ⏱️ Found {len(all_train_data_result)} trains.")
+                        print(f"Train scraping completed in {round(end_time_total - start_time_total, 2)} seconds.")
+                        if all_train_data_result:
+                            df_train = pd.DataFrame(all_train_data_result, columns=TRAIN_COLUMNS)
+                            save_result("train", url_train, route_type_train, df_train)
+                            keep_result("train", df_train)
+                        else:
+                            st.warning("No train data extracted from the page. Check page source and selectors.")
+                except TimeoutException as te_selenium:
+                    st.error(f"Selenium timed out waiting for train page elements (e.g., 'name'): {te_selenium}")
+                    print(f"Selenium TimeoutException for trains: {te_selenium}")
+                    print(traceback.format_exc())
+                except Exception as e:
+                    st.error(f"An error occurred during train scraping: {e}")
+                    print(f"An error occurred during train scraping: {e}")
+                    print(traceback.format_exc())
+            else:
+                st.warning("⚠ Please enter a valid Train URL.")
+    show_kept_result("train", show_train_results)
+    jobs_panel("train", show_train_results)
 
-elif page == "Hotel Scraper 🏨":
+def hotel_page():
+    import pandas as pd
+    from scraper import booking
+    from scraper.batch import save_result
+    from scraper.booking import (EXTRACTION_MODES, HOTEL_COLUMNS, SHARD_STRATEGIES, STREAM_DIR, collect_hotel_cards,
+                                 collect_hotel_cards_sharded, geocode_hotels, stream_hotel_rows, stream_rows_to_csv)
+    from scraper.capture import CAPTURE_NETWORK
+    from scraper.driver_pool import get_driver_pool
+    from scraper.geocache import get_geocode_cache
+    from scraper.jobs import hotel_job
+    from scraper.metrics import trace
     st.title("🏨 Hotel Scraper")
+    get_driver_pool()
     url_hotel = st.text_input("Enter Booking.com URL:", placeholder="https://www.booking.com/searchresults.en-gb.html?ss=London", key="hotel_url_input")
+    extraction_labels = {"script": "In-page script (one round trip)", "source": "Page source + lxml",
+                         "capture": "Search API responses (falls back to in-page script)"}
+    hotel_streaming = st.checkbox("Stream results while the page is still loading", value=True, key="hotel_streaming_checkbox")
+    hotel_extraction = "script"
+    hotel_sharding = None
+    target_count = max_price = 0
+    if not hotel_streaming:
+        pagination_labels = {None: "Infinite scroll (one tab)", "offset": "Result pages in parallel",
+                             "price": "Price bands in parallel"}
+        hotel_sharding = st.radio("Pagination", [None] + SHARD_STRATEGIES, format_func=pagination_labels.get, horizontal=True,
+                                  key="hotel_sharding_radio",
+                                  help="Parallel modes load each result page in its own browser and merge them; price bands also get past Booking's 1000-result cap.")
+        if hotel_sharding:
+            pool_size = get_driver_pool().size
+            shard_workers = st.number_input("Browsers", min_value=1, max_value=pool_size, value=pool_size, key="hotel_shard_workers",
+                                            help="Capped by the driver pool size (SCRAPER_POOL_SIZE).")
+        else:
+            hotel_extraction = st.radio("Card extraction", [mode for mode in EXTRACTION_MODES if mode != "capture" or CAPTURE_NETWORK], format_func=extraction_labels.get, horizontal=True, key="hotel_extraction_radio")
+    else:
+        col_target, col_max_price = st.columns(2)
+        target_count = col_target.number_input("Stop after this many hotels (0 = all)", min_value=0, value=0, step=10, key="hotel_target_count")
+        max_price = col_max_price.number_input("Skip hotels priced above (0 = no limit)", min_value=0, value=0, step=50, key="hotel_max_price",
+                                               help="For searches sorted by price, scrolling stops at the first hotel above this price.")
+    with st.expander("Geocoding cache"):
+        geocode_cache = get_geocode_cache()
+        st.download_button("📥 Export cache (CSV)", data=geocode_cache.export_csv, file_name="geocode_cache.csv", mime="text/csv", key="geocode_cache_export")
+        warm_file = st.file_uploader("Warm cache from an exported CSV", type=["csv"], key="geocode_cache_warm")
+        if warm_file is not None and st.button("Load into cache", key="geocode_cache_warm_button"):
+            loaded = geocode_cache.warm_from_csv(warm_file.read().decode("utf-8-sig"))
+            st.success(f"Loaded {loaded} geocoding entries.")
+    force_hotel = st.checkbox("Force refresh (ignore cached results)", key="hotel_force_refresh")
+    background_hotel = st.checkbox("Run in the background", value=True, key="hotel_background")
+    # Early-stop limits change which hotels come back, so they are part of the cache key.
+    hotel_variant = f"target={int(target_count)};max_price={int(max_price)}"
+    if hotel_sharding == "price":
+        # Price bands can return more than the 1000 results a single search is capped at.
+        hotel_variant += ";shard=price"
     if st.button("Scrape Hotels", key="scrape_hotels_button"):
+        df_hotel_cached = None
         if not url_hotel or not url_hotel.startswith("https://www.booking.com"):
             st.error("Please enter a valid Booking.com URL.")
         else:
-            driver = None
+            df_hotel_cached = cached_result("hotel", url_hotel, hotel_variant, force_hotel)
+        if df_hotel_cached is not None:
+            keep_result("hotel", df_hotel_cached)
+        elif url_hotel and url_hotel.startswith("https://www.booking.com") and background_hotel:
+            submit_job("hotel", f"Hotels: {url_hotel}", hotel_job, url_hotel, hotel_variant, hotel_streaming,
+                       hotel_extraction, int(target_count), int(max_price), hotel_sharding,
+                       int(shard_workers) if hotel_sharding else None)
+        elif url_hotel and url_hotel.startswith("https://www.booking.com"):
             try:
-                with st.spinner("Initializing WebDriver and scraping hotel data..."):
-                    start_time_total = time.time()
-                    driver = setup_driver()
-                    df_hotel = scrape_hotels_from_source(driver, url_hotel)
-                    end_time_total = time.time()
-                    st.success(f"Hotel scraping completed in {round(end_time_total - start_time_total, 2)} seconds ⏱️ Found {len(df_hotel)} hotels.")
-                    print(f"Hotel scraping completed in {round(end_time_total - start_time_total, 2)} seconds.")
-                    if not df_hotel.empty:
-                        st.write("### Hotel Data 🏨")
-                        st.dataframe(df_hotel)
-                        download_csv(df_hotel, "hotel_details.csv")
-                    else:
-                        st.warning("No hotel data extracted. Check page source and selectors.")
-                    if error_log:
-                        st.write("### Extraction Log ⚠️")
-                        st.dataframe(pd.DataFrame(error_log, columns=["Log Message"]))
+                with trace("scrape-hotel", mode="hotel", url=url_hotel, route_type=hotel_variant):
+                    with st.spinner("Borrowing a warm WebDriver and scraping hotel data..."):
+                        start_time_total = time.time()
+                        if hotel_sharding:
+                            shard_status = st.empty()
+                            hotel_rows = collect_hotel_cards_sharded(
+                                url_hotel, hotel_sharding, int(shard_workers),
+                                on_progress=lambda done, found: shard_status.write(f"{done} result pages loaded, {found} hotels so far."))
+                        else:
+                            with get_driver_pool().borrow() as driver:
+                                if hotel_streaming:
+                                    hotel_rows = []
+                                    stream_path = os.path.join(STREAM_DIR, f"hotels-{time.strftime('%Y%m%d-%H%M%S')}.csv")
+                                    stream_status = st.empty()
+                                    stream_table = st.empty()
+                                    batches = stream_hotel_rows(driver, url_hotel, target_count=int(target_count) or None,
+                                                                max_price=int(max_price) or None)
+                                    for rows in stream_rows_to_csv(batches, stream_path):
+                                        if not hotel_rows:
+                                            print(f"First hotel results after {round(time.time() - start_time_total, 2)} seconds.")
+                                        hotel_rows.extend(rows)
+                                        stream_status.write(f"Streaming: {len(hotel_rows)} hotels so far ({round(time.time() - start_time_total, 1)}s), saved to `{stream_path}`")
+                                        stream_table.dataframe(pd.DataFrame(hotel_rows, columns=HOTEL_COLUMNS))
+                                else:
+                                    hotel_rows = collect_hotel_cards(driver, url_hotel, hotel_extraction)
+                        df_hotel = geocode_hotels(hotel_rows)
+                        end_time_total = time.time()
+                        st.success(f"Hotel scraping completed in {round(end_time_total - start_time_total, 2)} seconds ⏱️ Found {len(df_hotel)} hotels.")
+                        print(f"Hotel scraping completed in {round(end_time_total - start_time_total, 2)} seconds.")
+                        if not df_hotel.empty:
+                            save_result("hotel", url_hotel, hotel_variant, df_hotel)
+                            keep_result("hotel", df_hotel)
+                        else:
+                            st.warning("No hotel data extracted. Check page source and selectors.")
+                        if booking.error_log():
+                            st.write("### Extraction Log ⚠️")
+                            st.dataframe(pd.DataFrame(booking.error_log(), columns=["Log Message"]))
             except Exception as e:
                 st.error(f"An error occurred during hotel scraping: {e}")
                 print(f"An error occurred during hotel scraping: {e}")
                 print(traceback.format_exc())
-            finally:
-                if driver:
-                    driver.quit()
-                    print("WebDriver closed for hotels.")
+    show_kept_result("hotel", show_hotel_results)
+    jobs_panel("hotel", show_hotel_results)
+
+def history_page():
+    from scraper.history import fare_range, last_snapshots, list_routes, snapshot_diff
+    st.title("📈 Price History")
+    history_mode = st.radio("Mode", ["bus", "train", "hotel"], horizontal=True, key="history_mode")
+    routes = list_routes(history_mode)
+    if not routes:
+        st.info("No snapshots recorded yet. Every successful scrape is added to the history.")
+    else:
+        route, travel_date = st.selectbox("Route / travel date", routes, format_func=lambda r: f"{r[0]} ({r[1]})", key="history_route")
+        fares = fare_range(history_mode, route, travel_date)
+        if not fares.empty:
+            st.write("### Fare range per snapshot")
+            st.line_chart(fares.set_index("scraped_at")[["fare_min", "fare_mean", "fare_max"]])
+            st.dataframe(fares)
+        st.write("### Changes since the previous snapshot")
+        changes = snapshot_diff(history_mode, route, travel_date)
+        if changes.empty:
+            st.write("No changes (or fewer than two snapshots).")
+        else:
+            st.dataframe(changes)
+        snapshot_count = st.number_input("Show the last N snapshots", min_value=1, max_value=50, value=2, key="history_last_n")
+        st.dataframe(last_snapshots(history_mode, route, travel_date, n=int(snapshot_count)))
+
+def planner_page():
+    import datetime
+    import pandas as pd
+    from scraper.history import latest_rows, list_routes
+    from scraper.planner import MAX_DURATION, MIN_CONNECTION, OBJECTIVES, JourneyPlanner
+    st.title("🧭 Journey Planner")
+    st.write("Combines scraped bus and train legs into one timetable and finds the fastest or cheapest connection.")
+    source = st.radio("Legs from", ["Price history", "Uploaded CSVs"], horizontal=True, key="planner_source")
+    if source == "Price history":
+        dates = sorted({date for mode in ("bus", "train") for _, date in list_routes(mode)})
+        travel_date = st.selectbox("Travel date", [None] + dates, format_func=lambda d: d or "All dates", key="planner_date",
+                                   help="Uses the latest snapshot of every scraped route.")
+    else:
+        bus_file = st.file_uploader("Bus results CSV", type=["csv"], key="planner_bus_csv")
+        train_file = st.file_uploader("Train results CSV", type=["csv"], key="planner_train_csv")
+    if st.button("Build timetable", key="planner_build"):
+        with st.spinner("Indexing legs..."):
+            start = time.time()
+            if source == "Price history":
+                bus_df, train_df = latest_rows("bus", travel_date), latest_rows("train", travel_date)
+            else:
+                read = lambda f: pd.read_csv(f, dtype=str, keep_default_na=False) if f is not None else None
+                bus_df, train_df = read(bus_file), read(train_file)
+            st.session_state["planner"] = JourneyPlanner.from_frames(bus_df, train_df)
+            st.session_state["planner_built"] = round(time.time() - start, 2)
+    planner = st.session_state.get("planner")
+    if planner is None:
+        return
+    st.caption(f"{len(planner.legs)} legs, {len(planner.stop_names)} stops, {len(planner.dep)} timed connections "
+               f"(indexed in {st.session_state['planner_built']}s).")
+    if len(planner.stop_names) < 2:
+        st.warning("Not enough scraped legs to plan a journey.")
+        return
+    stops = planner.stops()
+    col_from, col_to = st.columns(2)
+    origin = col_from.selectbox("From", stops, key="planner_from")
+    destination = col_to.selectbox("To", stops, index=min(1, len(stops) - 1), key="planner_to")
+    col_time, col_change, col_max = st.columns(3)
+    depart_after = col_time.time_input("Depart after", datetime.time(6, 0), key="planner_depart")
+    min_connection = col_change.number_input("Minimum connection (min)", min_value=0, value=MIN_CONNECTION, step=5, key="planner_mct")
+    max_hours = col_max.number_input("Maximum journey (hours)", min_value=1, value=MAX_DURATION // 60, key="planner_max_hours")
+    objective = st.radio("Optimise for", OBJECTIVES, horizontal=True, key="planner_objective")
+    if origin == destination:
+        st.info("Pick two different stops.")
+        return
+    start = time.perf_counter()
+    itinerary = planner.plan(origin, destination, depart_after.hour * 60 + depart_after.minute, objective,
+                             int(min_connection), int(max_hours) * 60)
+    query_ms = (time.perf_counter() - start) * 1000
+    if itinerary is None:
+        st.warning(f"No connection from {origin} to {destination} within {int(max_hours)} hours ({query_ms:.1f} ms).")
+        return
+    fare = "unknown" if itinerary["fare"] is None else f"₹{itinerary['fare']:,.0f}"
+    st.success(f"{itinerary['departure']} → {itinerary['arrival']}: {itinerary['duration_min'] // 60}h {itinerary['duration_min'] % 60}m, "
+               f"{fare}, {itinerary['transfers']} change(s). Found in {query_ms:.1f} ms.")
+    st.dataframe(itinerary["legs"], hide_index=True)
+
+# ---- Page Routing ----
+PAGES = {"Home": home_page, "Bus Scraper 🚌": bus_page, "Train Scraper 🚆": train_page,
+         "Hotel Scraper 🏨": hotel_page, "Price History 📈": history_page, "Journey Planner 🧭": planner_page}
+
+def main():
+    st.set_page_config(page_title="Hotel & Travel Scraper", page_icon="🛠", layout="wide")
+    set_reporter(StreamlitReporter())
+    serve_metrics()
+    st.sidebar.title("Navigation 🔍")
+    page = st.sidebar.radio("Go to", list(PAGES))
+    network_usage_sidebar()
+    stage_timings_sidebar()
+    jobs_sidebar()
+    st.sidebar.selectbox("Download format", ["csv.gz", "parquet", "jsonl", "csv"], key="export_format")
+    PAGES[page]()
+
+if __name__ == "__main__":
+    main()
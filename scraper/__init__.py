@@ -0,0 +1,43 @@
+import importlib
+
+# ---- Lazy Core Exports ----
+# `import scraper` stays cheap: each name below loads its module (and Selenium, pandas or pyarrow with it) only on
+# first use, so parsing-only callers never pay for the browser stack. A (module, name) pair exports a name under
+# another one, e.g. where it would collide with a submodule: `scraper.normalize` is always the module.
+_EXPORTS = {
+    "BUS_COLUMNS": "scraper.abhibus",
+    "TRAIN_COLUMNS": "scraper.abhibus",
+    "scrape_buses_from_source": "scraper.abhibus",
+    "scrape_trains_from_source": "scraper.abhibus",
+    "bus_records_from_json": "scraper.abhibus",
+    "train_records_from_json": "scraper.abhibus",
+    "load_bus_results": "scraper.abhibus",
+    "load_train_results": "scraper.abhibus",
+    "scrape_bus_results": "scraper.abhibus",
+    "scrape_train_results": "scraper.abhibus",
+    "HOTEL_COLUMNS": "scraper.booking",
+    "extract_hotel_cards_from_source": "scraper.booking",
+    "hotel_cards_from_json": "scraper.booking",
+    "build_hotel_rows": "scraper.booking",
+    "collect_hotel_cards": "scraper.booking",
+    "collect_hotel_cards_sharded": "scraper.booking",
+    "geocode_hotels": "scraper.booking",
+    "standardize_bus_type": "scraper.standardize",
+    "standardize_Gov_bus_name": "scraper.standardize",
+    "standardize_train_name": "scraper.standardize",
+    "normalize_results": ("scraper.normalize", "normalize"),
+    "train_fares_long": "scraper.normalize",
+    "get_driver_pool": "scraper.driver_pool",
+}
+
+def __getattr__(name):
+    target = _EXPORTS.get(name)
+    if target is None:
+        raise AttributeError(f"module 'scraper' has no attribute '{name}'")
+    module, attr = target if isinstance(target, tuple) else (target, name)
+    value = getattr(importlib.import_module(module), attr)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTS))
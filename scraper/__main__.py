@@ -0,0 +1,4 @@
+import sys
+from scraper.cli import main
+
+sys.exit(main())
@@ -0,0 +1,404 @@
+import traceback
+from selenium.webdriver.common.by import By
+import lxml.html
+from lxml import etree
+from scraper.capture import CAPTURE_NETWORK, as_text, capture_search, clock_text, find_records, pick
+from scraper.blocking import navigate, read_page_source
+from scraper.metrics import count, span
+from scraper.readiness import wait_for_more, wait_for_quiet
+from scraper.reporting import report
+from scraper.standardize import standardize_Gov_bus_name, standardize_bus_type, standardize_train_name
+
+BUS_COLUMNS = ["Bus Name", "Bus Type", "Departure", "Arrival", "Starting Place", "Duration", "Ending Place", "Price", "Route Type"]
+TRAIN_COLUMNS = ["Train Name", "Train Type", "Departure", "Arrival", "Starting Station", "Duration", "Destination Station", "Prices", "Frequency", "Route Type"]
+
+# ---- Helper Functions ----
+GOV_DROPDOWN_SELECTOR = 'a.btn.dark.filled.primary.sm.rounded-sm.inactive.button'
+BUS_FARE_SELECTOR = 'span.fare'
+
+def expand_government_buses(driver):
+    report.write("Attempting to expand government bus sections (if needed)...")
+    with span("expand_government"):
+        _expand_government_buses(driver)
+
+def _expand_government_buses(driver):
+    try:
+        dropdown_buttons = driver.find_elements(By.CSS_SELECTOR, GOV_DROPDOWN_SELECTOR)
+        if not dropdown_buttons:
+            print("No government bus dropdown buttons found with the primary selector.")
+        else:
+            print(f"Found {len(dropdown_buttons)} potential government dropdown button(s).")
+            for i, button in enumerate(dropdown_buttons):
+                try:
+                    button_text = button.text.lower() if button.text else ""
+                    if button.is_displayed() and button.is_enabled() and "hide" not in button_text:
+                        print(f"Attempting to click dropdown #{i + 1} (text: '{button.text}')")
+                        driver.execute_script("arguments[0].scrollIntoView({behavior: 'instant', block: 'center', inline: 'nearest'});", button)
+                        fares_before = len(driver.find_elements(By.CSS_SELECTOR, BUS_FARE_SELECTOR))
+                        button.click()
+                        report.write(f"Clicked dropdown #{i + 1} (text was: '{button.text}').")
+                        expanded = wait_for_more(driver, BUS_FARE_SELECTOR, fares_before, kind="expand")
+                        print(f"Dropdown #{i + 1}: {expanded['count'] - fares_before} new fares after {round(expanded['waited'] / 1000, 2)}s.")
+                    elif "hide" in button_text:
+                        print(f"Skipped clicking dropdown #{i + 1} (text: '{button.text}')")
+                except Exception as click_error:
+                    print(f"Failed to interact with or click dropdown #{i + 1}: {click_error}")
+                    report.warning(f"Error with dropdown button #{i+1}: {click_error}")
+    except Exception as e:
+        print(f"Error in expand_government_buses: {e}")
+
+# ---- Page Loading ----
+def open_page(driver, url):
+    report.write(f"Navigating to URL: {url}")
+    navigate(driver, url)
+
+# WebDriverWait and expected_conditions pull in the whole remote WebDriver, so they are imported where a driver is
+# actually waited on; the parsers below stay importable without that cost.
+def load_bus_page(driver, url, navigate=True):
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    if navigate:
+        open_page(driver, url)
+    # Either fares or collapsed government sections mean the results have rendered.
+    with span("wait", kind="selector"):
+        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, f"{BUS_FARE_SELECTOR}, {GOV_DROPDOWN_SELECTOR}")))
+    wait_for_quiet(driver)
+    expand_government_buses(driver)
+    report.write("Selenium: Waiting for final page content after expansions (e.g., 'span.fare')...")
+    with span("wait", kind="selector"):
+        WebDriverWait(driver, 20).until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, BUS_FARE_SELECTOR)))
+    wait_for_quiet(driver)
+    report.write("Selenium: Final content detected. Getting page source.")
+    return read_page_source(driver)
+
+def load_train_page(driver, url, navigate=True):
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    if navigate:
+        open_page(driver, url)
+    report.write("Selenium: Waiting for final train page content (e.g., train 'name')...")
+    with span("wait", kind="selector"):
+        WebDriverWait(driver, 25).until(EC.presence_of_all_elements_located((By.CLASS_NAME, "name")))
+    wait_for_quiet(driver)
+    report.write("Selenium: Final train content detected. Getting page source.")
+    return read_page_source(driver)
+
+# ---- Card Extraction Engine ----
+# Each page type is described by the CSS class of every field plus an "anchor" field that appears exactly once
+# per result card. A single walk over the element tree collects every field element in document order; elements
+# are then grouped under the card that contains their anchor, so a missing field yields "N/A" instead of
+# shifting later rows.
+BUS_FIELDS = {"title": "title", "sub-title": "subtitle", "departure-time": "departure", "arrival-time": "arrival",
+              "source-name": "source", "travel-time": "duration", "destination-name": "destination", "fare": "fare"}
+BUS_FIELD_TAGS = {"fare": "span"}
+TRAIN_FIELDS = {"name": "name", "duration": "duration", "trainTime": "times",
+                "react-horizontal-scrolling-menu--scroll-container": "prices", "days-of-run": "frequency"}
+
+def element_text(element):
+    # Same result as BeautifulSoup's get_text(strip=True).
+    return "".join(t.strip() for t in element.itertext())
+
+def field_hits(root, field_classes, field_tags=None):
+    # Plain iteration beats an XPath class predicate here: libxml2 re-tokenizes @class for every term.
+    hits = []
+    for element in root.iter(etree.Element):
+        classes = element.get("class")
+        if not classes or field_classes.keys().isdisjoint(classes.split()):
+            continue
+        for cls in classes.split():
+            field = field_classes.get(cls)
+            if field and (not field_tags or field_tags.get(cls, element.tag) == element.tag):
+                hits.append((element, field))
+    return hits
+
+def group_cards(hits, anchor):
+    anchors = [element for element, field in hits if field == anchor]
+    anchors_below = {}
+    for element in anchors:
+        for ancestor in element.iterancestors():
+            anchors_below[ancestor] = anchors_below.get(ancestor, 0) + 1
+    # A card is the largest subtree that holds exactly one anchor.
+    cards = {}
+    for element in anchors:
+        card_root = element
+        parent = element.getparent()
+        while parent is not None and anchors_below.get(parent) == 1:
+            card_root = parent
+            parent = parent.getparent()
+        cards[card_root] = {}
+    for element, field in hits:
+        node = element
+        while node is not None and node not in cards:
+            node = node.getparent()
+        if node is not None:
+            cards[node].setdefault(field, element)
+    return list(cards.values())
+
+def parse_html(page_source_html):
+    return lxml.html.document_fromstring(page_source_html)
+
+def missing_fields_msg(kind, records, columns, unit="cards", source="dom"):
+    # Also feeds the cards_found / fields_missing counters, since every extractor reports through here.
+    counts = {column: sum(1 for record in records if record[i] == "N/A") for i, column in enumerate(columns[:-1])}
+    missing = [f"{column}={n}" for column, n in counts.items() if n]
+    count("cards_found", len(records), kind=kind, source=source)
+    for column, n in counts.items():
+        if n:
+            count("fields_missing", n, kind=kind, source=source, field=column)
+    return f"Extracted {len(records)} {kind} {unit}. Missing fields: {', '.join(missing) if missing else 'none'}."
+
+# ---- Parsing ----
+def process_bus_fare(fare_text):
+    fare_clean = fare_text.replace("₹", "").replace(",", "").strip()
+    try:
+        base_price = int(float(fare_clean))
+        return f"{base_price} - {base_price + 300}"
+    except ValueError:
+        return fare_text
+
+def bus_record(texts):
+    title = texts.get("title")
+    subtitle = texts.get("subtitle")
+    fare = texts.get("fare")
+    return (
+        standardize_Gov_bus_name(title) if title else "N/A",
+        standardize_bus_type(subtitle) if subtitle else "N/A",
+        texts.get("departure") or "N/A",
+        texts.get("arrival") or "N/A",
+        texts.get("source") or "N/A",
+        texts.get("duration") or "N/A",
+        texts.get("destination") or "N/A",
+        process_bus_fare(fare) if fare else "N/A",
+    )
+
+def extract_bus_cards(root):
+    records = []
+    for card in group_cards(field_hits(root, BUS_FIELDS, BUS_FIELD_TAGS), "title"):
+        if len(card) < 2:
+            continue
+        records.append(bus_record({field: element_text(element) for field, element in card.items()}))
+    return records
+
+def scrape_buses_from_source(page_source_html, route_type):
+    all_buses_data = []
+    report.write("Parsing HTML with lxml and extracting bus data card by card...")
+    try:
+        with span("parse", extractor="extract_bus_cards"):
+            records = extract_bus_cards(parse_html(page_source_html))
+        counts_msg = missing_fields_msg("bus", records, BUS_COLUMNS)
+        report.write(counts_msg)
+        if not records:
+            report.warning("No bus result cards were found in the page source.")
+        all_buses_data = [record + (route_type,) for record in records]
+    except Exception as e:
+        report.error(f"An unexpected error occurred in bus parsing: {e}")
+        print(traceback.format_exc())
+    report.write(f"Bus parsing finished. Found {len(all_buses_data)} bus entries.")
+    return all_buses_data
+
+def process_train_times(element):
+    spans = list(element.iterdescendants("span"))
+    if len(spans) < 2:
+        return "N/A", "N/A", "N/A", "N/A"
+    raw_departure_text = element_text(spans[0])
+    raw_arrival_text = element_text(spans[-2])
+    return raw_departure_text[:5], raw_arrival_text[:5], raw_departure_text[6:].strip(), raw_arrival_text[6:].strip()
+
+def process_train_prices(container):
+    current_train_prices = []
+    for element in container.iterdescendants(etree.Element):
+        if "avail-cls" not in element.get("class", "").split():
+            continue
+        price_entry = element_text(element)
+        if not price_entry:
+            continue
+        parts = price_entry.split("₹")
+        if len(parts) == 2:
+            current_train_prices.append(format_train_price(parts[0].strip(), parts[1], price_entry))
+        else:
+            current_train_prices.append(price_entry)
+    return "; ".join(current_train_prices) if current_train_prices else "N/A"
+
+def format_train_price(cls, price_text, fallback):
+    try:
+        base_price = int(float(price_text.replace(",", "").strip()))
+        extended_price = base_price + (150 if cls == "SL" else 400)
+        return f"{cls} {base_price} - {extended_price}"
+    except ValueError:
+        return fallback
+
+def format_train_frequency(running_days_text):
+    if len(running_days_text) == 7:
+        return "D"
+    elif running_days_text:
+        return ", ".join(running_days_text)
+    return "N/A"
+
+def process_train_frequency(container):
+    return format_train_frequency([element_text(day) for day in container.iterdescendants(etree.Element)
+                                   if "running" in day.get("class", "").split() and element_text(day)])
+
+def extract_train_cards(root):
+    records = []
+    for card in group_cards(field_hits(root, TRAIN_FIELDS), "name"):
+        if len(card) < 2:
+            continue
+        raw_name = element_text(card["name"]) or "N/A"
+        departure, arrival, source, destination = process_train_times(card["times"]) if "times" in card else ("N/A",) * 4
+        records.append((
+            raw_name,
+            standardize_train_name(raw_name),
+            departure,
+            arrival,
+            source,
+            (element_text(card["duration"]) or "N/A") if "duration" in card else "N/A",
+            destination,
+            process_train_prices(card["prices"]) if "prices" in card else "N/A",
+            process_train_frequency(card["frequency"]) if "frequency" in card else "N/A",
+        ))
+    return records
+
+def scrape_trains_from_source(page_source_html, route_type):
+    all_trains_data = []
+    report.write("Parsing HTML with lxml and extracting train data card by card...")
+    try:
+        with span("parse", extractor="extract_train_cards"):
+            records = extract_train_cards(parse_html(page_source_html))
+        train_counts_msg = missing_fields_msg("train", records, TRAIN_COLUMNS)
+        report.write(train_counts_msg)
+        if not records:
+            report.warning("No train result cards were found in the page source.")
+        all_trains_data = [record + (route_type,) for record in records]
+    except Exception as e:
+        report.error(f"Error parsing train details: {e}")
+        print(traceback.format_exc())
+    report.write(f"Train parsing finished. Found {len(all_trains_data)} train entries.")
+    return all_trains_data
+
+# ---- Captured API Responses ----
+# Field aliases for the JSON the search pages fetch. Values are looked up by dotted path, first match wins, and
+# then go through the same cleanup as the text read from rendered cards. An item only becomes a record when it has
+# every required field, so unrelated JSON that happens to share a key or two is ignored.
+BUS_JSON_FIELDS = {
+    "title": ["travelsName", "operatorName", "operator.name", "travels", "busName"],
+    "subtitle": ["busTypeName", "busType", "serviceType"],
+    "departure": ["departureTime", "depTime", "startTime"],
+    "arrival": ["arrivalTime", "arrTime", "endTime"],
+    "source": ["sourceName", "source", "fromCity", "boardingPoint.name"],
+    "duration": ["travelTime", "duration", "journeyTime"],
+    "destination": ["destinationName", "destination", "toCity", "droppingPoint.name"],
+    "fare": ["fare", "minFare", "startingFare", "price"],
+}
+TRAIN_JSON_FIELDS = {
+    "number": ["trainNumber", "trainNo", "number"],
+    "name": ["trainName"],
+    "departure": ["departureTime", "depTime", "fromTime"],
+    "arrival": ["arrivalTime", "arrTime", "toTime"],
+    "source": ["fromStnCode", "sourceStation", "fromStation", "from"],
+    "destination": ["toStnCode", "destinationStation", "toStation", "to"],
+    "duration": ["duration", "travelTime"],
+    "classes": ["classes", "availability", "fares", "avlClasses"],
+    "days": ["runningDays", "daysOfRun", "runDays"],
+}
+BUS_REQUIRED_FIELDS = ("title", "departure", "arrival", "fare")
+TRAIN_REQUIRED_FIELDS = ("name", "departure", "arrival")
+TRAIN_CLASS_FIELDS = {"class": ["class", "className", "classCode", "code"], "fare": ["fare", "totalFare", "price", "amount"]}
+WEEK_DAYS = "MTWTFSS"
+CLOCK_FIELDS = {"departure", "arrival"}
+
+def json_texts(item, field_paths):
+    texts = {}
+    for field, paths in field_paths.items():
+        value = pick(item, paths)
+        if value is not None and not isinstance(value, (dict, list)):
+            texts[field] = clock_text(value) if field in CLOCK_FIELDS else as_text(value)
+    return texts
+
+def bus_records_from_json(payload):
+    records = []
+    for item in find_records(payload, BUS_JSON_FIELDS["title"]):
+        texts = json_texts(item, BUS_JSON_FIELDS)
+        if all(field in texts for field in BUS_REQUIRED_FIELDS):
+            records.append(bus_record(texts))
+    return records
+
+def json_train_prices(classes):
+    prices = []
+    for entry in classes if isinstance(classes, list) else []:
+        if isinstance(entry, dict):
+            cls, fare = pick(entry, TRAIN_CLASS_FIELDS["class"]), pick(entry, TRAIN_CLASS_FIELDS["fare"])
+            if cls is None or fare is None:
+                continue
+            prices.append(format_train_price(as_text(cls), as_text(fare), f"{as_text(cls)} {as_text(fare)}"))
+        elif entry:
+            prices.append(as_text(entry))
+    return "; ".join(prices) if prices else "N/A"
+
+def json_train_frequency(days):
+    # Accepts ["M", "W"], [true, false, ...] (Monday first), "1010100" or "YNYNYNN".
+    if isinstance(days, str) and len(days) == 7 and set(days.upper()) <= set("01YN"):
+        days = [flag in "1Yy" for flag in days]
+    if isinstance(days, list) and len(days) == 7 and all(isinstance(day, bool) for day in days):
+        days = [WEEK_DAYS[i] for i, running in enumerate(days) if running]
+    if isinstance(days, list):
+        return format_train_frequency([as_text(day) for day in days if day])
+    return "N/A"
+
+def train_records_from_json(payload):
+    records = []
+    for item in find_records(payload, TRAIN_JSON_FIELDS["name"]):
+        texts = json_texts(item, TRAIN_JSON_FIELDS)
+        if not all(field in texts for field in TRAIN_REQUIRED_FIELDS):
+            continue
+        # Rendered cards show "<number> <name>", which is what standardize_train_name expects.
+        raw_name = " ".join(texts[f] for f in ("number", "name") if texts.get(f)) or "N/A"
+        records.append((
+            raw_name,
+            standardize_train_name(raw_name),
+            texts.get("departure") or "N/A",
+            texts.get("arrival") or "N/A",
+            texts.get("source") or "N/A",
+            texts.get("duration") or "N/A",
+            texts.get("destination") or "N/A",
+            json_train_prices(pick(item, TRAIN_JSON_FIELDS["classes"])),
+            json_train_frequency(pick(item, TRAIN_JSON_FIELDS["days"])),
+        ))
+    return records
+
+def load_bus_results(driver, url, capture=CAPTURE_NETWORK):
+    # Returns (records, page_source): records mapped from the search API response when one was captured,
+    # otherwise the rendered page source for scrape_buses_from_source.
+    if capture:
+        report.write(f"Capturing the bus search API response for: {url}")
+        with span("capture", mode="bus"):
+            records = capture_search(driver, url, bus_records_from_json)
+        if records:
+            return records, None
+        report.write("No bus search API response matched; falling back to the rendered page.")
+    return None, load_bus_page(driver, url, navigate=not capture)
+
+def load_train_results(driver, url, capture=CAPTURE_NETWORK):
+    if capture:
+        report.write(f"Capturing the train search API response for: {url}")
+        with span("capture", mode="train"):
+            records = capture_search(driver, url, train_records_from_json)
+        if records:
+            return records, None
+        report.write("No train search API response matched; falling back to the rendered page.")
+    return None, load_train_page(driver, url, navigate=not capture)
+
+# `records` are mapped from a captured API response, or with source="dom" already extracted from a server-rendered
+# page by the HTTP tier (fetcher.py); otherwise the page source is parsed.
+def scrape_bus_results(records, page_source_html, route_type, source="api"):
+    if records is None:
+        return scrape_buses_from_source(page_source_html, route_type) if page_source_html else []
+    counts_msg = missing_fields_msg("bus", records, BUS_COLUMNS, unit="API records" if source == "api" else "cards", source=source)
+    report.write(counts_msg)
+    return [record + (route_type,) for record in records]
+
+def scrape_train_results(records, page_source_html, route_type, source="api"):
+    if records is None:
+        return scrape_trains_from_source(page_source_html, route_type) if page_source_html else []
+    counts_msg = missing_fields_msg("train", records, TRAIN_COLUMNS, unit="API records" if source == "api" else "cards", source=source)
+    report.write(counts_msg)
+    return [record + (route_type,) for record in records]
@@ -0,0 +1,226 @@
+import csv
+import io
+import multiprocessing
+import os
+import time
+import traceback
+import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+from scraper.abhibus import (BUS_COLUMNS, TRAIN_COLUMNS, load_bus_results, load_train_results,
+                             scrape_bus_results, scrape_train_results)
+from scraper.booking import HOTEL_COLUMNS, load_hotel_results, scrape_hotel_results
+from scraper.capture import CAPTURE_NETWORK
+from scraper.history import record_snapshot
+from scraper.metrics import count, disable_export, registry, span, trace, write_metrics
+from scraper.result_cache import get_result_cache
+
+# ---- Batch Settings ----
+BATCH_WORKERS = int(os.environ.get("SCRAPER_BATCH_WORKERS", "4"))
+PER_HOST_LIMIT = int(os.environ.get("SCRAPER_PER_HOST_LIMIT", "2"))
+PER_HOST_DELAY = float(os.environ.get("SCRAPER_PER_HOST_DELAY", "1.0"))
+PAGE_LOAD_TIMEOUT = 60
+
+MODES = {
+    "bus": (load_bus_results, scrape_bus_results, BUS_COLUMNS),
+    "train": (load_train_results, scrape_train_results, TRAIN_COLUMNS),
+    "hotel": (load_hotel_results, scrape_hotel_results, HOTEL_COLUMNS),
+}
+
+# ---- URL List Input ----
+def parse_url_list(text, default_route_type):
+    jobs = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        url, _, route_type = line.partition(",")
+        jobs.append((url.strip(), route_type.strip() or default_route_type))
+    return jobs
+
+def read_url_csv(file_obj, default_route_type):
+    raw = file_obj.read()
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8-sig")
+    rows = list(csv.reader(io.StringIO(raw)))
+    if not rows:
+        return []
+    header = [h.strip().lower() for h in rows[0]]
+    if "url" in header:
+        url_idx = header.index("url")
+        route_idx = next((header.index(h) for h in ("route type", "route_type") if h in header), None)
+        rows = rows[1:]
+    else:
+        url_idx, route_idx = 0, 1 if len(rows[0]) > 1 else None
+    jobs = []
+    for row in rows:
+        if len(row) <= url_idx or not row[url_idx].strip():
+            continue
+        route_type = row[route_idx].strip() if route_idx is not None and len(row) > route_idx else ""
+        jobs.append((row[url_idx].strip(), route_type or default_route_type))
+    return jobs
+
+def _host(url):
+    return urllib.parse.urlsplit(url).netloc.lower()
+
+# ---- Worker Process ----
+def _init_worker(workers=1):
+    # Each worker process owns its own driver pool, created on the first URL the HTTP tier cannot serve (see
+    # fetcher.py); multiprocessing skips atexit in children, so a finalizer shuts it down if it was ever created.
+    from multiprocessing.util import Finalize
+    from scraper import geocoding
+    from scraper.driver_pool import shutdown_driver_pool
+    Finalize(None, shutdown_driver_pool, exitpriority=10)
+    # Traces travel back with each result and the parent exports the combined metrics.
+    disable_export()
+    # The geocoding rate limit is per process; split it so hotel workers stay within the policy together.
+    geocoding._bucket = geocoding.TokenBucket(geocoding.GEOCODE_RATE / workers)
+
+def scrape_url(mode, url, route_type, capture=CAPTURE_NETWORK, force_refresh=False):
+    # The result carries the scrape's trace (see metrics.py) so a parent process can fold it into its own metrics.
+    with trace(f"scrape-{mode}", mode=mode, url=url, route_type=route_type) as current:
+        result = _scrape_url(mode, url, route_type, capture, force_refresh)
+        current.attrs["status"] = result["status"]
+        current.attrs["tier"] = result.get("tier")
+        count("scrapes", mode=mode, status=result["status"])
+    result["trace"] = current.to_dict()
+    return result
+
+def _scrape_url(mode, url, route_type, capture, force_refresh):
+    from scraper.fetcher import fetch_results
+    _, parse_page, columns = MODES[mode]
+    start = time.time()
+    cache = get_result_cache()
+    with span("cache_lookup", mode=mode):
+        cached = None if force_refresh else cache.get(mode, url, route_type)
+    if cached is not None:
+        rows = list(cached[0].itertuples(index=False, name=None))
+        return {"url": url, "route_type": route_type, "status": "cached", "rows": rows, "tier": "cache",
+                "error": None, "seconds": round(time.time() - start, 2)}
+    tier = reason = None
+    try:
+        # Bus and train pages try plain HTTP before a browser; see fetcher.py.
+        with span("load", mode=mode):
+            records, page_source, tier, reason = fetch_results(mode, url, capture, page_load_timeout=PAGE_LOAD_TIMEOUT)
+        with span("extract", mode=mode):
+            rows = parse_page(records, page_source, route_type, source="dom" if tier == "http" else "api")
+        status = "ok" if rows else "empty"
+        error = None
+        if rows:
+            with span("dataframe", mode=mode, rows=len(rows)):
+                df = pd.DataFrame(rows, columns=columns)
+            save_result(mode, url, route_type, df)
+    except Exception as e:
+        print(f"Batch {mode} URL failed: {url}\n{traceback.format_exc()}")
+        rows, status, error = [], "failed", f"{type(e).__name__}: {e}"
+    return {"url": url, "route_type": route_type, "status": status, "rows": rows, "tier": tier,
+            "tier_reason": reason, "error": error, "seconds": round(time.time() - start, 2)}
+
+def save_result(mode, url, variant, df):
+    # Every finished scrape feeds the result cache and the price history; neither failure loses the result itself.
+    if df.empty:
+        return
+    try:
+        with span("cache_store", mode=mode):
+            get_result_cache().put(mode, url, df, variant)
+    except Exception as e:
+        print(f"Could not cache {mode} result for {url}: {e}")
+    try:
+        with span("history_append", mode=mode):
+            record_snapshot(mode, url, df)
+    except Exception as e:
+        print(f"Could not record {mode} history snapshot for {url}: {e}")
+
+def _failed(url, route_type, error):
+    return {"url": url, "route_type": route_type, "status": "failed", "rows": [], "error": error, "seconds": 0.0}
+
+# ---- Batch Runner ----
+def run_batch(mode, jobs, workers=BATCH_WORKERS, per_host_limit=PER_HOST_LIMIT,
+              per_host_delay=PER_HOST_DELAY, capture=CAPTURE_NETWORK, force_refresh=False, on_result=None,
+              should_stop=None):
+    if mode not in MODES:
+        raise ValueError(f"Unknown batch mode: {mode}")
+    workers = max(1, min(workers, len(jobs) or 1))
+    ctx = multiprocessing.get_context("spawn")
+    pending = list(jobs)
+    in_flight = {}
+    host_active = defaultdict(int)
+    host_last_start = {}
+    results = []
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(workers,))
+    try:
+        while pending or in_flight:
+            if pending and should_stop and should_stop():
+                # URLs already running finish normally; the rest are reported without being started.
+                for url, route_type in pending:
+                    result = dict(_failed(url, route_type, "Cancelled before it started."), status="cancelled")
+                    results.append(result)
+                    if on_result:
+                        on_result(result, len(results), len(jobs))
+                pending = []
+                continue
+            now = time.time()
+            next_ready = None
+            still_pending = []
+            for url, route_type in pending:
+                host = _host(url)
+                ready_in = host_last_start.get(host, 0) + per_host_delay - now
+                if len(in_flight) >= workers or host_active[host] >= per_host_limit:
+                    still_pending.append((url, route_type))
+                    continue
+                if ready_in > 0:
+                    next_ready = ready_in if next_ready is None else min(next_ready, ready_in)
+                    still_pending.append((url, route_type))
+                    continue
+                future = executor.submit(scrape_url, mode, url, route_type, capture, force_refresh)
+                in_flight[future] = (url, route_type, host)
+                host_active[host] += 1
+                host_last_start[host] = now
+            pending = still_pending
+            if not in_flight:
+                time.sleep(next_ready or 0.05)
+                continue
+            done, _ = wait(list(in_flight), timeout=next_ready, return_when=FIRST_COMPLETED)
+            pool_broken = False
+            for future in done:
+                url, route_type, host = in_flight.pop(future)
+                host_active[host] -= 1
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    result = _failed(url, route_type, f"Worker process crashed: {e}")
+                    pool_broken = True
+                except Exception as e:
+                    result = _failed(url, route_type, f"{type(e).__name__}: {e}")
+                if "trace" in result:
+                    registry.absorb(result.pop("trace"))
+                results.append(result)
+                if on_result:
+                    on_result(result, len(results), len(jobs))
+            if pool_broken:
+                # A crashed worker takes the whole executor down; fail what was running and carry on with a new one.
+                for future, (url, route_type, host) in in_flight.items():
+                    result = _failed(url, route_type, "Worker process crashed while this URL was in flight.")
+                    results.append(result)
+                    host_active[host] -= 1
+                    if on_result:
+                        on_result(result, len(results), len(jobs))
+                in_flight = {}
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(workers,))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        write_metrics()
+    return results
+
+def merge_batch_results(mode, results):
+    columns = MODES[mode][2]
+    rows = [row for result in results for row in result["rows"]]
+    df = pd.DataFrame(rows, columns=columns)
+    status = pd.DataFrame([{"URL": r["url"], "Route Type": r["route_type"], "Status": r["status"],
+                            "Tier": r.get("tier") or "", "Rows": len(r["rows"]), "Seconds": r["seconds"],
+                            "Error": r["error"] or "", "Escalated Because": r.get("tier_reason") or ""}
+                           for r in results])
+    return df, status
@@ -0,0 +1,118 @@
+import os
+import threading
+import urllib.parse
+import weakref
+from scraper.metrics import count, span
+from scraper.readiness import install_probe
+
+# ---- Blocking Settings ----
+BLOCKING_ENABLED = os.environ.get("SCRAPER_BLOCKING", "1") == "1"
+# Every scrape waits for its own content selectors (see readiness.py), so nothing relies on the full load event.
+PAGE_LOAD_STRATEGY = os.environ.get("SCRAPER_PAGE_LOAD_STRATEGY", "eager")
+
+# Network.setBlockedURLs patterns: "*" matches any run of characters.
+STATIC_DENY = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*.mp4", "*.webm", "*.mp3", "*.gif", "*.ico"]
+TRACKER_DENY = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*googlesyndication.com*", "*doubleclick.net*",
+    "*googleadservices.com*", "*adservice.google.*", "*facebook.net*", "*facebook.com/tr*", "*connect.facebook.*",
+    "*hotjar.com*", "*clarity.ms*", "*bing.com/bat*", "*criteo.*", "*taboola.com*", "*outbrain.com*",
+    "*newrelic.com*", "*nr-data.net*", "*sentry.io*", "*branch.io*", "*moengage.com*", "*webengage.com*",
+    "*cookielaw.org*", "*youtube.com*", "*ytimg.com*", "*twitter.com*", "*linkedin.com*",
+]
+
+# Per-site profiles: `deny` patterns are blocked unless they also appear in `allow`, which lets a site keep a
+# third party the shared lists would otherwise drop.
+BLOCK_PROFILES = {
+    "abhibus": {"hosts": ["abhibus.com"], "deny": STATIC_DENY + TRACKER_DENY + ["*/banners/*", "*/offers/*"], "allow": []},
+    # collect_hotel_cards clicks the OneTrust consent button, which is served from cookielaw.org.
+    "booking": {"hosts": ["booking.com"], "deny": STATIC_DENY + TRACKER_DENY + ["*/tpi_*", "*/beacon*"],
+                "allow": ["*cookielaw.org*"]},
+    "default": {"hosts": [], "deny": STATIC_DENY + TRACKER_DENY, "allow": []},
+}
+
+def profile_for(url):
+    host = urllib.parse.urlsplit(url).netloc.lower()
+    for name, profile in BLOCK_PROFILES.items():
+        if any(host == h or host.endswith("." + h) for h in profile["hosts"]):
+            return name
+    return "default"
+
+def blocked_patterns(profile_name):
+    profile = BLOCK_PROFILES[profile_name]
+    return [pattern for pattern in profile["deny"] if pattern not in profile["allow"]]
+
+_applied = weakref.WeakKeyDictionary()
+_applied_lock = threading.Lock()
+
+def apply_blocking(driver, url, enabled=BLOCKING_ENABLED):
+    profile_name = profile_for(url) if enabled else None
+    with _applied_lock:
+        if _applied.get(driver, "unset") == profile_name:
+            return profile_name
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_patterns(profile_name) if profile_name else []})
+    except Exception as e:
+        print(f"Could not apply request blocking profile '{profile_name}': {e}")
+        return None
+    with _applied_lock:
+        _applied[driver] = profile_name
+    return profile_name
+
+def navigate(driver, url):
+    install_probe(driver)
+    apply_blocking(driver, url)
+    with span("navigate", url=url):
+        driver.get(url)
+
+def read_page_source(driver):
+    # page_source serializes the whole DOM in the browser and ships it over the WebDriver connection.
+    with span("page_source") as record:
+        html = driver.page_source
+        record["bytes"] = len(html.encode("utf-8"))
+    count("page_source_bytes", record["bytes"])
+    return html
+
+# ---- Network Counters ----
+class NetworkStats:
+    # Fed from the Chrome performance log, which pooled drivers record while blocking is on. Blocked requests never
+    # download, so their bytes are estimated from the average size of the same resource type among requests that did
+    # load in this process.
+    def __init__(self):
+        self.requests = 0
+        self.transferred_bytes = 0
+        self.blocked_requests = 0
+        self.blocked_bytes_est = 0
+        self.blocked_by_type = {}
+        self._loaded_by_type = {}
+        self._types = {}
+        self._lock = threading.Lock()
+
+    def observe(self, message):
+        method = message.get("method")
+        params = message.get("params", {})
+        with self._lock:
+            if method == "Network.requestWillBeSent":
+                self.requests += 1
+                self._types[params.get("requestId")] = params.get("type", "Other")
+            elif method == "Network.loadingFinished":
+                resource_type = self._types.pop(params.get("requestId"), "Other")
+                size = int(params.get("encodedDataLength", 0))
+                self.transferred_bytes += size
+                n, total = self._loaded_by_type.get(resource_type, (0, 0))
+                self._loaded_by_type[resource_type] = (n + 1, total + size)
+            elif method == "Network.loadingFailed":
+                resource_type = self._types.pop(params.get("requestId"), params.get("type", "Other"))
+                if params.get("blockedReason") == "inspector":
+                    self.blocked_requests += 1
+                    self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+                    n, total = self._loaded_by_type.get(resource_type, (0, 0))
+                    self.blocked_bytes_est += total // n if n else 0
+
+    def snapshot(self):
+        with self._lock:
+            return {"requests": self.requests, "transferred_bytes": self.transferred_bytes,
+                    "blocked_requests": self.blocked_requests, "blocked_bytes_est": self.blocked_bytes_est,
+                    "blocked_by_type": dict(self.blocked_by_type)}
+
+network_stats = NetworkStats()
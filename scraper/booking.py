@@ -0,0 +1,563 @@
+import contextvars
+import csv
+import json
+import os
+import time
+import random
+import re
+import urllib.parse
+import lxml.html
+import pandas as pd
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from scraper.capture import CAPTURE_NETWORK, as_text, find_records, pick, start_capture
+from scraper.geocoding import add_google_maps_links
+from scraper.blocking import navigate, read_page_source
+from scraper.metrics import count, span
+from scraper.readiness import wait_for_more, wait_for_quiet, wait_until
+from scraper.reporting import report
+
+HOTEL_COLUMNS = ["Hotel Name", "Address", "Rating", "Price", "Type", "Google Maps Link"]
+STREAM_DIR = os.environ.get("SCRAPER_STREAM_DIR", os.path.join(".cache", "streams"))
+
+# Extraction log for the current hotel scrape. It lives in a context variable, so scrapes running at once on job
+# threads each keep their own; shard threads run in a copy of the caller's context and append to the same list.
+_error_log = contextvars.ContextVar("hotel_error_log", default=None)
+
+def error_log():
+    log = _error_log.get()
+    if log is None:
+        log = reset_error_log()
+    return log
+
+def reset_error_log():
+    log = []
+    _error_log.set(log)
+    return log
+
+def scroll_to_load_all_cards(driver, idle_ms=1500, max_misses=2, max_total=300):
+    # Each step waits only until new cards render (or the page goes idle), instead of a fixed pause per scroll.
+    last_count = len(driver.find_elements(By.CSS_SELECTOR, HOTEL_CARD_SELECTOR)); misses = 0; start_time = time.time()
+    while True:
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        try:
+            result = wait_for_more(driver, HOTEL_CARD_SELECTOR, last_count, idle_ms=idle_ms, kind="scroll")
+            current_count = result["count"]
+            if current_count > last_count:
+                last_count = current_count; misses = 0
+            else:
+                misses += 1
+            if misses >= max_misses:
+                print(f"✅ Done scrolling. Found {current_count} cards."); break
+            if time.time() - start_time > max_total:
+                error_log().append("Warning: Scrolling timed out after 5 minutes."); break
+        except Exception as e:
+            error_log().append(f"Error: Scrolling failed with exception: {e}"); break
+
+# WebDriverWait and expected_conditions pull in the whole remote WebDriver; they are imported where used so the
+# source/JSON extractors stay cheap to import.
+def get_filter_price_range(driver):
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    try:
+        wait = WebDriverWait(driver, 5)
+        selector = 'div[data-testid="filters-group-slider"] span[role="status"]'
+        price_filter_element = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+        text = price_filter_element.get_attribute("textContent")
+        if '-' in text:
+            parts = text.split('-')
+            min_price = int(re.sub(r'[^\d]', '', parts[0]))
+            max_price = int(re.sub(r'[^\d]', '', parts[1]))
+            report.success(f"Found price filter range: Min={min_price}, Max={max_price}. Estimating ratings...")
+            return min_price, max_price
+    except TimeoutException:
+        error_log().append("Warning: Price filter slider not found on page. Cannot estimate ratings.")
+    except Exception as e:
+        error_log().append(f"Warning: Could not get price filter. Reason: {e}")
+    return None, None
+
+def extract_text_hybrid(card_element, selector, clean_func, card_index, field_name):
+    try:
+        element = card_element.find_element(By.CSS_SELECTOR, selector)
+        text = element.text.strip()
+        if text:
+            return clean_func(text)
+        return 'N/A'
+    except Exception as e:
+        if not isinstance(e, NoSuchElementException):
+            error_log().append(f"Card {card_index}: Failed to extract '{field_name}'. Reason: {e}")
+        return 'N/A'
+
+# ---- Card Extraction ----
+HOTEL_CARD_SELECTOR = 'div[data-testid="property-card"]'
+HOTEL_FIELD_SELECTORS = {
+    "title": '[data-testid="title"]',
+    "address": '[data-testid="address"]',
+    "price": '[data-testid="price-and-discounted-price"]',
+    "type": '[data-testid="property-card-container"] h4',
+}
+HOTEL_STARS_SELECTOR = '[data-testid="rating-stars"]'
+EXTRACTION_MODES = ["script", "source", "capture"]
+
+# Reads every card in the page in a single WebDriver call and returns compact JSON.
+EXTRACT_CARDS_JS = """
+const cards = document.querySelectorAll(arguments[0]);
+const fields = arguments[1];
+const out = [];
+for (const card of cards) {
+    const row = {};
+    for (const name in fields) {
+        const el = card.querySelector(fields[name]);
+        row[name] = el ? (el.innerText || '').trim() : '';
+    }
+    const stars = card.querySelector(arguments[2]);
+    row.stars = stars ? stars.querySelectorAll('div').length : null;
+    out.push(row);
+}
+return JSON.stringify(out);
+"""
+
+HOTEL_FIELD_XPATHS = {
+    "title": './/*[@data-testid="title"]',
+    "address": './/*[@data-testid="address"]',
+    "price": './/*[@data-testid="price-and-discounted-price"]',
+    "type": './/h4[ancestor::*[@data-testid="property-card-container"]]',
+}
+
+def extract_hotel_cards_js(driver):
+    payload = driver.execute_script(EXTRACT_CARDS_JS, HOTEL_CARD_SELECTOR, HOTEL_FIELD_SELECTORS, HOTEL_STARS_SELECTOR)
+    return json.loads(payload)
+
+def _element_text(element):
+    # Approximates innerText: one line per text node, so the first-line title cleanup still works.
+    return "\n".join(t.strip() for t in element.itertext() if t.strip())
+
+def extract_hotel_cards_from_source(page_source):
+    root = lxml.html.fromstring(page_source)
+    cards = []
+    for card in root.xpath('//div[@data-testid="property-card"]'):
+        row = {}
+        for name, xpath in HOTEL_FIELD_XPATHS.items():
+            found = card.xpath(xpath)
+            row[name] = _element_text(found[0]) if found else ''
+        stars = card.xpath('.//*[@data-testid="rating-stars"]')
+        row["stars"] = len(stars[0].xpath('.//div')) if stars else None
+        cards.append(row)
+    return cards
+
+def extract_hotel_cards_selenium(driver):
+    cards = driver.find_elements(By.CSS_SELECTOR, HOTEL_CARD_SELECTOR)
+    raw_cards = []
+    keep_text = lambda t: t
+    for i, card in enumerate(cards):
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", card)
+        row = {}
+        for name, selector in HOTEL_FIELD_SELECTORS.items():
+            text = extract_text_hybrid(card, selector, keep_text, i, name.title())
+            row[name] = '' if text == 'N/A' else text
+        try:
+            stars_container = card.find_element(By.CSS_SELECTOR, HOTEL_STARS_SELECTOR)
+            row["stars"] = len(stars_container.find_elements(By.TAG_NAME, 'div'))
+        except NoSuchElementException:
+            row["stars"] = None
+        raw_cards.append(row)
+    return raw_cards
+
+def extract_hotel_cards(driver, mode="script"):
+    try:
+        if mode == "script":
+            return extract_hotel_cards_js(driver)
+        if mode == "source":
+            return extract_hotel_cards_from_source(read_page_source(driver))
+        raise ValueError(f"Unknown hotel extraction mode: {mode}")
+    except Exception as e:
+        error_log().append(f"Warning: '{mode}' card extraction failed ({e}). Falling back to per-card Selenium extraction.")
+        return extract_hotel_cards_selenium(driver)
+
+def price_value(price):
+    digits = re.sub(r'[^\d]', '', price) if price and price != 'N/A' else ''
+    return int(digits) if digits else None
+
+# ---- Captured API Responses ----
+# Result pages after the first are fetched from Booking's GraphQL endpoint; these paths map a search result to the
+# same raw card fields the DOM extractors return.
+HOTEL_CAPTURE_PATTERN = r"/dml/graphql"
+HOTEL_JSON_FIELDS = {
+    "title": ["displayName.text", "basicPropertyData.name", "name"],
+    "address": ["basicPropertyData.location.address", "location.address", "address"],
+    "city": ["basicPropertyData.location.city", "location.city", "city"],
+    "price": ["priceDisplayInfoIrene.displayPrice.amountPerStay.amount", "priceDisplayInfo.displayPrice.amountPerStay.amount",
+              "price.amount", "price"],
+    "type": ["matchingUnitConfigurations.commonConfiguration.name", "unitName", "roomName"],
+    "stars": ["basicPropertyData.starRating.value", "starRating.value", "stars"],
+    "link": ["basicPropertyData.pageName", "pageName", "url"],
+}
+
+def hotel_cards_from_json(payload):
+    cards = []
+    for item in find_records(payload, HOTEL_JSON_FIELDS["title"]):
+        values = {field: pick(item, paths) for field, paths in HOTEL_JSON_FIELDS.items()}
+        text = lambda field: as_text(values[field]) if values[field] is not None and not isinstance(values[field], (dict, list)) else ''
+        stars = values["stars"]
+        cards.append({
+            "title": text("title"),
+            # Rendered cards show the street and city on separate lines; build_hotel_rows joins them with ", ".
+            "address": "\n".join(part for part in (text("address"), text("city")) if part),
+            "price": text("price"),
+            "type": text("type"),
+            "stars": int(stars) if isinstance(stars, (int, float)) and stars else None,
+            "link": text("link"),
+        })
+    return cards
+
+def extract_captured_hotel_cards(driver, capture):
+    # Only trusted when the API responses account for every rendered card: the first page is server-rendered
+    # on most searches, in which case the DOM has to be read anyway.
+    cards, seen = [], set()
+    for _, payload in capture.collect(driver):
+        for card in hotel_cards_from_json(payload):
+            key = hotel_card_key(card)
+            if key not in seen:
+                seen.add(key); cards.append(card)
+    rendered = driver.execute_script("return document.querySelectorAll(arguments[0]).length;", HOTEL_CARD_SELECTOR)
+    if cards and len(cards) >= rendered:
+        return cards
+    error_log().append(f"Info: API responses covered {len(cards)} of {rendered} rendered cards; reading the page instead.")
+    return extract_hotel_cards(driver, "script")
+
+def estimate_rating(price, min_filter_price, max_filter_price, card_index):
+    try:
+        hotel_price_numeric = price_value(price)
+        if hotel_price_numeric is not None and min_filter_price is not None and max_filter_price is not None:
+            base_price = max_filter_price / 2
+            if min_filter_price <= hotel_price_numeric <= base_price:
+                return f"{random.uniform(3.0, 3.5):.1f}"
+            elif base_price < hotel_price_numeric <= max_filter_price:
+                return f"{random.uniform(3.5, 4.0):.1f}"
+            else:
+                return f"{random.uniform(2.5, 3.0):.1f}"
+        return f"{random.uniform(3.0, 4.0):.1f}"
+    except Exception as e:
+        error_log().append(f"Card {card_index}: Failed rating estimation due to error: {e}")
+        return f"{random.uniform(2.5, 3.5):.1f}"
+
+def count_hotel_fields(raw_cards, source):
+    count("cards_found", len(raw_cards), kind="hotel", source=source)
+    for name in HOTEL_FIELD_SELECTORS:
+        missing = sum(1 for card in raw_cards if not card.get(name))
+        if missing:
+            count("fields_missing", missing, kind="hotel", source=source, field=name)
+
+def build_hotel_rows(raw_cards, min_filter_price, max_filter_price, start_index=0):
+    clean_title = lambda t: t.split('\n')[0].strip()
+    clean_address = lambda a: a.replace('\n', ', ').strip()
+    clean_price = lambda p: re.sub(r'[^\d,.]', '', p).strip()
+    clean_type = lambda t: t.strip()
+    hotel_data = []
+    for i, card in enumerate(raw_cards, start_index):
+        title = clean_title(card["title"]) if card["title"] else 'N/A'
+        address = clean_address(card["address"]) if card["address"] else 'N/A'
+        price = clean_price(card["price"]) if card["price"] else 'N/A'
+        hotel_type = clean_type(card["type"]) if card["type"] else 'N/A'
+        rating = f"{card['stars']}" if card["stars"] is not None else 'N/A'
+        if rating == 'N/A':
+            rating = estimate_rating(price, min_filter_price, max_filter_price, i)
+        hotel_data.append({
+            "Hotel Name": title,
+            "Address": address,
+            "Rating": rating,
+            "Price": price,
+            "Type": hotel_type,
+            "Google Maps Link": None
+        })
+    return hotel_data
+
+def open_hotel_search(driver, url, reset_log=True):
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    if reset_log:
+        reset_error_log()
+    report.write(f"Selenium: Navigating to hotel URL and scraping data: {url}")
+    navigate(driver, url)
+    wait = WebDriverWait(driver, 10)
+    try:
+        accept_button = wait.until(EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler")))
+        accept_button.click()
+        wait_for_quiet(driver, settle_ms=200)
+    except TimeoutException:
+        print("ℹ️ Cookie consent banner not found.")
+
+def collect_hotel_cards(driver, url, extraction="script"):
+    # Browser-bound stage: everything that needs the driver. Geocoding happens afterwards, without it.
+    capture = start_capture(driver, HOTEL_CAPTURE_PATTERN) if extraction == "capture" else None
+    open_hotel_search(driver, url)
+    with span("scroll"):
+        scroll_to_load_all_cards(driver)
+    min_filter_price, max_filter_price = get_filter_price_range(driver)
+    with span("parse", extractor=f"hotel_{extraction}") as record:
+        if capture:
+            raw_cards = extract_captured_hotel_cards(driver, capture)
+        else:
+            raw_cards = extract_hotel_cards(driver, extraction)
+    print(f"Extracted {len(raw_cards)} hotel cards ({extraction}) in {round(record['seconds'], 2)} seconds.")
+    count_hotel_fields(raw_cards, extraction)
+    report.info(f"Found {len(raw_cards)} hotel cards to process.")
+    return build_hotel_rows(raw_cards, min_filter_price, max_filter_price)
+
+# ---- Streaming Extraction ----
+# Like EXTRACT_CARDS_JS, but only returns cards it has not handed out before: each card read is tagged with a
+# data attribute, so a scroll step costs one round trip proportional to the newly rendered cards.
+EXTRACT_NEW_CARDS_JS = """
+const cards = document.querySelectorAll(arguments[0]);
+const fields = arguments[1];
+const out = [];
+for (const card of cards) {
+    if (card.dataset.scraped) continue;
+    card.dataset.scraped = '1';
+    const row = {};
+    for (const name in fields) {
+        const el = card.querySelector(fields[name]);
+        row[name] = el ? (el.innerText || '').trim() : '';
+    }
+    const stars = card.querySelector(arguments[2]);
+    row.stars = stars ? stars.querySelectorAll('div').length : null;
+    const link = card.querySelector(arguments[3]);
+    row.link = link ? link.href.split('?')[0] : '';
+    out.push(row);
+}
+return JSON.stringify({total: cards.length, cards: out});
+"""
+HOTEL_LINK_SELECTOR = 'a[data-testid="title-link"]'
+
+def extract_new_hotel_cards(driver):
+    payload = driver.execute_script(EXTRACT_NEW_CARDS_JS, HOTEL_CARD_SELECTOR, HOTEL_FIELD_SELECTORS,
+                                    HOTEL_STARS_SELECTOR, HOTEL_LINK_SELECTOR)
+    result = json.loads(payload)
+    return result["cards"], result["total"]
+
+def hotel_card_key(card):
+    # Re-rendered cards lose their tag and come back, so rows are deduplicated by the property itself.
+    return card["link"] or (card["title"].split('\n')[0].strip(), card["address"].strip())
+
+def stream_hotel_rows(driver, url, target_count=None, max_price=None, idle_ms=1500, max_misses=2, max_total=300):
+    # Yields lists of new rows after every scroll step. Stops early once `target_count` rows were yielded, or, for
+    # searches sorted by price, at the first card above `max_price`; otherwise cards above it are only skipped.
+    open_hotel_search(driver, url)
+    min_filter_price, max_filter_price = get_filter_price_range(driver)
+    sorted_by_price = "order=price" in url
+    seen = set(); emitted = 0; misses = 0; start_time = time.time()
+    while True:
+        try:
+            with span("parse", extractor="hotel_stream"):
+                raw_cards, total = extract_new_hotel_cards(driver)
+        except Exception as e:
+            error_log().append(f"Error: Streaming extraction failed with exception: {e}"); return
+        count_hotel_fields(raw_cards, "stream")
+        new_cards = []
+        for card in raw_cards:
+            key = hotel_card_key(card)
+            if key not in seen:
+                seen.add(key); new_cards.append(card)
+        rows = build_hotel_rows(new_cards, min_filter_price, max_filter_price, start_index=len(seen) - len(new_cards))
+        price_stop = False
+        if max_price is not None:
+            kept = [row for row in rows if price_value(row["Price"]) is None or price_value(row["Price"]) <= max_price]
+            price_stop = sorted_by_price and len(kept) < len(rows)
+            rows = kept
+        if target_count:
+            rows = rows[:target_count - emitted]
+        emitted += len(rows)
+        if rows:
+            yield rows
+        if target_count and emitted >= target_count:
+            error_log().append(f"Info: Stopped after reaching the target of {target_count} hotels."); return
+        if price_stop:
+            error_log().append(f"Info: Stopped at the first hotel priced above {max_price}."); return
+        if misses >= max_misses:
+            print(f"✅ Done scrolling. Streamed {emitted} of {len(seen)} cards."); return
+        if time.time() - start_time > max_total:
+            error_log().append("Warning: Scrolling timed out after 5 minutes."); return
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        try:
+            result = wait_for_more(driver, HOTEL_CARD_SELECTOR, total, idle_ms=idle_ms, kind="scroll")
+        except Exception as e:
+            error_log().append(f"Error: Scrolling failed with exception: {e}"); return
+        misses = 0 if result["count"] > total else misses + 1
+
+def stream_rows_to_csv(row_batches, path=None):
+    # Passes batches through unchanged while appending them to a CSV file, so partial results survive a crash.
+    path = path or os.path.join(STREAM_DIR, f"hotels-{time.strftime('%Y%m%d-%H%M%S')}.csv")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=HOTEL_COLUMNS)
+        writer.writeheader()
+        for rows in row_batches:
+            writer.writerows(rows)
+            f.flush()
+            yield rows
+
+# ---- Sharded Search ----
+# Splits one search into result pages (offset=0, 25, 50, ...) or price bands and loads each page in its own pooled
+# browser without scrolling, so no tab holds more than one page of cards. Booking serves at most 40 pages per search;
+# price bands get past that for big cities, since every band is paged separately.
+HOTEL_PAGE_SIZE = 25
+HOTEL_SHARD_MAX_PAGES = 40
+HOTEL_SHARD_WORKERS = int(os.environ.get("SCRAPER_HOTEL_SHARD_WORKERS", "4"))
+HOTEL_PRICE_BANDS = int(os.environ.get("SCRAPER_HOTEL_PRICE_BANDS", "6"))
+HOTEL_CURRENCY = os.environ.get("SCRAPER_HOTEL_CURRENCY", "INR")
+SHARD_STRATEGIES = ["offset", "price"]
+RESULT_COUNT_JS = "const h = document.querySelector('h1'); return h ? h.textContent : '';"
+
+def with_query(url, **params):
+    parts = urllib.parse.urlsplit(url)
+    pairs = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if k not in params]
+    pairs += [(k, str(v)) for k, v in params.items()]
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(pairs)))
+
+def price_band_urls(url, min_price, max_price, bands=HOTEL_PRICE_BANDS):
+    # Geometric bands: cheap properties are far more common, so equal-width bands would leave the first one crowded.
+    # Neighbouring bands share their edge price; merging deduplicates the overlap.
+    query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+    currency = query.get("selected_currency") or HOTEL_CURRENCY
+    low = max(1, min_price)
+    ratio = (max(max_price, low + 1) / low) ** (1 / max(1, bands))
+    edges = [0]
+    for i in range(1, bands):
+        edge = int(round(low * ratio ** i))
+        if edge > edges[-1]:
+            edges.append(edge)
+    edges.append("max")
+    urls = []
+    for lo, hi in zip(edges, edges[1:]):
+        band = f"price={currency}-{lo}-{hi}-1"
+        urls.append(with_query(url, nflt=f"{query['nflt']};{band}" if query.get("nflt") else band))
+    return urls
+
+def result_count(driver):
+    # The heading reads e.g. "London: 2,345 properties found".
+    try:
+        text = driver.execute_script(RESULT_COUNT_JS) or ""
+    except Exception:
+        return None
+    match = re.search(r"([\d][\d,.]*)\s+propert", text)
+    return int(re.sub(r"[^\d]", "", match.group(1))) if match else None
+
+def hotel_identity(card):
+    # Name plus address: links carry per-search parameters, so the same property differs between shards.
+    clean = lambda text: " ".join((text or "").split()).lower()
+    return clean(card["title"].split("\n")[0]), clean(card["address"])
+
+def scrape_shard_page(pool, url, strategy, page):
+    with span("shard", kind=strategy, page=page), pool.borrow() as driver:
+        navigate(driver, url)
+        # An empty or past-the-end page never renders a card; idle_ms ends the wait instead of the full timeout.
+        wait_until(driver, HOTEL_CARD_SELECTOR, 1, idle_ms=3000)
+        return extract_hotel_cards(driver, "script")
+
+def collect_hotel_cards_sharded(url, strategy="offset", workers=HOTEL_SHARD_WORKERS, pool=None, on_progress=None):
+    # Returns the same rows as collect_hotel_cards. Concurrency is capped by the driver pool size (SCRAPER_POOL_SIZE);
+    # each shard borrows its own browser. A short page ends its band, so unknown result counts are fine.
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    from scraper.driver_pool import get_driver_pool
+    reset_error_log()
+    pool = pool or get_driver_pool()
+    workers = max(1, min(workers, pool.size))
+    with pool.borrow() as driver:
+        open_hotel_search(driver, url, reset_log=False)
+        wait_until(driver, HOTEL_CARD_SELECTOR, 1, idle_ms=3000)
+        min_filter_price, max_filter_price = get_filter_price_range(driver)
+        total = result_count(driver)
+        first_page = extract_hotel_cards(driver, "script")
+    if strategy == "price" and min_filter_price is None:
+        error_log().append("Warning: No price filter range on the page; sharding by result pages instead.")
+        strategy = "offset"
+    if strategy == "price":
+        bands = price_band_urls(url, min_filter_price, max_filter_price)
+        next_page = {band: 0 for band in bands}
+        limits = {band: HOTEL_SHARD_MAX_PAGES for band in bands}
+    else:
+        pages = min(HOTEL_SHARD_MAX_PAGES, -(-total // HOTEL_PAGE_SIZE)) if total else HOTEL_SHARD_MAX_PAGES
+        if len(first_page) < HOTEL_PAGE_SIZE:
+            pages = 1
+        bands, next_page, limits = [url], {url: 1}, {url: pages}
+    shards = "result pages" if strategy == "offset" else f"{len(bands)} price bands"
+    report.write(f"Scraping {shards} across {workers} browsers" + (f" ({total} properties listed)." if total else "."))
+    cards = {}
+    for card in first_page:
+        cards.setdefault(hotel_identity(card), card)
+    open_bands = list(bands)
+    def next_shard():
+        # Round-robin over the bands, so every band makes progress at once.
+        while open_bands:
+            band = open_bands.pop(0)
+            if next_page[band] < limits[band]:
+                page = next_page[band]
+                next_page[band] += 1
+                open_bands.append(band)
+                return band, page
+        return None
+    in_flight = {}
+    done_shards = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hotel-shard") as executor:
+        while True:
+            while len(in_flight) < workers:
+                shard = next_shard()
+                if shard is None:
+                    break
+                band, page = shard
+                shard_url = with_query(band, offset=page * HOTEL_PAGE_SIZE) if page else band
+                # copy_context keeps the shard spans inside the caller's trace.
+                future = executor.submit(contextvars.copy_context().run, scrape_shard_page, pool, shard_url, strategy, page)
+                in_flight[future] = shard
+            if not in_flight:
+                break
+            finished, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in finished:
+                band, page = in_flight.pop(future)
+                done_shards += 1
+                try:
+                    raw_cards = future.result()
+                except Exception as e:
+                    error_log().append(f"Warning: Page {page + 1} of {band} failed: {e}")
+                    count("hotel_shards", status="failed")
+                    continue
+                count("hotel_shards", status="ok")
+                for card in raw_cards:
+                    cards.setdefault(hotel_identity(card), card)
+                if len(raw_cards) < HOTEL_PAGE_SIZE:
+                    limits[band] = min(limits[band], page + 1)
+                print(f"Shard page {page + 1} ({strategy}): {len(raw_cards)} cards, {len(cards)} unique so far.")
+                if on_progress:
+                    on_progress(done_shards, len(cards))
+    raw_cards = list(cards.values())
+    count_hotel_fields(raw_cards, f"shard_{strategy}")
+    report.info(f"Found {len(raw_cards)} unique hotel cards across {done_shards + 1} pages.")
+    return build_hotel_rows(raw_cards, min_filter_price, max_filter_price)
+
+def geocode_hotels(hotel_data):
+    report.write(f"Geocoding {len(hotel_data)} hotels...")
+    progress_bar = report.progress(0)
+    with span("geocode", hotels=len(hotel_data)) as record:
+        stats = add_google_maps_links(hotel_data, on_progress=lambda done, total: progress_bar.progress(done / total))
+        record.update(stats)
+    progress_bar.progress(1.0)
+    for outcome in ("hits", "misses", "failed"):
+        count("geocode_lookups", stats[outcome], outcome=outcome)
+    error_log().append(f"Info: Geocoding cache served {stats['hits']} hits, {stats['misses']} misses"
+                     f" ({stats['failed']} lookups failed).")
+    with span("dataframe", mode="hotel", rows=len(hotel_data)):
+        return pd.DataFrame(hotel_data, columns=HOTEL_COLUMNS)
+
+def scrape_hotels_from_source(driver, url, extraction="script"):
+    return geocode_hotels(collect_hotel_cards(driver, url, extraction))
+
+# ---- Batch Interface ----
+# Same shape as abhibus's load_*_results / scrape_*_results so batch.py (and the CLI) can run hotel searches. The
+# route type is unused; batch jobs pass the cache variant the Streamlit page uses for an unlimited search.
+HOTEL_BATCH_VARIANT = "target=0;max_price=0"
+
+def load_hotel_results(driver, url, capture=CAPTURE_NETWORK):
+    return collect_hotel_cards(driver, url, "capture" if capture else "script"), None
+
+def scrape_hotel_results(hotel_rows, page_source_html, route_type=None, source=None):
+    return list(geocode_hotels(hotel_rows).itertuples(index=False, name=None))
@@ -0,0 +1,132 @@
+import base64
+import json
+import os
+import re
+import time
+from scraper.blocking import navigate, network_stats
+from scraper.metrics import span
+from scraper.readiness import wait_for_quiet
+
+# ---- Capture Settings ----
+# Opt-in: with it set, pooled drivers record Chrome's performance (network) log so search API responses can be read
+# back over CDP.
+CAPTURE_NETWORK = os.environ.get("SCRAPER_CAPTURE_NETWORK", "0") == "1"
+CAPTURE_URL_PATTERN = os.environ.get("SCRAPER_CAPTURE_URL_PATTERN", r"api|graphql|search")
+CAPTURE_TIMEOUT = float(os.environ.get("SCRAPER_CAPTURE_TIMEOUT", "15"))
+SKIPPED_MIME_PREFIXES = ("text/html", "text/css", "image/", "font/", "application/javascript", "text/javascript")
+
+def enable_network_capture(options):
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+def drain_performance_log(driver):
+    # Reading the log also empties Chrome's buffer, so this doubles as the cleanup between scrapes.
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return []
+    messages = []
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        network_stats.observe(message)
+        messages.append(message)
+    return messages
+
+class ResponseCapture:
+    # Follows matching responses across log drains: the URL arrives with responseReceived, but the body can only
+    # be fetched once loadingFinished has been logged for the same request.
+    def __init__(self, pattern=CAPTURE_URL_PATTERN):
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+        self.pending = {}
+
+    def collect(self, driver):
+        payloads = []
+        for message in drain_performance_log(driver):
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.responseReceived":
+                response = params.get("response", {})
+                mime_type = response.get("mimeType", "")
+                if self.pattern.search(response.get("url", "")) and not mime_type.startswith(SKIPPED_MIME_PREFIXES):
+                    self.pending[params["requestId"]] = response["url"]
+            elif method == "Network.loadingFailed":
+                self.pending.pop(params.get("requestId"), None)
+            elif method == "Network.loadingFinished" and params.get("requestId") in self.pending:
+                url = self.pending.pop(params["requestId"])
+                try:
+                    body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+                    text = base64.b64decode(body["body"]).decode("utf-8") if body.get("base64Encoded") else body["body"]
+                    payloads.append((url, json.loads(text)))
+                except ValueError:
+                    continue
+                except Exception as e:
+                    print(f"Could not read captured response {url}: {e}")
+        return payloads
+
+def start_capture(driver, pattern=CAPTURE_URL_PATTERN):
+    drain_performance_log(driver)
+    return ResponseCapture(pattern)
+
+def capture_search(driver, url, mapper, pattern=CAPTURE_URL_PATTERN, timeout=CAPTURE_TIMEOUT):
+    # Navigates to `url` and returns the records `mapper` finds in the matching JSON responses, or None once the
+    # page goes quiet (or `timeout` passes) without one. The driver is left on the page for a DOM fallback.
+    capture = start_capture(driver, pattern)
+    navigate(driver, url)
+    deadline = time.time() + timeout
+    latest = {}
+    while True:
+        quiet = wait_for_quiet(driver, timeout=max(0.5, deadline - time.time()))
+        for response_url, payload in capture.collect(driver):
+            with span("parse", extractor=mapper.__name__):
+                records = mapper(payload)
+            if records:
+                # A repeated call (e.g. a re-sort) replaces the earlier response for the same URL.
+                latest[response_url] = records
+        if latest:
+            records = [record for records in latest.values() for record in records]
+            print(f"Captured {len(records)} records from {len(latest)} API response(s) for {url}")
+            return records
+        if (quiet.get("ready") and not capture.pending) or time.time() >= deadline:
+            return None
+
+# ---- JSON Helpers ----
+def pick(record, paths):
+    # First non-empty value among dotted `paths`, e.g. "displayName.text".
+    for path in paths:
+        value = record
+        for part in path.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+            if value is None:
+                break
+        if value not in (None, "", [], {}):
+            return value
+    return None
+
+def find_records(payload, anchor_paths):
+    # The largest list of objects anywhere in `payload` whose items carry one of `anchor_paths`.
+    best = []
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            items = [item for item in node if isinstance(item, dict) and pick(item, anchor_paths) is not None]
+            if len(items) > len(best):
+                best = items
+            stack.extend(node)
+    return best
+
+def as_text(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def clock_text(value):
+    # "2024-05-01T21:30:00" -> "21:30"; plain "21:30" passes through.
+    text = as_text(value)
+    match = re.search(r"T(\d{2}:\d{2})", text)
+    return match.group(1) if match else text
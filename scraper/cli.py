@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+import sys
+import time
+import pandas as pd
+from scraper.batch import BATCH_WORKERS, MODES, PER_HOST_DELAY, PER_HOST_LIMIT, merge_batch_results, run_batch
+from scraper.booking import HOTEL_BATCH_VARIANT
+from scraper.capture import CAPTURE_NETWORK
+from scraper.export import EXPORT_FORMATS, export_frame
+from scraper.metrics import TRACE_DIR, registry, serve_metrics, write_metrics
+from scraper.reporting import PrintReporter, QuietReporter, set_reporter
+
+# ---- Job Files ----
+# A JSON or YAML list of jobs, or a mapping with a "jobs" list:
+#   - {mode: bus, url: "https://www.abhibus.com/bus_search/...", route_type: Bus-Enroute}
+#   - {mode: hotel, url: "https://www.booking.com/searchresults.html?ss=London"}
+DEFAULT_ROUTE_TYPES = {"bus": "Bus-Route", "train": "Train-Route", "hotel": HOTEL_BATCH_VARIANT}
+OUTPUT_FORMATS = list(EXPORT_FORMATS)
+
+def load_jobs(path):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if path.lower().endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Reading YAML job files needs PyYAML (pip install pyyaml); JSON works without it.")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get("jobs")
+    if not isinstance(data, list):
+        raise ValueError("A job file must hold a list of jobs or a mapping with a 'jobs' list.")
+    jobs = []
+    for i, job in enumerate(data, 1):
+        if not isinstance(job, dict) or not job.get("url"):
+            raise ValueError(f"Job {i} needs at least a 'url'.")
+        mode = str(job.get("mode", "")).lower()
+        if mode not in MODES:
+            raise ValueError(f"Job {i} has unknown mode {job.get('mode')!r}; expected one of {', '.join(MODES)}.")
+        jobs.append((mode, job["url"].strip(), job.get("route_type") or DEFAULT_ROUTE_TYPES[mode]))
+    return jobs
+
+# ---- Output ----
+def write_frame(df, path, output_format):
+    return export_frame(df, path, output_format)
+
+def print_summary(statuses, seconds):
+    print(f"\n{'Mode':6} {'Status':7} {'Tier':7} {'Rows':>6} {'Seconds':>8}  URL")
+    for mode, status in statuses:
+        for row in status.itertuples(index=False):
+            print(f"{mode:6} {row.Status:7} {row.Tier:7} {row.Rows:>6} {row.Seconds:>8.2f}  {row.URL}")
+            if row.Error:
+                print(f"{'':6} {row.Error}")
+    counts = {}
+    for _, status in statuses:
+        for value in status["Status"]:
+            counts[value] = counts.get(value, 0) + 1
+    total = sum(counts.values())
+    print(f"\n{total} jobs in {seconds:.2f}s: " + ", ".join(f"{n} {s}" for s, n in sorted(counts.items())))
+    return counts
+
+def print_stage_summary(limit=12):
+    summary = registry.stage_summary()[:limit]
+    if not summary:
+        return
+    print(f"\n{'Stage':22} {'Count':>6} {'Total s':>8} {'Mean s':>8} {'Max s':>8}")
+    for row in summary:
+        label = row["stage"] + "".join(f" {k}={row[k]}" for k in ("mode", "extractor", "kind") if k in row)
+        print(f"{label[:22]:22} {row['count']:>6} {row['total_s']:>8.2f} {row['mean_s']:>8.3f} {row['max_s']:>8.2f}")
+
+# ---- Entry Point ----
+def run_jobs(jobs, output_dir, output_format="csv", workers=BATCH_WORKERS, per_host_limit=PER_HOST_LIMIT,
+             per_host_delay=PER_HOST_DELAY, capture=CAPTURE_NETWORK, force_refresh=False):
+    os.makedirs(output_dir, exist_ok=True)
+    statuses = []
+    for mode in MODES:
+        mode_jobs = [(url, route_type) for job_mode, url, route_type in jobs if job_mode == mode]
+        if not mode_jobs:
+            continue
+        print(f"Scraping {len(mode_jobs)} {mode} URL(s) across {min(workers, len(mode_jobs))} worker(s)...")
+        def on_result(result, done, total, mode=mode):
+            print(f"[{mode} {done}/{total}] {result['status']} in {result['seconds']}s: {result['url']}")
+        results = run_batch(mode, mode_jobs, workers=workers, per_host_limit=per_host_limit,
+                            per_host_delay=per_host_delay, capture=capture, force_refresh=force_refresh,
+                            on_result=on_result)
+        df, status = merge_batch_results(mode, results)
+        if not df.empty:
+            path = write_frame(df, os.path.join(output_dir, f"{mode}.{output_format}"), output_format)
+            print(f"Wrote {len(df)} {mode} rows to {path}")
+        statuses.append((mode, status))
+    return statuses
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scraper",
+                                     description="Run bus, train and hotel scrapes from a job file without the Streamlit UI.")
+    parser.add_argument("job_file", help="JSON or YAML list of {mode, url, route_type} jobs.")
+    parser.add_argument("--output-dir", default="output", help="Results go to a timestamped folder under this directory.")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Browser worker processes per mode.")
+    parser.add_argument("--per-host-limit", type=int, default=PER_HOST_LIMIT)
+    parser.add_argument("--per-host-delay", type=float, default=PER_HOST_DELAY)
+    parser.add_argument("--no-capture", action="store_true", help="Parse the rendered page even when SCRAPER_CAPTURE_NETWORK=1 records the search API responses.")
+    parser.add_argument("--force-refresh", action="store_true", help="Ignore cached results.")
+    parser.add_argument("--quiet", action="store_true", help="Only print per-job results and the summary.")
+    parser.add_argument("--profile", action="store_true", help=f"Write a cProfile .prof file per scrape to {TRACE_DIR}.")
+    args = parser.parse_args(argv)
+    try:
+        jobs = load_jobs(args.job_file)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if not jobs:
+        parser.error(f"No jobs in {args.job_file}.")
+    if args.quiet:
+        # Worker processes are spawned with this environment and pick the quiet default up from it.
+        os.environ["SCRAPER_QUIET"] = "1"
+    if args.profile:
+        os.environ["SCRAPER_PROFILE"] = "1"
+    set_reporter(QuietReporter() if args.quiet else PrintReporter())
+    serve_metrics()
+    output_dir = os.path.join(args.output_dir, time.strftime("%Y%m%d-%H%M%S"))
+    start = time.time()
+    statuses = run_jobs(jobs, output_dir, args.format, max(1, args.workers), max(1, args.per_host_limit),
+                        max(0.0, args.per_host_delay), CAPTURE_NETWORK and not args.no_capture, args.force_refresh)
+    counts = print_summary(statuses, time.time() - start)
+    print_stage_summary()
+    if statuses:
+        status = pd.concat([status.assign(Mode=mode) for mode, status in statuses], ignore_index=True)
+        write_frame(status, os.path.join(output_dir, "status.csv"), "csv")
+    write_metrics(os.path.join(output_dir, "metrics.prom"))
+    print(f"Results, per-job status and stage metrics in {output_dir}; per-scrape traces in {TRACE_DIR}")
+    return 1 if counts.get("failed") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+import atexit
+import os
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+import threading
+import time
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from scraper.blocking import BLOCKING_ENABLED, PAGE_LOAD_STRATEGY
+from scraper.capture import CAPTURE_NETWORK, drain_performance_log, enable_network_capture
+from scraper.metrics import count, span
+
+# ---- Pool Settings ----
+POOL_SIZE = int(os.environ.get("SCRAPER_POOL_SIZE", "2"))
+POOL_WARM = int(os.environ.get("SCRAPER_POOL_WARM", "1"))
+DRIVER_MAX_USES = int(os.environ.get("SCRAPER_DRIVER_MAX_USES", "20"))
+DRIVER_IDLE_TIMEOUT = float(os.environ.get("SCRAPER_DRIVER_IDLE_TIMEOUT", "600"))
+REAPER_INTERVAL = 30
+# Host-wide cap on running browsers, shared by the Streamlit app, batch worker processes and the CLI.
+MAX_BROWSERS = int(os.environ.get("SCRAPER_MAX_BROWSERS", "4"))
+BROWSER_SLOT_DIR = os.environ.get("SCRAPER_BROWSER_SLOT_DIR", os.path.join(".cache", "browser-slots"))
+BROWSER_WAIT = float(os.environ.get("SCRAPER_BROWSER_WAIT", "300"))
+# The performance log feeds capture mode and the blocked-request counters (blocking.network_stats), so drivers record
+# it when either is on and each release drains it.
+RECORD_NETWORK_LOG = CAPTURE_NETWORK or BLOCKING_ENABLED
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+# ---- Setup Selenium WebDriver ----
+def get_driver_path():
+    # ChromeDriverManager().install() does a version lookup on every call; resolve it once per process.
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = os.environ.get("CHROMEDRIVER_PATH")
+            if not _driver_path:
+                # webdriver_manager is slow to import and only needed when no driver binary is configured.
+                from webdriver_manager.chrome import ChromeDriverManager
+                _driver_path = ChromeDriverManager().install()
+            print(f"Using ChromeDriver binary at {_driver_path}")
+        return _driver_path
+
+def build_chrome_options():
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+    options.page_load_strategy = PAGE_LOAD_STRATEGY
+    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    if RECORD_NETWORK_LOG:
+        enable_network_capture(options)
+    return options
+
+def setup_driver():
+    service = Service(get_driver_path())
+    return webdriver.Chrome(service=service, options=build_chrome_options())
+
+# ---- Browser Slots ----
+class BrowserSlots:
+    # One lock file per allowed browser. flock locks belong to the process, so the OS frees a slot when a worker
+    # crashes. Without fcntl (Windows) the cap only applies within this process.
+    def __init__(self, limit=MAX_BROWSERS, directory=BROWSER_SLOT_DIR):
+        self.limit = max(1, limit)
+        self.directory = directory
+        self._local = threading.BoundedSemaphore(self.limit)
+        if fcntl is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _try_lock(self):
+        for i in range(self.limit):
+            handle = open(os.path.join(self.directory, f"slot-{i}.lock"), "a")
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return handle
+            except OSError:
+                handle.close()
+        return None
+
+    def acquire(self, timeout=None):
+        # Returns a slot handle, or None if none became free within `timeout` seconds.
+        if fcntl is None:
+            return self._local if self._local.acquire(timeout=timeout) else None
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            handle = self._try_lock()
+            if handle is not None:
+                return handle
+            if deadline is not None and time.time() >= deadline:
+                return None
+            time.sleep(0.25)
+
+    def release(self, handle):
+        if handle is self._local:
+            self._local.release()
+            return
+        try:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+        finally:
+            handle.close()
+
+    def in_use(self):
+        if fcntl is None:
+            return None
+        busy = 0
+        for i in range(self.limit):
+            with open(os.path.join(self.directory, f"slot-{i}.lock"), "a") as handle:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+                except OSError:
+                    busy += 1
+        return busy
+
+_browser_slots = None
+_browser_slots_lock = threading.Lock()
+
+def get_browser_slots():
+    global _browser_slots
+    with _browser_slots_lock:
+        if _browser_slots is None:
+            _browser_slots = BrowserSlots()
+        return _browser_slots
+
+# ---- Driver Pool ----
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.uses = 0
+
+class DriverPool:
+    def __init__(self, size=POOL_SIZE, warm=POOL_WARM, max_uses=DRIVER_MAX_USES,
+                 idle_timeout=DRIVER_IDLE_TIMEOUT, factory=setup_driver, slots=None):
+        self.size = max(1, size)
+        self.warm_count = min(max(0, warm), self.size)
+        self.max_uses = max_uses
+        self.idle_timeout = idle_timeout
+        self.factory = factory
+        self.slots = slots or get_browser_slots()
+        self._browser_slots = {}
+        self._idle = []
+        self._leased = {}
+        self._slots_taken = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def stats(self):
+        with self._cond:
+            stats = {"idle": len(self._idle), "in_use": len(self._leased), "size": self.size}
+        stats["host_browsers"] = self.slots.in_use()
+        stats["host_limit"] = self.slots.limit
+        return stats
+
+    def _checkout(self, timeout):
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool has been shut down.")
+                if self._idle:
+                    return self._idle.pop()
+                if self._slots_taken < self.size:
+                    self._slots_taken += 1
+                    return None
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No WebDriver became available within {timeout} seconds.")
+                self._cond.wait(remaining)
+
+    def _free_slot(self):
+        with self._cond:
+            self._slots_taken -= 1
+            self._cond.notify()
+
+    def _create(self, wait=BROWSER_WAIT):
+        start = time.time()
+        with span("browser_slot_wait"):
+            browser_slot = self.slots.acquire(wait)
+        if browser_slot is None:
+            self._free_slot()
+            raise TimeoutError(f"All {self.slots.limit} browser slots on this host stayed busy for {wait} seconds.")
+        try:
+            with span("driver_startup"):
+                entry = _PooledDriver(self.factory())
+            count("drivers_started")
+        except Exception:
+            self.slots.release(browser_slot)
+            self._free_slot()
+            raise
+        with self._cond:
+            self._browser_slots[id(entry.driver)] = browser_slot
+        print(f"Started pooled WebDriver in {round(time.time() - start, 2)} seconds.")
+        return entry
+
+    def acquire(self, timeout=None):
+        with span("driver_acquire") as record:
+            entry = self._checkout(timeout)
+            if entry is not None and not self._is_healthy(entry.driver):
+                print("Pooled WebDriver failed health check, replacing it.")
+                self._quit(entry.driver)
+                entry = None
+            record["reused"] = entry is not None
+            if entry is None:
+                # _checkout already reserved a slot for this driver (or the unhealthy one it replaces).
+                entry = self._create()
+        entry.uses += 1
+        entry.last_used = time.time()
+        with self._cond:
+            self._leased[id(entry.driver)] = entry
+        return entry.driver
+
+    def release(self, driver, discard=False):
+        with self._cond:
+            entry = self._leased.pop(id(driver), None)
+        if entry is None:
+            return
+        if not discard and entry.uses >= self.max_uses:
+            print(f"Recycling WebDriver after {entry.uses} uses.")
+            discard = True
+        if not discard:
+            try:
+                self._reset(driver)
+            except Exception as e:
+                print(f"Failed to reset pooled WebDriver, discarding it: {e}")
+                discard = True
+        if discard:
+            self._quit(driver)
+            self._free_slot()
+            self.warm()
+            return
+        entry.last_used = time.time()
+        with self._cond:
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                self._idle.append(entry)
+                self._cond.notify()
+        if closed:
+            self._quit(driver)
+
+    @contextmanager
+    def borrow(self, timeout=None):
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def warm(self, count=None):
+        # Start drivers in the background until `count` sessions exist, so the next borrow finds one ready.
+        target = self.warm_count if count is None else min(count, self.size)
+        def _fill():
+            while True:
+                with self._cond:
+                    if self._closed or self._slots_taken >= target or self._slots_taken >= self.size:
+                        return
+                    self._slots_taken += 1
+                try:
+                    # Pre-warming never waits for a browser slot; a real borrow will.
+                    entry = self._create(wait=0)
+                except Exception as e:
+                    print(f"Failed to pre-warm WebDriver: {e}")
+                    return
+                with self._cond:
+                    if self._closed:
+                        self._quit(entry.driver)
+                        return
+                    self._idle.append(entry)
+                    self._cond.notify()
+        threading.Thread(target=_fill, name="driver-pool-warm", daemon=True).start()
+
+    def evict_idle(self):
+        now = time.time()
+        evicted = []
+        with self._cond:
+            keep = []
+            # Oldest idle drivers go first; the pre-warmed minimum is always kept.
+            for entry in sorted(self._idle, key=lambda e: e.last_used):
+                surplus = self._slots_taken - len(evicted) > self.warm_count
+                if surplus and now - entry.last_used > self.idle_timeout:
+                    evicted.append(entry)
+                else:
+                    keep.append(entry)
+            self._idle = keep
+            self._slots_taken -= len(evicted)
+            self._cond.notify_all()
+        for entry in evicted:
+            print(f"Evicting WebDriver idle for {round(now - entry.last_used)} seconds.")
+            self._quit(entry.driver)
+        return len(evicted)
+
+    def start_reaper(self, interval=REAPER_INTERVAL):
+        def _reap():
+            while not self._closed:
+                time.sleep(interval)
+                try:
+                    self.evict_idle()
+                except Exception as e:
+                    print(f"Driver pool reaper error: {e}")
+        threading.Thread(target=_reap, name="driver-pool-reaper", daemon=True).start()
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            leased = list(self._leased.values())
+            self._leased = {}
+            self._slots_taken = 0
+            self._cond.notify_all()
+        for entry in idle + leased:
+            self._quit(entry.driver)
+
+    @staticmethod
+    def _is_healthy(driver):
+        try:
+            return driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(driver):
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        origin = driver.execute_script("return window.location.origin;")
+        if origin and origin != "null":
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                "origin": origin,
+                "storageTypes": "local_storage,session_storage,indexeddb,websql,service_workers,cache_storage",
+            })
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.get("about:blank")
+        if RECORD_NETWORK_LOG:
+            drain_performance_log(driver)
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error while quitting WebDriver: {e}")
+        with self._cond:
+            browser_slot = self._browser_slots.pop(id(driver), None)
+        if browser_slot is not None:
+            self.slots.release(browser_slot)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_driver_pool():
+    # One pool per process: Streamlit re-executes main.py on every rerun, but imported modules persist.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+            _pool.warm()
+            _pool.start_reaper()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+def shutdown_driver_pool():
+    # For process finalizers: shuts the pool down only if this process ever needed a browser.
+    with _pool_lock:
+        pool = _pool
+    if pool is not None:
+        pool.shutdown()
@@ -0,0 +1,131 @@
+import os
+import numpy as np
+import pandas as pd
+from scraper.normalize import normalize
+
+# ---- Explore Settings ----
+# Result tables show at most this many rows; filters, summaries and downloads always cover every matching row.
+DISPLAY_ROWS = int(os.environ.get("SCRAPER_DISPLAY_ROWS", "5000"))
+# Per mode: categorical filters, numeric ranges (typed column, or "Departure" for minutes since midnight) and the
+# columns a summary can group by.
+CATEGORY_FILTERS = {
+    "bus": ["Operator", "Bus Type", "Route Type"],
+    "train": ["Train Type", "Frequency", "Route Type"],
+    "hotel": ["Type"],
+}
+RANGE_FILTERS = {
+    "bus": {"Fare": "Fare Min", "Departure": "Departure", "Duration (min)": "Duration (min)"},
+    "train": {"Fare": "Fare Min", "Departure": "Departure", "Duration (min)": "Duration (min)"},
+    "hotel": {"Price": "Price", "Rating": "Rating"},
+}
+GROUP_BY = {
+    "bus": ["Operator", "Bus Type", "Bus Name", "Route Type"],
+    "train": ["Train Type", "Starting Station", "Destination Station", "Route Type"],
+    "hotel": ["Type", "Address"],
+}
+OPERATORS = ["Government", "Private"]
+
+def government_mask(df_bus):
+    is_gov_by_std_name = df_bus["Bus Name"] == "Government Bus"
+    is_gov_by_rtc_in_name = df_bus["Bus Name"].str.contains("RTC", case=False, na=False)
+    is_gov_by_rtc_in_type = df_bus["Bus Type"].str.contains("RTC", case=False, na=False)
+    return is_gov_by_std_name | is_gov_by_rtc_in_name | is_gov_by_rtc_in_type
+
+# ---- Result Index ----
+class ResultIndex:
+    # Types a scraped frame once and keeps plain arrays per filterable column: category codes, float values (NaN for
+    # missing) and their sort orders. Filtering is then a few vectorized comparisons, sorting picks the matching
+    # rows out of a precomputed order, and only the rows shown are taken from the original frame, which is never
+    # modified.
+    def __init__(self, mode, df):
+        self.mode = mode
+        self.df = df
+        self.typed = normalize(mode, df)
+        self.codes = {}
+        self.labels = {}
+        self.values = {}
+        self._orders = {}
+        for name in CATEGORY_FILTERS[mode] + GROUP_BY[mode]:
+            if name in self.codes:
+                continue
+            if name == "Operator":
+                gov = government_mask(df).to_numpy()
+                self.codes[name], self.labels[name] = np.where(gov, 0, 1), OPERATORS
+            else:
+                column = self.typed[name]
+                column = column if isinstance(column.dtype, pd.CategoricalDtype) else column.astype("category")
+                self.codes[name] = column.cat.codes.to_numpy()
+                self.labels[name] = [str(label) for label in column.cat.categories]
+        for name, column in RANGE_FILTERS[mode].items():
+            values = self.typed[column]
+            if name == "Departure":
+                values = values.dt.total_seconds() / 60
+            self.values[name] = pd.to_numeric(values, errors="coerce").astype("float64").to_numpy(na_value=np.nan)
+
+    def __len__(self):
+        return len(self.df)
+
+    def options(self, name):
+        present = np.unique(self.codes[name])
+        return [self.labels[name][code] for code in present if code >= 0]
+
+    def bounds(self, name):
+        values = self.values[name]
+        if np.isnan(values).all():
+            return None
+        return float(np.nanmin(values)), float(np.nanmax(values))
+
+    def filter(self, categories=None, ranges=None):
+        # categories: {name: [labels]}, empty lists meaning "any"; ranges: {name: (low, high)}, which drop rows where
+        # the value is missing. Returns row positions in the original order.
+        mask = np.ones(len(self.df), dtype=bool)
+        for name, selected in (categories or {}).items():
+            if selected:
+                wanted = [self.labels[name].index(label) for label in selected if label in self.labels[name]]
+                mask &= np.isin(self.codes[name], wanted)
+        for name, (low, high) in (ranges or {}).items():
+            values = self.values[name]
+            with np.errstate(invalid="ignore"):
+                mask &= (values >= low) & (values <= high)
+        return np.flatnonzero(mask)
+
+    def sort(self, positions, name=None, descending=False):
+        # Missing values sort last either way.
+        if name is None:
+            return positions
+        key = (name, descending)
+        if key not in self._orders:
+            values = self.values[name]
+            self._orders[key] = np.argsort(-values if descending else values, kind="stable")
+        order = self._orders[key]
+        selected = np.zeros(len(self.df), dtype=bool)
+        selected[positions] = True
+        return order[selected[order]]
+
+    def split(self, positions, name):
+        codes = self.codes[name][positions]
+        return {label: positions[codes == code] for code, label in enumerate(self.labels[name])}
+
+    def rows(self, positions, limit=None):
+        return self.df.iloc[positions[:limit] if limit else positions]
+
+    def summary(self, positions, by):
+        value_name = next(iter(RANGE_FILTERS[self.mode]))
+        codes = self.codes[by][positions]
+        frame = pd.DataFrame({
+            by: pd.Categorical.from_codes(codes, categories=self.labels[by]),
+            value_name: self.values[value_name][positions],
+        })
+        if "Duration (min)" in self.values:
+            frame["Duration (min)"] = self.values["Duration (min)"][positions]
+        if "Rating" in self.values:
+            frame["Rating"] = self.values["Rating"][positions]
+        grouped = frame.groupby(by, observed=True)
+        summary = grouped.size().rename("Count").to_frame()
+        summary[f"{value_name} Min"] = grouped[value_name].min()
+        summary[f"{value_name} Median"] = grouped[value_name].median()
+        summary[f"{value_name} Max"] = grouped[value_name].max()
+        for extra in ("Duration (min)", "Rating"):
+            if extra in frame:
+                summary[f"{extra} Median"] = grouped[extra].median()
+        return summary.sort_values("Count", ascending=False).reset_index()
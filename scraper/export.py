@@ -0,0 +1,98 @@
+import gzip
+import os
+import time
+import uuid
+
+# ---- Export Settings ----
+# Frames are written out in row chunks, so an export never holds more than one chunk's text (or Arrow table) on top of
+# the frame itself, and the frame is never modified.
+EXPORT_DIR = os.environ.get("SCRAPER_EXPORT_DIR", os.path.join(".cache", "exports"))
+EXPORT_CHUNK_ROWS = int(os.environ.get("SCRAPER_EXPORT_CHUNK_ROWS", "20000"))
+EXPORT_KEEP = int(os.environ.get("SCRAPER_EXPORT_KEEP", "50"))
+EXPORT_FORMATS = {
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    for start in range(0, len(df), max(1, chunk_rows)):
+        yield start, df.iloc[start:start + chunk_rows]
+
+def export_path(filename, output_format, directory=EXPORT_DIR):
+    stem = filename.rsplit(".", 1)[0] if filename.endswith((".csv", ".parquet", ".jsonl")) else filename
+    return os.path.join(directory, f"{stem}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}.{output_format}")
+
+def _write_csv(df, f, chunk_rows):
+    for start, chunk in chunks(df, chunk_rows):
+        chunk.to_csv(f, index=False, header=start == 0)
+    if df.empty:
+        df.to_csv(f, index=False)
+
+def _write_jsonl(df, f, chunk_rows):
+    for _, chunk in chunks(df, chunk_rows):
+        text = chunk.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+        f.write(text if text.endswith("\n") else text + "\n")
+
+def _write_parquet(df, path, chunk_rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    # Object columns hold scraped text (and the odd None); they go out as strings. Typed columns keep their dtype,
+    # which is the same for every chunk, so the first chunk's schema fits them all.
+    text_columns = [c for c in df.columns if df[c].dtype == object]
+    writer = None
+    try:
+        for _, chunk in chunks(df, chunk_rows):
+            if text_columns:
+                chunk = chunk.astype({c: "string" for c in text_columns})
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            writer.write_table(table.cast(writer.schema))
+        if writer is None:
+            pq.write_table(pa.Table.from_pandas(df.astype({c: "string" for c in text_columns}), preserve_index=False), path)
+    finally:
+        if writer is not None:
+            writer.close()
+
+def export_frame(df, path, output_format=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    # Writes to a temporary file and renames it into place, so a reader never sees a half-written export.
+    output_format = output_format or next((fmt for fmt in EXPORT_FORMATS if path.endswith(f".{fmt}")), "csv")
+    if output_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {output_format!r}; expected one of {', '.join(EXPORT_FORMATS)}.")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if output_format == "parquet":
+            _write_parquet(df, tmp_path, chunk_rows)
+        elif output_format == "csv.gz":
+            with gzip.open(tmp_path, "wt", newline="", encoding="utf-8", compresslevel=6) as f:
+                _write_csv(df, f, chunk_rows)
+        elif output_format == "jsonl":
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                _write_jsonl(df, f, chunk_rows)
+        else:
+            with open(tmp_path, "w", newline="", encoding="utf-8-sig") as f:
+                _write_csv(df, f, chunk_rows)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+def prune_exports(directory=EXPORT_DIR, keep=EXPORT_KEEP):
+    try:
+        files = sorted((entry for entry in os.scandir(directory) if entry.is_file()), key=lambda entry: entry.stat().st_mtime)
+    except OSError:
+        return
+    for entry in files[:max(0, len(files) - keep)]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+def export_to_disk(df, filename, output_format="csv.gz", directory=EXPORT_DIR, chunk_rows=EXPORT_CHUNK_ROWS):
+    path = export_frame(df, export_path(filename, output_format, directory), output_format, chunk_rows)
+    prune_exports(directory)
+    return path
@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+import urllib.parse
+import requests
+from requests.adapters import HTTPAdapter
+from scraper.abhibus import extract_bus_cards, extract_train_cards, load_bus_results, load_train_results, parse_html
+from scraper.booking import load_hotel_results
+from scraper.capture import CAPTURE_NETWORK
+from scraper.metrics import count, span
+from scraper.reporting import report
+
+# ---- Fetcher Settings ----
+# Bus and train pages are tried over plain HTTP first: when the server-rendered HTML already holds the result cards
+# (and no government-bus section is still collapsed) they are extracted from it without starting Chrome. Anything else
+# is escalated to a pooled browser. Booking renders results client-side, so hotels always use the browser.
+FAST_PATH = os.environ.get("SCRAPER_FAST_PATH", "1") == "1"
+HTTP_TIMEOUT = float(os.environ.get("SCRAPER_HTTP_TIMEOUT", "15"))
+HTTP_POOL_SIZE = int(os.environ.get("SCRAPER_HTTP_POOL_SIZE", "8"))
+# After this many escalations in a row a host skips the fast path for HTTP_RETRY_AFTER seconds.
+HTTP_SKIP_AFTER = 3
+HTTP_RETRY_AFTER = 600
+TIERS = ["http", "browser", "cache"]
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# Result markers per mode, as XPath over the parsed page: `span.fare` on bus cards and `.name` on train cards. They
+# only rule pages out cheaply (`.name` also appears in page chrome); a page is accepted once the card extractor the
+# parsers use finds at least one complete card in it.
+RESULT_MARKERS = {"bus": f"//span[{_has_class('fare')}]", "train": f"//*[{_has_class('name')}]"}
+CARD_EXTRACTORS = {"bus": extract_bus_cards, "train": extract_train_cards}
+# A collapsed government-bus section, which only a click in the browser (expand_government_buses) opens.
+COLLAPSED_GOV_XPATH = "//a[" + " and ".join(_has_class(c) for c in "btn dark filled primary sm rounded-sm inactive button".split()) + "]"
+BROWSER_LOADERS = {"bus": load_bus_results, "train": load_train_results, "hotel": load_hotel_results}
+
+_session = None
+_session_lock = threading.Lock()
+_host_misses = {}
+_host_misses_lock = threading.Lock()
+
+def get_http_session():
+    # One keep-alive session per process; its connection pool is shared by every thread.
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate",
+                                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                                    "Accept-Language": "en-IN,en;q=0.9"})
+            _session = session
+        return _session
+
+def _host(url):
+    return urllib.parse.urlsplit(url).netloc.lower()
+
+def _fast_path_open(url):
+    with _host_misses_lock:
+        misses, last_miss = _host_misses.get(_host(url), (0, 0.0))
+    return misses < HTTP_SKIP_AFTER or time.time() - last_miss > HTTP_RETRY_AFTER
+
+def _note(url, ok):
+    # Job-queue workers and batch threads share these counts; the read-modify-write must not interleave.
+    host = _host(url)
+    with _host_misses_lock:
+        if ok:
+            _host_misses.pop(host, None)
+        else:
+            misses, _ = _host_misses.get(host, (0, 0.0))
+            _host_misses[host] = (misses + 1, time.time())
+
+# ---- HTTP Tier ----
+def fetch_html(mode, url, session=None):
+    # Returns (records, None) with the cards extracted from the server-rendered page, otherwise (None, reason to
+    # escalate). The page is parsed once; the records go to scrape_*_results as they are.
+    session = session or get_http_session()
+    with span("fetch", mode=mode, tier="http") as record:
+        try:
+            response = session.get(url, timeout=HTTP_TIMEOUT)
+        except requests.RequestException as e:
+            return None, f"{type(e).__name__}: {e}"
+        record["status"] = response.status_code
+        record["bytes"] = len(response.content)
+        count("http_bytes", len(response.content), mode=mode)
+        if response.status_code != 200:
+            return None, f"HTTP {response.status_code}"
+        if "html" not in response.headers.get("Content-Type", "text/html"):
+            return None, f"not HTML ({response.headers.get('Content-Type')})"
+        page_source = response.text
+        if not page_source.strip():
+            return None, "empty response"
+    with span("marker_check", mode=mode) as record:
+        root = parse_html(page_source)
+        if not root.xpath(RESULT_MARKERS[mode]):
+            return None, "results are rendered client-side"
+        if mode == "bus" and root.xpath(COLLAPSED_GOV_XPATH):
+            return None, "government buses need expanding"
+        with span("parse", extractor=CARD_EXTRACTORS[mode].__name__):
+            cards = CARD_EXTRACTORS[mode](root)
+        record["cards"] = len(cards)
+        if not cards:
+            return None, "no result cards in the server-rendered page"
+    return cards, None
+
+# ---- Tiered Loading ----
+def fetch_results(mode, url, capture=CAPTURE_NETWORK, fast_path=FAST_PATH, page_load_timeout=None):
+    # Returns (records, page_source, tier, reason) in the shape the MODES loaders use, plus the tier that produced
+    # them and, when the browser was needed, why the HTTP tier was not enough. HTTP-tier records are already
+    # extracted cards, so callers pass source="dom" to scrape_*_results for them.
+    from scraper.driver_pool import get_driver_pool
+    reason = None
+    if fast_path and mode in RESULT_MARKERS:
+        if _fast_path_open(url):
+            records, reason = fetch_html(mode, url)
+            _note(url, records is not None)
+            if records is not None:
+                report.write(f"HTTP: results were in the server-rendered page for {url}; no browser needed.")
+                count("fetches", mode=mode, tier="http")
+                return records, None, "http", None
+            report.write(f"HTTP: {reason}; loading {url} in the browser.")
+        else:
+            reason = f"fast path skipped for {_host(url)} after {HTTP_SKIP_AFTER} escalations"
+    with get_driver_pool().borrow() as driver:
+        # Pooled drivers are shared, so a timeout set for this load is put back afterwards.
+        previous_timeout = driver.timeouts.page_load if page_load_timeout else None
+        try:
+            if page_load_timeout:
+                driver.set_page_load_timeout(page_load_timeout)
+            with span("fetch", mode=mode, tier="browser"):
+                records, page_source = BROWSER_LOADERS[mode](driver, url, capture)
+        finally:
+            if previous_timeout is not None:
+                driver.set_page_load_timeout(previous_timeout)
+    count("fetches", mode=mode, tier="browser")
+    return records, page_source, "browser", reason
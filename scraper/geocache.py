@@ -0,0 +1,132 @@
+import csv
+import io
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+# ---- Cache Settings ----
+GEOCODE_CACHE_PATH = os.environ.get("SCRAPER_GEOCODE_CACHE", os.path.join(".cache", "geocode.sqlite"))
+GEOCODE_TTL = float(os.environ.get("SCRAPER_GEOCODE_TTL", str(30 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL = float(os.environ.get("SCRAPER_GEOCODE_NEGATIVE_TTL", str(24 * 3600)))
+GEOCODE_CACHE_MAX_ENTRIES = int(os.environ.get("SCRAPER_GEOCODE_MAX_ENTRIES", "50000"))
+EVICT_CHECK_EVERY = 100
+EXPORT_FIELDS = ["key", "query", "lat", "lon", "created_at"]
+
+def normalize_query(hotel_name, city_name=None):
+    text = f"{hotel_name} {city_name}" if city_name else hotel_name
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+class GeocodeCache:
+    def __init__(self, path=GEOCODE_CACHE_PATH, ttl=GEOCODE_TTL, negative_ttl=GEOCODE_NEGATIVE_TTL,
+                 max_entries=GEOCODE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS geocode (
+            key TEXT PRIMARY KEY, query TEXT, lat TEXT, lon TEXT, created_at REAL, last_used REAL)""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS geocode_last_used ON geocode (last_used)")
+        self._conn.commit()
+
+    def _expired(self, lat, created_at, now):
+        ttl = self.ttl if lat is not None else self.negative_ttl
+        return now - created_at > ttl
+
+    def get(self, key):
+        # Returns (hit, coords): coords is (lat, lon) for a cached match, None for a cached "not found".
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT lat, lon, created_at FROM geocode WHERE key = ?", (key,)).fetchone()
+            if row is None or self._expired(row[0], row[2], now):
+                if row is not None:
+                    self._conn.execute("DELETE FROM geocode WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return False, None
+            self._conn.execute("UPDATE geocode SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return True, (row[0], row[1]) if row[0] is not None else None
+
+    def put(self, key, query, coords):
+        now = time.time()
+        lat, lon = coords if coords else (None, None)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO geocode (key, query, lat, lon, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                               (key, query, lat, lon, now, now))
+            self._conn.commit()
+            self._puts += 1
+            if self._puts % EVICT_CHECK_EVERY == 0:
+                self._evict()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+        if count <= self.max_entries:
+            return 0
+        self._conn.execute("""DELETE FROM geocode WHERE key IN (
+            SELECT key FROM geocode ORDER BY last_used ASC LIMIT ?)""", (count - self.max_entries,))
+        self._conn.commit()
+        return count - self.max_entries
+
+    def evict(self):
+        with self._lock:
+            return self._evict()
+
+    def stats(self):
+        return self.hits, self.misses
+
+    def warm(self, records):
+        # Bulk-load entries, e.g. from export() on another machine; missing lat/lon marks a negative result.
+        now = time.time()
+        rows = []
+        for record in records:
+            query = record.get("query") or ""
+            key = record.get("key") or normalize_query(query)
+            lat = record.get("lat") or None
+            lon = record.get("lon") or None
+            created_at = float(record.get("created_at") or now)
+            rows.append((key, query, lat, lon if lat else None, created_at, now))
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO geocode (key, query, lat, lon, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self._evict()
+        return len(rows)
+
+    def export(self):
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute("SELECT key, query, lat, lon, created_at FROM geocode ORDER BY last_used DESC").fetchall()
+        return [dict(zip(EXPORT_FIELDS, row)) for row in rows if not self._expired(row[2], row[4], now)]
+
+    def export_csv(self):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(self.export())
+        return buffer.getvalue()
+
+    def warm_from_csv(self, text):
+        return self.warm(csv.DictReader(io.StringIO(text)))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_geocode_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GeocodeCache()
+        return _cache
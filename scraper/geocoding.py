@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from requests.adapters import HTTPAdapter
+from scraper.geocache import get_geocode_cache, normalize_query
+
+# ---- Geocoder Settings ----
+NOMINATIM_URL = os.environ.get("SCRAPER_NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+# Nominatim's usage policy allows at most one request per second per application.
+GEOCODE_RATE = float(os.environ.get("SCRAPER_GEOCODE_RATE", "1.0"))
+GEOCODE_WORKERS = int(os.environ.get("SCRAPER_GEOCODE_WORKERS", "2"))
+GEOCODE_RETRIES = 2
+GEOCODE_BACKOFF = 1.0
+GEOCODE_TIMEOUT = 10
+USER_AGENT = "HotelLocatorScript/1.0"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_for = (1 - self._tokens) / self.rate
+            time.sleep(wait_for)
+
+# One bucket per process, shared by every scrape, so concurrent sessions can't exceed the policy together.
+_bucket = TokenBucket(GEOCODE_RATE)
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(GEOCODE_WORKERS, 2))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"})
+            _session = session
+        return _session
+
+def maps_link(hotel_name, query, coords):
+    if coords:
+        lat, lon = coords
+        return f"https://www.google.com/maps/search/?api=1&query={urllib.parse.quote(hotel_name)}&query_place_id={lat},{lon}"
+    return f"https://www.google.com/maps/search/?api=1&query={urllib.parse.quote(query)}"
+
+def geocode_query(query, session=None, retries=GEOCODE_RETRIES):
+    # Returns (lat, lon), or None when Nominatim has no match; raises RequestException once retries run out.
+    session = session or get_session()
+    for attempt in range(retries + 1):
+        _bucket.acquire()
+        try:
+            response = session.get(NOMINATIM_URL, params={"q": query, "format": "json", "limit": 1}, timeout=GEOCODE_TIMEOUT)
+            if response.status_code in RETRY_STATUSES and attempt < retries:
+                time.sleep(GEOCODE_BACKOFF * (2 ** attempt))
+                continue
+            response.raise_for_status()
+            results = response.json()
+            return (results[0]["lat"], results[0]["lon"]) if results else None
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= retries:
+                raise
+            time.sleep(GEOCODE_BACKOFF * (2 ** attempt))
+
+# ---- Batch Geocoding Stage ----
+def geocode_batch(lookups, workers=GEOCODE_WORKERS, on_progress=None):
+    # lookups: iterable of (hotel_name, city_name). Returns ({key: link}, stats) with each distinct query fetched once.
+    cache = get_geocode_cache()
+    links = {}
+    pending = {}
+    stats = {"hits": 0, "misses": 0, "failed": 0}
+    for hotel_name, city_name in lookups:
+        if not hotel_name or hotel_name == 'N/A':
+            continue
+        key = normalize_query(hotel_name, city_name)
+        if key in links or key in pending:
+            continue
+        query = f"{hotel_name}, {city_name}" if city_name else hotel_name
+        hit, coords = cache.get(key)
+        if hit:
+            stats["hits"] += 1
+            links[key] = maps_link(hotel_name, query, coords)
+        else:
+            stats["misses"] += 1
+            pending[key] = (hotel_name, query)
+    if not pending:
+        return links, stats
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="geocode") as executor:
+        futures = {executor.submit(geocode_query, query): key for key, (_, query) in pending.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            hotel_name, query = pending[key]
+            try:
+                coords = future.result()
+                cache.put(key, query, coords)
+                links[key] = maps_link(hotel_name, query, coords)
+            except requests.RequestException as e:
+                print(f"Geocoding failed for '{query}': {e}")
+                stats["failed"] += 1
+                links[key] = None
+            done += 1
+            if on_progress:
+                on_progress(done, len(pending))
+    return links, stats
+
+def add_google_maps_links(hotel_data, workers=GEOCODE_WORKERS, on_progress=None):
+    lookups = [(row["Hotel Name"], row["Address"].split(',')[0] if row["Address"] != 'N/A' else None) for row in hotel_data]
+    links, stats = geocode_batch(lookups, workers=workers, on_progress=on_progress)
+    for row, (hotel_name, city_name) in zip(hotel_data, lookups):
+        if not hotel_name or hotel_name == 'N/A':
+            row["Google Maps Link"] = None
+        else:
+            row["Google Maps Link"] = links.get(normalize_query(hotel_name, city_name))
+    return stats
@@ -0,0 +1,199 @@
+import glob
+import os
+import re
+import time
+import urllib.parse
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from scraper.abhibus import BUS_COLUMNS, TRAIN_COLUMNS
+from scraper.booking import HOTEL_COLUMNS
+from scraper.normalize import fare_bounds
+
+# ---- History Settings ----
+# One Hive-partitioned Parquet dataset per mode: <dir>/<mode>/route=<route>/travel_date=<YYYY-MM-DD>/*.parquet.
+# Every scrape adds new files, nothing is rewritten except by compact().
+HISTORY_DIR = os.environ.get("SCRAPER_HISTORY_DIR", os.path.join("data", "history"))
+MODE_COLUMNS = {"bus": BUS_COLUMNS, "train": TRAIN_COLUMNS, "hotel": HOTEL_COLUMNS}
+# Columns that identify the same bus/train/hotel across snapshots.
+ITEM_KEYS = {
+    "bus": ["Bus Name", "Bus Type", "Departure", "Starting Place"],
+    "train": ["Train Name", "Departure", "Starting Station"],
+    "hotel": ["Hotel Name", "Address"],
+}
+FARE_COLUMNS = {"bus": "Price", "train": "Prices", "hotel": "Price"}
+PARTITIONING = ds.partitioning(pa.schema([("route", pa.string()), ("travel_date", pa.string())]), flavor="hive")
+UNKNOWN_DATE = "unknown"
+
+def file_schema(mode):
+    # What each Parquet file holds; route and travel_date live in the directory names.
+    fields = [(column, pa.string()) for column in MODE_COLUMNS[mode]]
+    fields += [("item", pa.string()), ("fare", pa.float64()), ("snapshot_id", pa.string()),
+               ("scraped_at", pa.timestamp("us", tz="UTC")), ("url", pa.string())]
+    return pa.schema(fields)
+
+def history_schema(mode):
+    return pa.schema(list(file_schema(mode)) + list(PARTITIONING.schema))
+
+# ---- Route / Date From URL ----
+DATE_PATTERNS = [
+    (re.compile(r"(?<!\d)(\d{2})-(\d{2})-(\d{4})(?!\d)"), lambda m: f"{m[3]}-{m[2]}-{m[1]}"),
+    (re.compile(r"(?<!\d)(\d{4})-(\d{2})-(\d{2})(?!\d)"), lambda m: f"{m[1]}-{m[2]}-{m[3]}"),
+    (re.compile(r"(?<!\d)(20\d{2})(\d{2})(\d{2})(?!\d)"), lambda m: f"{m[1]}-{m[2]}-{m[3]}"),
+]
+ROUTE_MARKERS = {"bus_search", "results", "trains", "search"}
+
+def slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "unknown"
+
+def find_date(text):
+    for pattern, to_iso in DATE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return to_iso(match)
+    return None
+
+def route_info(mode, url):
+    # abhibus: /bus_search/Hyderabad/3/Bangalore/7/20-05-2024/O -> ("hyderabad-bangalore", "2024-05-20").
+    # booking: ?ss=London&checkin=2024-05-20 -> ("london", "2024-05-20").
+    parts = urllib.parse.urlsplit(url)
+    query = dict(urllib.parse.parse_qsl(parts.query))
+    if mode == "hotel":
+        return slug(query.get("ss", parts.path)), find_date(query.get("checkin", "")) or UNKNOWN_DATE
+    segments = [urllib.parse.unquote(s) for s in parts.path.split("/") if s]
+    places = [s for s in segments if s.lower() not in ROUTE_MARKERS and not re.search(r"\d", s) and len(s) > 1]
+    return slug("-".join(places) or parts.path), find_date(parts.path) or find_date(parts.query) or UNKNOWN_DATE
+
+# ---- Writing ----
+def record_snapshot(mode, url, df, scraped_at=None, history_dir=HISTORY_DIR):
+    if df.empty:
+        return None
+    route, travel_date = route_info(mode, url)
+    # Microseconds, so snapshots of the same route taken within one second still sort in the order they were taken.
+    scraped_us = round((scraped_at or time.time()) * 1e6)
+    seconds, micros = divmod(scraped_us, 1000000)
+    snapshot_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(seconds))}.{micros:06d}-{uuid.uuid4().hex[:8]}"
+    frame = df.reindex(columns=MODE_COLUMNS[mode]).astype("string")
+    keys = [frame[column].fillna("") for column in ITEM_KEYS[mode]]
+    frame["item"] = keys[0].str.cat(keys[1:], sep="|")
+    frame["fare"] = fare_bounds(frame[FARE_COLUMNS[mode]])[0].astype("float64")
+    frame["snapshot_id"] = snapshot_id
+    frame["scraped_at"] = pd.Timestamp(scraped_us, unit="us", tz="UTC")
+    frame["url"] = url
+    frame["route"] = route
+    frame["travel_date"] = travel_date
+    table = pa.Table.from_pandas(frame, schema=history_schema(mode), preserve_index=False)
+    # Unique file names keep concurrent writers (Streamlit sessions, batch workers) append-only.
+    ds.write_dataset(table, os.path.join(history_dir, mode), format="parquet", partitioning=PARTITIONING,
+                     basename_template=f"snap-{snapshot_id}-{{i}}.parquet", existing_data_behavior="overwrite_or_ignore")
+    return snapshot_id
+
+# ---- Queries ----
+# Filters on route / travel_date prune whole directories; the rest are pushed down to Parquet row groups.
+def history_dataset(mode, history_dir=HISTORY_DIR):
+    path = os.path.join(history_dir, mode)
+    if not os.path.isdir(path):
+        return None
+    return ds.dataset(path, format="parquet", partitioning=PARTITIONING, schema=history_schema(mode))
+
+def _filter(route=None, travel_date=None, extra=None):
+    expr = None
+    for condition in [ds.field("route") == route if route else None,
+                      ds.field("travel_date") == travel_date if travel_date else None, extra]:
+        if condition is not None:
+            expr = condition if expr is None else expr & condition
+    return expr
+
+def list_routes(mode, history_dir=HISTORY_DIR):
+    # Read from the directory layout alone.
+    routes = []
+    for path in sorted(glob.glob(os.path.join(history_dir, mode, "route=*", "travel_date=*"))):
+        route_dir, date_dir = os.path.split(path)
+        routes.append((os.path.basename(route_dir)[len("route="):], date_dir[len("travel_date="):]))
+    return routes
+
+def snapshot_index(mode, route=None, travel_date=None, history_dir=HISTORY_DIR):
+    dataset = history_dataset(mode, history_dir)
+    if dataset is None:
+        return pd.DataFrame(columns=["snapshot_id", "scraped_at", "rows"])
+    table = dataset.to_table(columns=["snapshot_id", "scraped_at"], filter=_filter(route, travel_date))
+    grouped = table.group_by("snapshot_id").aggregate([("scraped_at", "max"), ("scraped_at", "count")])
+    index = grouped.to_pandas().rename(columns={"scraped_at_max": "scraped_at", "scraped_at_count": "rows"})
+    return index.sort_values(["scraped_at", "snapshot_id"]).reset_index(drop=True)
+
+def last_snapshots(mode, route=None, travel_date=None, n=5, history_dir=HISTORY_DIR):
+    index = snapshot_index(mode, route, travel_date, history_dir)
+    if index.empty:
+        return pd.DataFrame(columns=list(history_schema(mode).names))
+    wanted = index["snapshot_id"].tail(n).tolist()
+    table = history_dataset(mode, history_dir).to_table(
+        filter=_filter(route, travel_date, ds.field("snapshot_id").isin(wanted)))
+    return table.to_pandas().sort_values(["scraped_at", "item"]).reset_index(drop=True)
+
+def latest_rows(mode, travel_date=None, history_dir=HISTORY_DIR):
+    # The most recent snapshot of every route (for one travel date, or all of them), in the scraped column layout.
+    dataset = history_dataset(mode, history_dir)
+    if dataset is None:
+        return pd.DataFrame(columns=MODE_COLUMNS[mode])
+    index = dataset.to_table(columns=["route", "travel_date", "snapshot_id", "scraped_at"], filter=_filter(None, travel_date))
+    snapshots = index.group_by(["route", "travel_date", "snapshot_id"]).aggregate([("scraped_at", "max")]).to_pandas()
+    wanted = snapshots.sort_values(["scraped_at_max", "snapshot_id"]).groupby(["route", "travel_date"])["snapshot_id"].last().tolist()
+    table = dataset.to_table(columns=MODE_COLUMNS[mode], filter=_filter(None, travel_date, ds.field("snapshot_id").isin(wanted)))
+    return table.to_pandas()
+
+def fare_range(mode, route=None, travel_date=None, item=None, history_dir=HISTORY_DIR):
+    # Min / max / mean fare per snapshot, oldest first; pass `item` to follow a single bus, train or hotel.
+    dataset = history_dataset(mode, history_dir)
+    if dataset is None:
+        return pd.DataFrame(columns=["snapshot_id", "scraped_at", "fare_min", "fare_max", "fare_mean", "offers"])
+    extra = ds.field("fare").is_valid()
+    if item:
+        extra = extra & (ds.field("item") == item)
+    table = dataset.to_table(columns=["snapshot_id", "scraped_at", "fare"], filter=_filter(route, travel_date, extra))
+    grouped = table.group_by("snapshot_id").aggregate(
+        [("scraped_at", "max"), ("fare", "min"), ("fare", "max"), ("fare", "mean"), ("fare", "count")])
+    result = grouped.to_pandas().rename(columns={"scraped_at_max": "scraped_at", "fare_count": "offers"})
+    return result.sort_values(["scraped_at", "snapshot_id"]).reset_index(drop=True)[
+        ["snapshot_id", "scraped_at", "fare_min", "fare_max", "fare_mean", "offers"]]
+
+def snapshot_diff(mode, route=None, travel_date=None, older=None, newer=None, history_dir=HISTORY_DIR):
+    # Compares two snapshots (default: the last two) item by item: added, removed and fare changes.
+    if older is None or newer is None:
+        ids = snapshot_index(mode, route, travel_date, history_dir)["snapshot_id"].tolist()
+        if len(ids) < 2:
+            return pd.DataFrame(columns=["item", "change", "fare_before", "fare_after", "fare_delta"])
+        older, newer = ids[-2], ids[-1]
+    table = history_dataset(mode, history_dir).to_table(
+        columns=["snapshot_id", "item", "fare"],
+        filter=_filter(route, travel_date, ds.field("snapshot_id").isin([older, newer])))
+    frame = table.to_pandas()
+    before = frame[frame["snapshot_id"] == older].groupby("item")["fare"].min()
+    after = frame[frame["snapshot_id"] == newer].groupby("item")["fare"].min()
+    diff = pd.concat([before.rename("fare_before"), after.rename("fare_after")], axis=1).rename_axis("item").reset_index()
+    same_fare = (diff["fare_before"] == diff["fare_after"]) | (diff["fare_before"].isna() & diff["fare_after"].isna())
+    diff["change"] = "unchanged"
+    diff.loc[~same_fare, "change"] = "fare changed"
+    diff.loc[~diff["item"].isin(before.index), "change"] = "added"
+    diff.loc[~diff["item"].isin(after.index), "change"] = "removed"
+    diff["fare_delta"] = diff["fare_after"] - diff["fare_before"]
+    return diff[diff["change"] != "unchanged"][["item", "change", "fare_before", "fare_after", "fare_delta"]].reset_index(drop=True)
+
+# ---- Maintenance ----
+def compact(mode, route, travel_date, history_dir=HISTORY_DIR):
+    # Rewrites one partition's many per-scrape files as a single file. Files written meanwhile are left alone. The
+    # file is written under a leading dot, which dataset discovery skips, so readers never see it half-written.
+    partition = os.path.join(history_dir, mode, f"route={route}", f"travel_date={travel_date}")
+    files = sorted(glob.glob(os.path.join(partition, "*.parquet")))
+    if len(files) < 2:
+        return 0
+    table = ds.dataset(files, format="parquet", schema=file_schema(mode)).to_table()
+    table = table.sort_by([("scraped_at", "ascending"), ("snapshot_id", "ascending")])
+    name = f"compact-{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}.parquet"
+    tmp_path = os.path.join(partition, f".{name}.tmp")
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, os.path.join(partition, name))
+    for path in files:
+        os.remove(path)
+    return len(files)
@@ -0,0 +1,222 @@
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+
+# ---- Job Settings ----
+# Scrapes submitted from the Streamlit app run here instead of inside the script run, so a session stays
+# responsive and many sessions share a bounded number of workers (and, through the driver pool, browsers).
+JOB_WORKERS = int(os.environ.get("SCRAPER_JOB_WORKERS", "2"))
+JOB_HISTORY = int(os.environ.get("SCRAPER_JOB_HISTORY", "100"))
+ACTIVE_STATUSES = ("queued", "running")
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    def __init__(self, kind, label, target, args, kwargs):
+        self.id = uuid.uuid4().hex[:8]
+        self.kind = kind
+        self.label = label
+        self.status = "queued"
+        self.message = "Waiting for a free worker..."
+        self.done = 0
+        self.total = 0
+        self.rows = []
+        self.result = None
+        self.extra = {}
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._target = target
+        self._args = args
+        self._kwargs = kwargs
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def set_progress(self, message, done=None, total=None):
+        with self._lock:
+            self.message = message
+            if done is not None:
+                self.done = done
+            if total is not None:
+                self.total = total
+
+    def add_rows(self, rows):
+        with self._lock:
+            self.rows.extend(rows)
+
+    def partial_rows(self):
+        with self._lock:
+            return list(self.rows)
+
+    def elapsed(self):
+        start = self.started_at or self.created_at
+        return (self.finished_at or time.time()) - start
+
+    def _finish(self, status, result=None, error=None):
+        with self._lock:
+            self.status = status
+            if status == "cancelled":
+                self.message = "Cancelled."
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+
+class JobQueue:
+    def __init__(self, workers=JOB_WORKERS, history=JOB_HISTORY):
+        self.workers = max(1, workers)
+        self.history = history
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f"scrape-job-{i}", daemon=True).start()
+
+    def submit(self, kind, label, target, *args, **kwargs):
+        # `target(job, *args, **kwargs)` runs on a worker thread and returns the finished DataFrame.
+        job = Job(kind, label, target, args, kwargs)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, ids=None):
+        with self._lock:
+            if ids is None:
+                return list(self._jobs.values())
+            return [self._jobs[i] for i in ids if i in self._jobs]
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.status not in ACTIVE_STATUSES:
+            return False
+        job._cancel.set()
+        if job.status == "queued":
+            job._finish("cancelled")
+        else:
+            job.set_progress("Cancelling after the current step...")
+        return True
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {"queued": statuses.count("queued"), "running": statuses.count("running"), "workers": self.workers}
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status not in ACTIVE_STATUSES]
+        for job_id in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job.cancelled:
+                continue
+            job.status = "running"
+            job.started_at = time.time()
+            job.set_progress("Started.")
+            try:
+                result = job._target(job, *job._args, **job._kwargs)
+                if job.cancelled:
+                    job._finish("cancelled", result)
+                else:
+                    job._finish("done", result)
+            except JobCancelled:
+                job._finish("cancelled")
+            except Exception as e:
+                print(f"Job {job.id} ({job.label}) failed:\n{traceback.format_exc()}")
+                job._finish("failed", error=f"{type(e).__name__}: {e}")
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue():
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
+
+# ---- Job Targets ----
+def scrape_job(job, mode, url, route_type, capture, force_refresh):
+    import pandas as pd
+    from scraper.batch import MODES, scrape_url
+    job.set_progress("Waiting for a browser and loading the page...", 0, 1)
+    result = scrape_url(mode, url, route_type, capture, force_refresh)
+    if result["status"] == "failed":
+        raise RuntimeError(result["error"])
+    job.add_rows(result["rows"])
+    via = f" via {result['tier']}" if result.get("tier") in ("http", "browser") else ""
+    job.set_progress(f"{result['status']}{via}: {len(result['rows'])} rows.", 1, 1)
+    return pd.DataFrame(result["rows"], columns=MODES[mode][2])
+
+def batch_job(job, mode, urls, workers, per_host_limit, per_host_delay, capture, force_refresh):
+    from scraper.batch import merge_batch_results, run_batch
+    job.set_progress(f"Scraping {len(urls)} URLs...", 0, len(urls))
+    def on_result(result, done, total):
+        job.add_rows(result["rows"])
+        job.set_progress(f"{result['status']} in {result['seconds']}s: {result['url']}", done, total)
+    results = run_batch(mode, urls, workers=workers, per_host_limit=per_host_limit, per_host_delay=per_host_delay,
+                        capture=capture, force_refresh=force_refresh, on_result=on_result,
+                        should_stop=lambda: job.cancelled)
+    df, status = merge_batch_results(mode, results)
+    job.extra["status"] = status
+    return df
+
+def hotel_job(job, url, variant, streaming, extraction, target_count, max_price, sharding=None, shard_workers=None):
+    from scraper import booking
+    from scraper.batch import save_result
+    from scraper.metrics import trace
+    with trace("hotel-job", mode="hotel", url=url, route_type=variant):
+        if sharding:
+            def on_progress(done, found):
+                job.set_progress(f"{done} result pages loaded, {found} hotels so far.")
+                job.check_cancelled()
+            job.set_progress("Reading the first result page...")
+            hotel_rows = booking.collect_hotel_cards_sharded(url, sharding, shard_workers or booking.HOTEL_SHARD_WORKERS,
+                                                             on_progress=on_progress)
+        else:
+            hotel_rows = _hotel_rows_single_tab(job, booking, url, streaming, extraction, target_count, max_price)
+        job.check_cancelled()
+        job.set_progress(f"Geocoding {len(hotel_rows)} hotels...")
+        df = booking.geocode_hotels(hotel_rows)
+        job.extra["log"] = list(booking.error_log())
+        save_result("hotel", url, variant, df)
+        job.set_progress(f"Found {len(df)} hotels.")
+        return df
+
+def _hotel_rows_single_tab(job, booking, url, streaming, extraction, target_count, max_price):
+    from scraper.driver_pool import get_driver_pool
+    job.set_progress("Waiting for a browser...")
+    with get_driver_pool().borrow() as driver:
+        job.check_cancelled()
+        if streaming:
+            batches = booking.stream_rows_to_csv(booking.stream_hotel_rows(
+                driver, url, target_count=target_count or None, max_price=max_price or None))
+            for rows in batches:
+                job.add_rows(rows)
+                job.set_progress(f"Streaming: {len(job.rows)} hotels so far.")
+                if job.cancelled:
+                    batches.close()
+                    break
+            return job.partial_rows()
+        job.set_progress("Loading and extracting hotel cards...")
+        return booking.collect_hotel_cards(driver, url, extraction)
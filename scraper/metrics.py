@@ -0,0 +1,242 @@
+import collections
+import contextlib
+import contextvars
+import cProfile
+import http.server
+import json
+import os
+import threading
+import time
+import uuid
+
+# ---- Metrics Settings ----
+# Every span feeds process-wide aggregates (exported in Prometheus text format); spans inside a trace() are also kept
+# per scrape and written out as one JSON file.
+TRACES_ENABLED = os.environ.get("SCRAPER_TRACES", "1") == "1"
+TRACE_DIR = os.environ.get("SCRAPER_TRACE_DIR", os.path.join(".cache", "traces"))
+TRACE_KEEP = int(os.environ.get("SCRAPER_TRACE_KEEP", "500"))
+METRICS_FILE = os.environ.get("SCRAPER_METRICS_FILE", os.path.join(".cache", "metrics.prom"))
+METRICS_PORT = int(os.environ.get("SCRAPER_METRICS_PORT", "0"))
+# Writes a cProfile .prof file next to each trace; view with `python -m pstats` or snakeviz.
+PROFILE_ENABLED = os.environ.get("SCRAPER_PROFILE", "0") == "1"
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Span attributes that become Prometheus labels; everything else only goes into the trace.
+LABEL_KEYS = ("mode", "extractor", "kind", "tier")
+RECENT_TRACES = 20
+
+def _labels(attrs):
+    return tuple((key, str(attrs[key])) for key in LABEL_KEYS if attrs.get(key) is not None)
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = collections.defaultdict(float)
+        self.recent = collections.deque(maxlen=RECENT_TRACES)
+
+    def observe(self, stage, seconds, labels=()):
+        with self._lock:
+            entry = self._stages.get((stage, labels))
+            if entry is None:
+                entry = self._stages[(stage, labels)] = {"buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0, "max": 0.0}
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    entry["buckets"][i] += 1
+            entry["count"] += 1
+            entry["sum"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+
+    def inc(self, name, value=1, labels=()):
+        with self._lock:
+            self._counters[(name, labels)] += value
+
+    def absorb(self, trace_dict):
+        # Folds in a trace recorded by another process, e.g. a batch worker.
+        for record in trace_dict.get("spans", []):
+            self.observe(record["stage"], record["seconds"], _labels(record))
+        for name, labels, value in trace_dict.get("counters", []):
+            self.inc(name, value, tuple(sorted(labels.items())))
+        self.recent.append(trace_dict)
+
+    def stage_summary(self):
+        with self._lock:
+            items = sorted(self._stages.items(), key=lambda kv: -kv[1]["sum"])
+            return [{"stage": stage, **dict(labels), "count": e["count"], "total_s": round(e["sum"], 3),
+                     "mean_s": round(e["sum"] / e["count"], 3), "max_s": round(e["max"], 3)}
+                    for (stage, labels), e in items]
+
+    def counters(self):
+        with self._lock:
+            return [{"counter": name, **dict(labels), "value": value} for (name, labels), value in sorted(self._counters.items())]
+
+    def prometheus_text(self):
+        def fmt(labels):
+            parts = [f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"'
+                     for k, v in labels]
+            return "{" + ",".join(parts) + "}" if parts else ""
+        lines = ["# HELP scraper_stage_seconds Time spent in each scrape stage.", "# TYPE scraper_stage_seconds histogram"]
+        with self._lock:
+            for (stage, labels), e in sorted(self._stages.items()):
+                base = (("stage", stage),) + labels
+                for bound, count in zip(BUCKETS, e["buckets"]):
+                    lines.append(f"scraper_stage_seconds_bucket{fmt(base + (('le', bound),))} {count}")
+                lines.append(f"scraper_stage_seconds_bucket{fmt(base + (('le', '+Inf'),))} {e['count']}")
+                lines.append(f"scraper_stage_seconds_sum{fmt(base)} {e['sum']:.6f}")
+                lines.append(f"scraper_stage_seconds_count{fmt(base)} {e['count']}")
+            names = sorted({name for name, _ in self._counters})
+            for name in names:
+                lines.append(f"# TYPE scraper_{name}_total counter")
+                for (counter, labels), value in sorted(self._counters.items()):
+                    if counter == name:
+                        lines.append(f"scraper_{name}_total{fmt(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+_exporting = True
+
+def disable_export():
+    # Batch worker processes return their traces to the parent, which does the exporting.
+    global _exporting
+    _exporting = False
+
+# ---- Spans and Traces ----
+class Trace:
+    def __init__(self, name, attrs):
+        self.id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.seconds = None
+        self.spans = []
+        self.counters = collections.defaultdict(float)
+        self._t0 = time.perf_counter()
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, **self.attrs, "started_at": self.started_at, "seconds": self.seconds,
+                "spans": self.spans, "counters": [[name, dict(labels), value] for (name, labels), value in self.counters.items()]}
+
+_trace = contextvars.ContextVar("scraper_trace", default=None)
+_parent = contextvars.ContextVar("scraper_span", default=None)
+
+def current_trace():
+    return _trace.get()
+
+@contextlib.contextmanager
+def span(stage, **attrs):
+    # Yields the span's record; callers may add fields to it (e.g. bytes) before the block ends.
+    record = {"stage": stage, **attrs}
+    trace_ = _trace.get()
+    token = _parent.set(stage)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        _parent.reset(token)
+        record["seconds"] = round(seconds, 6)
+        record["parent"] = _parent.get()
+        registry.observe(stage, seconds, _labels(record))
+        if trace_ is not None:
+            record["offset"] = round(start - trace_._t0, 6)
+            trace_.spans.append(record)
+
+def count(name, value=1, **labels):
+    labels = tuple(sorted((k, str(v)) for k, v in labels.items()))
+    registry.inc(name, value, labels)
+    trace_ = _trace.get()
+    if trace_ is not None:
+        trace_.counters[(name, labels)] += value
+
+@contextlib.contextmanager
+def trace(name, profile=PROFILE_ENABLED, **attrs):
+    current = Trace(name, attrs)
+    token = _trace.set(current)
+    profiler = cProfile.Profile() if profile else None
+    if profiler is not None:
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread.
+            profiler = None
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        _trace.reset(token)
+        current.seconds = round(time.perf_counter() - current._t0, 6)
+        registry.recent.append(current.to_dict())
+        save_trace(current, profiler)
+        if _exporting:
+            write_metrics()
+
+# ---- Export ----
+def save_trace(current, profiler=None, directory=TRACE_DIR):
+    if not TRACES_ENABLED:
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{current.id}-{current.name}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(current.to_dict(), f, indent=1, default=str)
+        if profiler is not None:
+            profiler.dump_stats(os.path.join(directory, f"{current.id}-{current.name}.prof"))
+        files = sorted(os.listdir(directory))
+        if len(files) > TRACE_KEEP * 1.1:
+            for old in files[:len(files) - TRACE_KEEP]:
+                os.remove(os.path.join(directory, old))
+        return path
+    except OSError as e:
+        print(f"Could not save trace {current.id}: {e}")
+        return None
+
+def write_metrics(path=METRICS_FILE):
+    # Written atomically, so a node_exporter textfile collector never reads half a file.
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(registry.prometheus_text())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write metrics to {path}: {e}")
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_server = None
+_server_lock = threading.Lock()
+
+def serve_metrics(port=METRICS_PORT):
+    # Starts a /metrics endpoint once per process; port 0 (the default setting) leaves it off.
+    global _server
+    with _server_lock:
+        if _server is None and port:
+            try:
+                _server = http.server.ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            except OSError as e:
+                print(f"Could not serve metrics on port {port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+            print(f"Serving Prometheus metrics on http://0.0.0.0:{port}/metrics")
+        return _server
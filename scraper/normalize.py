@@ -0,0 +1,132 @@
+import re
+import numpy as np
+import pandas as pd
+from scraper.standardize import standardize_bus_type, standardize_Gov_bus_name, standardize_train_name, STANDARD_BUS_TYPES
+
+# ---- Typed Schemas ----
+# Scraped frames hold display text only; these add numeric fares, minutes, times of day and categoricals so large
+# batches filter and sort without re-parsing strings.
+TYPED_BUS_COLUMNS = ["Bus Name", "Bus Type", "Departure", "Arrival", "Starting Place", "Duration (min)", "Ending Place",
+                     "Fare Min", "Fare Max", "Route Type"]
+TYPED_TRAIN_COLUMNS = ["Train Number", "Train Name", "Train Type", "Departure", "Arrival", "Starting Station",
+                       "Duration (min)", "Destination Station", "Fare Min", "Fare Max", "Frequency", "Route Type"]
+TYPED_HOTEL_COLUMNS = ["Hotel Name", "Address", "Rating", "Price", "Type", "Google Maps Link"]
+TRAIN_FARE_COLUMNS = ["Train Number", "Train Name", "Class", "Fare Min", "Fare Max", "Route Type"]
+
+NUMBER = r"\d[\d,]*(?:\.\d+)?"
+FARE_RANGE = rf"({NUMBER})\s*-\s*({NUMBER})"
+CLASS_FARE = rf"(?P<cls>[A-Za-z0-9]+)\s+(?P<low>{NUMBER})\s*-\s*(?P<high>{NUMBER})"
+
+def _text(values):
+    # "N/A" and empty strings are what the parsers write for a missing field.
+    values = values.astype("string")
+    return values.mask(values.isin(["N/A", ""]))
+
+def _numbers(values):
+    return pd.to_numeric(values.str.replace(",", "", regex=False), errors="coerce")
+
+# ---- Category Lookups ----
+def categorize(values, lookup=None):
+    # `lookup` runs once per distinct value rather than once per row; the result is a categorical column.
+    codes, uniques = pd.factorize(_text(values))
+    if len(uniques) == 0:
+        # Every value is missing (e.g. a column of "N/A"): nothing to look up or index into.
+        return pd.Categorical.from_codes(codes, categories=pd.Index([], dtype="object"))
+    if lookup is not None:
+        uniques = pd.Index([lookup(value) for value in uniques])
+    label_codes, categories = pd.factorize(uniques)
+    return pd.Categorical.from_codes(np.where(codes >= 0, label_codes[np.maximum(codes, 0)], -1), categories=categories)
+
+# ---- Field Parsers ----
+def clock_times(values):
+    # "21:30", "21:30 SC" -> time of day as a Timedelta since midnight.
+    parts = _text(values).str.extract(r"(\d{1,2}):(\d{2})")
+    minutes = pd.to_numeric(parts[0]) * 60 + pd.to_numeric(parts[1])
+    return pd.to_timedelta(minutes, unit="min")
+
+def duration_minutes(values):
+    # "9h 15m", "09h 30m", "9 hrs 15 mins", "8:30".
+    text = _text(values)
+    hours = pd.to_numeric(text.str.extract(r"(\d+)\s*h", flags=re.IGNORECASE)[0])
+    minutes = pd.to_numeric(text.str.extract(r"(\d+)\s*m", flags=re.IGNORECASE)[0])
+    clock = text.str.extract(r"^\s*(\d+):(\d{2})\s*$")
+    total = hours.fillna(0) * 60 + minutes.fillna(0)
+    total = total.where(hours.notna() | minutes.notna(), pd.to_numeric(clock[0]) * 60 + pd.to_numeric(clock[1]))
+    return total.astype("Int32")
+
+def fare_bounds(values):
+    # Lowest and highest fare in "1000 - 1300", "SL 450 - 600; 3A 1200 - 1600" or a plain "1,234".
+    text = _text(values)
+    ranges = text.str.extractall(FARE_RANGE)
+    low = _numbers(ranges[0]).groupby(level=0).min().reindex(text.index)
+    high = _numbers(ranges[1]).groupby(level=0).max().reindex(text.index)
+    plain = _numbers(text.str.extract(f"({NUMBER})")[0])
+    return low.fillna(plain).astype("float32"), high.fillna(plain).astype("float32")
+
+# ---- Normalizers ----
+def unmatched_bus_types(values):
+    types = pd.Series(_text(values).dropna().unique())
+    return sorted(t for t in types if standardize_bus_type(t) not in STANDARD_BUS_TYPES)
+
+def normalize_buses(df):
+    typed = pd.DataFrame(index=df.index)
+    # The parsers already standardize names and types; running the memoized lookups again keeps raw input
+    # (e.g. history snapshots or captured API rows) on the same categories.
+    typed["Bus Name"] = categorize(df["Bus Name"], standardize_Gov_bus_name)
+    typed["Bus Type"] = categorize(df["Bus Type"], standardize_bus_type)
+    typed["Departure"] = clock_times(df["Departure"])
+    typed["Arrival"] = clock_times(df["Arrival"])
+    typed["Starting Place"] = categorize(df["Starting Place"])
+    typed["Duration (min)"] = duration_minutes(df["Duration"])
+    typed["Ending Place"] = categorize(df["Ending Place"])
+    typed["Fare Min"], typed["Fare Max"] = fare_bounds(df["Price"])
+    typed["Route Type"] = categorize(df["Route Type"])
+    unmatched = unmatched_bus_types(df["Bus Type"])
+    if unmatched:
+        print(f"{len(unmatched)} bus type(s) did not match a standard category: {', '.join(unmatched[:10])}")
+    return typed[TYPED_BUS_COLUMNS]
+
+def normalize_trains(df):
+    typed = pd.DataFrame(index=df.index)
+    names = _text(df["Train Name"]).str.extract(r"^\s*(\d{4,5})?\s*(.*)$")
+    typed["Train Number"] = names[0].astype("string")
+    typed["Train Name"] = names[1].str.strip().mask(names[1].str.strip() == "").astype("string")
+    typed["Train Type"] = categorize(df["Train Name"], standardize_train_name)
+    typed["Departure"] = clock_times(df["Departure"])
+    typed["Arrival"] = clock_times(df["Arrival"])
+    typed["Starting Station"] = categorize(df["Starting Station"])
+    typed["Duration (min)"] = duration_minutes(df["Duration"])
+    typed["Destination Station"] = categorize(df["Destination Station"])
+    typed["Fare Min"], typed["Fare Max"] = fare_bounds(df["Prices"])
+    typed["Frequency"] = categorize(df["Frequency"])
+    typed["Route Type"] = categorize(df["Route Type"])
+    return typed[TYPED_TRAIN_COLUMNS]
+
+def train_fares_long(df):
+    # One row per train and class: "SL 450 - 600; 3A 1200 - 1600" becomes two rows.
+    fares = _text(df["Prices"]).str.extractall(CLASS_FARE).reset_index(level=1, drop=True)
+    names = _text(df["Train Name"]).str.extract(r"^\s*(\d{4,5})?\s*(.*)$")
+    long = pd.DataFrame({
+        "Train Number": names[0].reindex(fares.index).astype("string"),
+        "Train Name": names[1].str.strip().reindex(fares.index).astype("string"),
+        "Class": categorize(fares["cls"]),
+        "Fare Min": _numbers(fares["low"]).astype("float32"),
+        "Fare Max": _numbers(fares["high"]).astype("float32"),
+        "Route Type": categorize(df["Route Type"].reindex(fares.index)),
+    })
+    return long[TRAIN_FARE_COLUMNS].reset_index(drop=True)
+
+def normalize_hotels(df):
+    typed = pd.DataFrame(index=df.index)
+    typed["Hotel Name"] = _text(df["Hotel Name"])
+    typed["Address"] = categorize(df["Address"])
+    typed["Rating"] = _numbers(_text(df["Rating"])).astype("float32")
+    typed["Price"] = fare_bounds(df["Price"])[0]
+    typed["Type"] = categorize(df["Type"])
+    typed["Google Maps Link"] = _text(df["Google Maps Link"])
+    return typed[TYPED_HOTEL_COLUMNS]
+
+NORMALIZERS = {"bus": normalize_buses, "train": normalize_trains, "hotel": normalize_hotels}
+
+def normalize(mode, df):
+    return NORMALIZERS[mode](df)
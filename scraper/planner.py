@@ -0,0 +1,251 @@
+import bisect
+import heapq
+import math
+import re
+import pandas as pd
+from scraper.normalize import normalize
+
+# ---- Planner Settings ----
+# Scraped legs carry a time of day but no date, so the timetable is treated as repeating daily and unrolled over
+# `days` days; times below are minutes since midnight of the query day.
+PLAN_DAYS = 3
+MIN_CONNECTION = 15
+MAX_DURATION = 48 * 60
+OBJECTIVES = ["fastest", "cheapest"]
+LEG_COLUMNS = ["Mode", "Service", "Type", "From", "To", "Departure", "Arrival", "Duration", "Fare"]
+ITINERARY_COLUMNS = ["Mode", "Service", "Type", "From", "To", "Departure", "Arrival", "Duration (min)", "Wait (min)", "Fare"]
+
+# Train legs are scraped as station codes and bus legs as place names; these put both on the same stop so a
+# bus-to-train change can be found. Extra or overriding aliases can be passed to JourneyPlanner.
+STATION_CITIES = {
+    "SC": "Hyderabad", "HYB": "Hyderabad", "KCG": "Hyderabad", "LPI": "Hyderabad",
+    "SBC": "Bangalore", "YPR": "Bangalore", "BNC": "Bangalore", "SMVB": "Bangalore",
+    "MAS": "Chennai", "MS": "Chennai", "MMCC": "Chennai",
+    "BZA": "Vijayawada", "VSKP": "Visakhapatnam", "TPTY": "Tirupati", "GNT": "Guntur",
+    "CSMT": "Mumbai", "LTT": "Mumbai", "BCT": "Mumbai", "PUNE": "Pune", "NDLS": "Delhi", "NZM": "Delhi",
+    "HWH": "Kolkata", "SDAH": "Kolkata", "ERS": "Kochi", "CBE": "Coimbatore", "MYS": "Mysore",
+}
+
+def resolve_stop(name, aliases):
+    # "Secunderabad (SC)" and "SC" both resolve through the code in brackets; anything else is its own stop.
+    text = " ".join(str(name).split())
+    code = re.search(r"\(([A-Z]{2,5})\)$", text)
+    for candidate in ([code.group(1)] if code else []) + [text, text.upper()]:
+        if candidate in aliases:
+            return aliases[candidate]
+    return text
+
+def clock_text(minutes):
+    day, minute = divmod(int(minutes), 1440)
+    return f"{minute // 60:02d}:{minute % 60:02d}" + (f" (+{day})" if day else "")
+
+def parse_clock(value):
+    # "07:30" or minutes since midnight.
+    if isinstance(value, str):
+        hours, _, minutes = value.strip().partition(":")
+        return int(hours) * 60 + int(minutes or 0)
+    return int(value)
+
+# ---- Leg Tables ----
+def bus_legs(df):
+    typed = normalize("bus", df)
+    return pd.DataFrame({"Mode": "bus", "Service": typed["Bus Name"].astype("string"), "Type": typed["Bus Type"].astype("string"),
+                         "From": df["Starting Place"], "To": df["Ending Place"], "Departure": typed["Departure"],
+                         "Arrival": typed["Arrival"], "Duration": typed["Duration (min)"], "Fare": typed["Fare Min"]})
+
+def train_legs(df):
+    typed = normalize("train", df)
+    service = (typed["Train Number"].fillna("") + " " + typed["Train Name"].fillna("")).str.strip()
+    return pd.DataFrame({"Mode": "train", "Service": service, "Type": df["Train Type"].astype("string"),
+                         "From": df["Starting Station"], "To": df["Destination Station"], "Departure": typed["Departure"],
+                         "Arrival": typed["Arrival"], "Duration": typed["Duration (min)"], "Fare": typed["Fare Min"]})
+
+# ---- Journey Planner ----
+class JourneyPlanner:
+    # Connections are kept as parallel lists sorted by departure, which is what the connection scan walks; the
+    # cheapest search uses the same connections regrouped per departure stop (the time-expanded graph's nodes).
+    def __init__(self, legs, days=PLAN_DAYS, aliases=None):
+        self.aliases = {**STATION_CITIES, **(aliases or {})}
+        legs = legs[LEG_COLUMNS].dropna(subset=["From", "To", "Departure"])
+        legs = legs[(legs["From"] != "N/A") & (legs["To"] != "N/A")].reset_index(drop=True)
+        dep = (pd.to_timedelta(legs["Departure"]).dt.total_seconds() // 60).astype("int64")
+        arr_clock = pd.to_timedelta(legs["Arrival"]).dt.total_seconds() // 60
+        # Duration wins over the arrival clock, which cannot say how many midnights the leg crosses.
+        duration = pd.to_numeric(legs["Duration"], errors="coerce").astype("Float64")
+        duration = duration.where(duration > 0, (arr_clock - dep) % 1440).fillna(0).astype("int64")
+        self.legs = legs
+        self.stop_names = []
+        self.stop_ids = {}
+        def stop_id(name):
+            stop = resolve_stop(name, self.aliases)
+            if stop.lower() not in self.stop_ids:
+                self.stop_ids[stop.lower()] = len(self.stop_names)
+                self.stop_names.append(stop)
+            return self.stop_ids[stop.lower()]
+        from_ids = [stop_id(name) for name in legs["From"]]
+        to_ids = [stop_id(name) for name in legs["To"]]
+        fares = [None if pd.isna(fare) else float(fare) for fare in legs["Fare"]]
+        rows = []
+        for day in range(days):
+            offset = day * 1440
+            for i, (u, v, d, length) in enumerate(zip(from_ids, to_ids, dep.tolist(), duration.tolist())):
+                if u != v:
+                    rows.append((d + offset, d + offset + length, u, v, i))
+        rows.sort()
+        self.dep = [r[0] for r in rows]
+        self.arr = [r[1] for r in rows]
+        self.src = [r[2] for r in rows]
+        self.dst = [r[3] for r in rows]
+        self.leg = [r[4] for r in rows]
+        self.fare = [fares[r[4]] for r in rows]
+        # Per-stop departure events, sorted by time: event e is connection by_stop[e].
+        order = sorted(range(len(rows)), key=lambda c: (self.src[c], self.dep[c]))
+        self.by_stop = order
+        self.event_dep = [self.dep[c] for c in order]
+        self.stop_start = [0] * (len(self.stop_names) + 1)
+        for c in order:
+            self.stop_start[self.src[c] + 1] += 1
+        for s in range(len(self.stop_names)):
+            self.stop_start[s + 1] += self.stop_start[s]
+        self.reverse_edges = [set() for _ in self.stop_names]
+        for u, v in zip(from_ids, to_ids):
+            self.reverse_edges[v].add(u)
+
+    @classmethod
+    def from_frames(cls, bus_df=None, train_df=None, days=PLAN_DAYS, aliases=None):
+        frames = []
+        if bus_df is not None and not bus_df.empty:
+            frames.append(bus_legs(bus_df))
+        if train_df is not None and not train_df.empty:
+            frames.append(train_legs(train_df))
+        legs = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=LEG_COLUMNS)
+        return cls(legs, days, aliases)
+
+    def stop(self, name):
+        stop = self.stop_ids.get(resolve_stop(name, self.aliases).lower())
+        if stop is None:
+            raise KeyError(f"No scraped leg starts or ends at {name!r}.")
+        return stop
+
+    def stops(self):
+        return sorted(self.stop_names)
+
+    def _reaches(self, target):
+        seen = {target}
+        frontier = [target]
+        while frontier:
+            stop = frontier.pop()
+            for prev in self.reverse_edges[stop]:
+                if prev not in seen:
+                    seen.add(prev)
+                    frontier.append(prev)
+        return seen
+
+    def fastest(self, origin, destination, depart_after=0, min_connection=MIN_CONNECTION, max_duration=MAX_DURATION):
+        # Connection scan: one pass over connections in departure order from `depart_after`, stopping once departures
+        # are later than the best arrival found so far.
+        source, target = self.stop(origin), self.stop(destination)
+        start_time = parse_clock(depart_after)
+        horizon = start_time + max_duration
+        arrival = [math.inf] * len(self.stop_names)
+        ready = [math.inf] * len(self.stop_names)
+        via = [None] * len(self.stop_names)
+        ready[source] = start_time
+        arrival[source] = start_time
+        dep, arr, src, dst = self.dep, self.arr, self.src, self.dst
+        for c in range(bisect.bisect_left(dep, start_time), len(dep)):
+            departs = dep[c]
+            if departs >= arrival[target] or departs > horizon:
+                break
+            if departs < ready[src[c]]:
+                continue
+            v = dst[c]
+            if arr[c] < arrival[v] and arr[c] <= horizon:
+                arrival[v] = arr[c]
+                ready[v] = arr[c] + min_connection
+                via[v] = c
+        if via[target] is None:
+            return None
+        connections = []
+        stop = target
+        while stop != source:
+            c = via[stop]
+            connections.append(c)
+            stop = src[c]
+        return self._itinerary(connections[::-1], start_time)
+
+    def cheapest(self, origin, destination, depart_after=0, min_connection=MIN_CONNECTION, max_duration=MAX_DURATION):
+        # Dijkstra over the time-expanded graph: a node is "ready to board departure event e"; edges wait for the next
+        # departure at the same stop (free) or ride event e's connection (its fare) to the first departure at the
+        # next stop that leaves the connection time. Legs without a fare are skipped. Ties go to the earlier arrival.
+        source, target = self.stop(origin), self.stop(destination)
+        start_time = parse_clock(depart_after)
+        horizon = start_time + max_duration
+        useful = self._reaches(target)
+        event_dep, by_stop, stop_start = self.event_dep, self.by_stop, self.stop_start
+        dep, arr, src, dst, fares = self.dep, self.arr, self.src, self.dst, self.fare
+        first = bisect.bisect_left(event_dep, start_time, stop_start[source], stop_start[source + 1])
+        settled = [False] * len(by_stop)
+        # parent[c] is the connection ridden before c (-1 for the first leg). Waiting is free, so settling an event
+        # settles the rest of its stop's departures at the same cost in one inline walk instead of through the heap.
+        parent = {}
+        best_total = math.inf
+        heap = [(0.0, start_time, first, -1)] if first < stop_start[source + 1] else []
+        while heap:
+            cost, time_at, event, came_from = heapq.heappop(heap)
+            if event < 0:
+                connections = []
+                c = came_from
+                while c != -1:
+                    connections.append(c)
+                    c = parent[c]
+                return self._itinerary(connections[::-1], start_time)
+            last = stop_start[src[by_stop[event]] + 1]
+            while event < last and not settled[event]:
+                settled[event] = True
+                c = by_stop[event]
+                event += 1
+                if dep[c] > horizon:
+                    break
+                fare, v = fares[c], dst[c]
+                if fare is None or v not in useful or arr[c] > horizon or cost + fare > best_total:
+                    continue
+                parent[c] = came_from
+                if v == target:
+                    best_total = cost + fare
+                    heapq.heappush(heap, (best_total, arr[c], -1, c))
+                    continue
+                nxt = bisect.bisect_left(event_dep, arr[c] + min_connection, stop_start[v], stop_start[v + 1])
+                if nxt < stop_start[v + 1] and not settled[nxt]:
+                    heapq.heappush(heap, (cost + fare, arr[c], nxt, c))
+        return None
+
+    def plan(self, origin, destination, depart_after=0, objective="fastest", min_connection=MIN_CONNECTION,
+             max_duration=MAX_DURATION):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective {objective!r}; expected one of {', '.join(OBJECTIVES)}.")
+        search = self.fastest if objective == "fastest" else self.cheapest
+        return search(origin, destination, depart_after, min_connection, max_duration)
+
+    def _itinerary(self, connections, start_time):
+        legs = []
+        previous_arrival = start_time
+        for c in connections:
+            leg = self.legs.iloc[self.leg[c]]
+            legs.append({
+                "Mode": leg["Mode"], "Service": leg["Service"], "Type": leg["Type"],
+                "From": leg["From"], "To": leg["To"],
+                "Departure": clock_text(self.dep[c]), "Arrival": clock_text(self.arr[c]),
+                "Duration (min)": self.arr[c] - self.dep[c], "Wait (min)": self.dep[c] - previous_arrival,
+                "Fare": self.fare[c],
+            })
+            previous_arrival = self.arr[c]
+        fares = [leg["Fare"] for leg in legs]
+        return {
+            "legs": pd.DataFrame(legs, columns=ITINERARY_COLUMNS),
+            "departure": clock_text(self.dep[connections[0]]),
+            "arrival": clock_text(self.arr[connections[-1]]),
+            "duration_min": self.arr[connections[-1]] - self.dep[connections[0]],
+            "fare": None if any(f is None for f in fares) else sum(fares),
+            "transfers": len(legs) - 1,
+        }
@@ -0,0 +1,124 @@
+import threading
+import weakref
+from scraper.metrics import span
+
+# ---- In-Page Probe ----
+# Registered with Page.addScriptToEvaluateOnNewDocument so it runs before the site's own scripts: it counts DOM
+# insertions/removals and in-flight fetch/XHR requests, and timestamps the last activity of each.
+PROBE_JS = """
+(function () {
+    if (window.__readiness) return;
+    const state = {lastMutation: performance.now(), lastNetwork: performance.now(), mutations: 0, pending: 0};
+    window.__readiness = state;
+    new MutationObserver(function (records) {
+        state.mutations += records.length;
+        state.lastMutation = performance.now();
+    }).observe(document, {childList: true, subtree: true});
+    const started = function () { state.pending++; state.lastNetwork = performance.now(); };
+    const done = function () { state.pending = Math.max(0, state.pending - 1); state.lastNetwork = performance.now(); };
+    if (window.fetch) {
+        const originalFetch = window.fetch;
+        window.fetch = function () {
+            started();
+            return originalFetch.apply(this, arguments).finally(done);
+        };
+    }
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        started();
+        this.addEventListener('loadend', done);
+        return originalSend.apply(this, arguments);
+    };
+})();
+"""
+
+# Resolves inside the browser, so a wait costs one WebDriver round trip however long it takes.
+# Ready when `selector` matches at least `minCount` elements and the page has been quiet for `settleMs`;
+# gives up early once nothing has changed for `idleMs` even though the target was not reached. Requests with no
+# network activity for 5s (long polls) stop counting as pending; without the probe, quiet time is time waited.
+WAIT_JS = """
+const selector = arguments[0], minCount = arguments[1], settleMs = arguments[2], idleMs = arguments[3],
+      timeoutMs = arguments[4], callback = arguments[arguments.length - 1];
+const started = performance.now();
+function check() {
+    const state = window.__readiness;
+    const now = performance.now();
+    const count = selector ? document.querySelectorAll(selector).length : 0;
+    let quietFor = now - started;
+    if (state) {
+        const busy = state.pending > 0 && now - state.lastNetwork < 5000;
+        quietFor = busy ? 0 : now - Math.max(state.lastMutation, state.lastNetwork);
+    }
+    const reached = !selector || count >= minCount;
+    if (reached && quietFor >= settleMs) return callback({ready: true, count: count, waited: now - started});
+    if (!reached && idleMs !== null && quietFor >= idleMs) return callback({ready: false, count: count, waited: now - started});
+    if (now - started >= timeoutMs) return callback({ready: reached, count: count, waited: now - started, timedOut: true});
+    setTimeout(check, 50);
+}
+check();
+"""
+
+_probed_drivers = weakref.WeakSet()
+_probed_lock = threading.Lock()
+
+def install_probe(driver):
+    with _probed_lock:
+        if driver not in _probed_drivers:
+            try:
+                driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": PROBE_JS})
+            except Exception as e:
+                print(f"Could not register readiness probe for new documents: {e}")
+            _probed_drivers.add(driver)
+    try:
+        # Also cover the document that is already loaded, e.g. when the probe is installed after driver.get().
+        driver.execute_script(PROBE_JS)
+    except Exception:
+        pass
+
+# ---- Adaptive Timeouts ----
+class AdaptiveTimeout:
+    # Timeout = multiplier x the slowest of the recent successful waits, clamped to [floor, ceiling].
+    def __init__(self, initial, floor, ceiling, multiplier=3.0, window=20):
+        self.initial = initial
+        self.floor = floor
+        self.ceiling = ceiling
+        self.multiplier = multiplier
+        self.window = window
+        self._samples = []
+        self._lock = threading.Lock()
+
+    def current(self):
+        with self._lock:
+            if not self._samples:
+                return self.initial
+            return min(self.ceiling, max(self.floor, self.multiplier * max(self._samples)))
+
+    def observe(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            del self._samples[:-self.window]
+
+TIMEOUTS = {
+    "content": AdaptiveTimeout(initial=5.0, floor=1.0, ceiling=15.0),
+    "expand": AdaptiveTimeout(initial=5.0, floor=1.0, ceiling=10.0),
+    "scroll": AdaptiveTimeout(initial=8.0, floor=2.0, ceiling=20.0),
+}
+
+# ---- Waits ----
+def wait_until(driver, selector=None, min_count=1, settle_ms=300, idle_ms=None, timeout=None, kind="content"):
+    adaptive = TIMEOUTS[kind]
+    timeout = adaptive.current() if timeout is None else timeout
+    driver.set_script_timeout(timeout + 5)
+    with span("wait", kind=kind, selector=selector, min_count=min_count) as record:
+        result = driver.execute_async_script(WAIT_JS, selector, min_count, settle_ms, idle_ms, int(timeout * 1000))
+        record.update(ready=bool(result.get("ready")), timed_out=bool(result.get("timedOut")), count=result.get("count"))
+    waited = result.get("waited", 0) / 1000
+    if result.get("ready") and not result.get("timedOut"):
+        adaptive.observe(waited)
+    return result
+
+def wait_for_quiet(driver, settle_ms=300, timeout=None, kind="content"):
+    return wait_until(driver, None, 0, settle_ms, None, timeout, kind)
+
+def wait_for_more(driver, selector, previous_count, settle_ms=300, idle_ms=1500, timeout=None, kind="content"):
+    return wait_until(driver, selector, previous_count + 1, settle_ms, idle_ms, timeout, kind)
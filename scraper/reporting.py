@@ -0,0 +1,99 @@
+import contextlib
+import contextvars
+import os
+
+# ---- Progress Reporting ----
+# The scraping modules report progress through `report`, which forwards to whichever reporter is current. The
+# Streamlit app installs StreamlitReporter; the CLI and batch worker processes keep the print-only default and never
+# import Streamlit.
+class PrintReporter:
+    def write(self, message):
+        print(message)
+
+    def info(self, message):
+        print(message)
+
+    def success(self, message):
+        print(message)
+
+    def warning(self, message):
+        print(f"Warning: {message}")
+
+    def error(self, message):
+        print(f"Error: {message}")
+
+    def progress(self, value=0.0):
+        return _PrintProgress(value)
+
+class _PrintProgress:
+    # Prints at most once per 10% step.
+    def __init__(self, value):
+        self._step = -1
+        self.progress(value)
+
+    def progress(self, value):
+        step = int(value * 10)
+        if step > self._step:
+            self._step = step
+            print(f"Progress: {step * 10}%")
+
+class QuietReporter(PrintReporter):
+    def write(self, message):
+        pass
+
+    info = success = write
+
+    def progress(self, value=0.0):
+        return self
+
+class StreamlitReporter:
+    # Mirrors every message to the console, as the paired st.write/print calls used to.
+    def __init__(self):
+        import streamlit as st
+        self._st = st
+
+    def write(self, message):
+        self._st.write(message)
+        print(message)
+
+    def info(self, message):
+        self._st.info(message)
+        print(message)
+
+    def success(self, message):
+        self._st.success(message)
+        print(message)
+
+    def warning(self, message):
+        self._st.warning(message)
+        print(f"Warning: {message}")
+
+    def error(self, message):
+        self._st.error(message)
+        print(f"Error: {message}")
+
+    def progress(self, value=0.0):
+        return self._st.progress(value)
+
+_current = contextvars.ContextVar("scraper_reporter",
+                                  default=QuietReporter() if os.environ.get("SCRAPER_QUIET") == "1" else PrintReporter())
+
+def get_reporter():
+    return _current.get()
+
+def set_reporter(reporter):
+    return _current.set(reporter)
+
+@contextlib.contextmanager
+def using_reporter(reporter):
+    token = _current.set(reporter)
+    try:
+        yield reporter
+    finally:
+        _current.reset(token)
+
+class _CurrentReporter:
+    def __getattr__(self, name):
+        return getattr(_current.get(), name)
+
+report = _CurrentReporter()
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+import pandas as pd
+
+# ---- Cache Settings ----
+RESULT_CACHE_DIR = os.environ.get("SCRAPER_RESULT_CACHE", os.path.join(".cache", "results"))
+RESULT_TTLS = {
+    "bus": float(os.environ.get("SCRAPER_RESULT_TTL_BUS", "600")),
+    "train": float(os.environ.get("SCRAPER_RESULT_TTL_TRAIN", "1800")),
+    "hotel": float(os.environ.get("SCRAPER_RESULT_TTL_HOTEL", "900")),
+}
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("SCRAPER_RESULT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+# Query parameters that identify a visitor or campaign rather than the search itself.
+IGNORED_PARAMS = {"aid", "label", "sid", "srpvid", "srepoch", "sb", "src", "src_elem", "gclid", "fbclid"}
+
+def normalize_url(url):
+    parts = urllib.parse.urlsplit(url.strip())
+    query = sorted((k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+                   if k.lower() not in IGNORED_PARAMS and not k.lower().startswith("utm_"))
+    path = parts.path.rstrip("/") or "/"
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urllib.parse.urlencode(query), ""))
+
+def cache_key(kind, url, variant=""):
+    return hashlib.sha1(f"{kind}|{variant}|{normalize_url(url)}".encode("utf-8")).hexdigest()
+
+class ResultCache:
+    # Finished DataFrames as Parquet files, indexed in SQLite so Streamlit sessions and batch worker processes
+    # share one cache. Files are written under a temporary name and renamed into place.
+    def __init__(self, directory=RESULT_CACHE_DIR, ttls=RESULT_TTLS, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.ttls = ttls
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY, kind TEXT, url TEXT, variant TEXT, rows INTEGER, bytes INTEGER,
+            created_at REAL, last_used REAL)""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self._conn.commit()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.parquet")
+
+    def get(self, kind, url, variant=""):
+        # Returns (DataFrame, created_at), or None when missing or older than the kind's TTL.
+        key = cache_key(kind, url, variant)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT created_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[0] > self.ttls.get(kind, 0):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        try:
+            df = pd.read_parquet(self._path(key))
+            df = df.astype(object).where(df.notna(), None)
+        except (OSError, ValueError) as e:
+            print(f"Dropping unreadable cached result {key}: {e}")
+            self.invalidate(kind, url, variant)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return df, row[0]
+
+    def put(self, kind, url, df, variant=""):
+        key = cache_key(kind, url, variant)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        # Columns are scraped text; None stays null, everything else is stored as a string column.
+        df.astype("string").to_parquet(tmp_path, index=False, compression="zstd")
+        os.replace(tmp_path, path)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""INSERT OR REPLACE INTO results (key, kind, url, variant, rows, bytes, created_at, last_used)
+                                  VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                               (key, kind, normalize_url(url), variant, len(df), os.path.getsize(path), now, now))
+            self._conn.commit()
+            self._evict()
+
+    def invalidate(self, kind, url, variant=""):
+        key = cache_key(kind, url, variant)
+        with self._lock:
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._conn.commit()
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        # Expired entries go first, then least recently used ones until the total fits in max_bytes.
+        now = time.time()
+        doomed = []
+        total = 0
+        for key, kind, size, created_at in self._conn.execute(
+                "SELECT key, kind, bytes, created_at FROM results ORDER BY last_used DESC").fetchall():
+            if now - created_at > self.ttls.get(kind, 0) or total + size > self.max_bytes:
+                doomed.append(key)
+            else:
+                total += size
+        if doomed:
+            self._conn.executemany("DELETE FROM results WHERE key = ?", [(key,) for key in doomed])
+            self._conn.commit()
+            for key in doomed:
+                try:
+                    os.remove(self._path(key))
+                except FileNotFoundError:
+                    pass
+        return len(doomed)
+
+    def evict(self):
+        with self._lock:
+            return self._evict()
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM results").fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_result_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
+
+def format_age(created_at):
+    seconds = int(time.time() - created_at)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60} min"
+    return f"{seconds // 3600} h {seconds % 3600 // 60} min"
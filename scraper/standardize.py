@@ -0,0 +1,45 @@
+import functools
+
+# Results repeat the same handful of operators, bus types and train names, so every lookup is memoized.
+STANDARD_BUS_TYPES = {"Non-AC Seater", "Non-AC Seater-Sleeper", "Non-AC Sleeper", "AC Seater-Sleeper", "AC Sleeper", "AC Seater"}
+
+# ---- Standardization Functions ----
+@functools.lru_cache(maxsize=4096)
+def standardize_Gov_bus_name(raw_titles):
+    if "service number" in raw_titles.lower():
+        return "Government Bus"
+    return raw_titles
+
+@functools.lru_cache(maxsize=4096)
+def standardize_bus_type(bus_type_raw):
+    bt_lower = bus_type_raw.lower()
+    if "normal" in bt_lower:
+        return "Non-AC Seater"
+    has_non_ac = "non-ac" in bt_lower or "a/c" in bt_lower or "a.c." in bt_lower
+    has_seater = "seater" in bt_lower
+    has_sleeper = "sleeper" in bt_lower
+    if has_non_ac:
+        if has_seater and has_sleeper: return "Non-AC Seater-Sleeper"
+        elif has_sleeper: return "Non-AC Sleeper"
+        elif has_seater: return "Non-AC Seater"
+    else:
+        if has_seater and has_sleeper: return "AC Seater-Sleeper"
+        elif has_sleeper: return "AC Sleeper"
+        elif has_seater: return "AC Seater"
+    # Unmatched types are returned as is; normalize.unmatched_bus_types() reports them once per batch.
+    return bus_type_raw
+
+@functools.lru_cache(maxsize=4096)
+def standardize_train_name(train_name_raw):
+    if not train_name_raw or train_name_raw == "N/A":
+        return "N/A"
+    name_lower = train_name_raw.lower()
+    name_lower_trim = name_lower.replace(" ", "")
+    if "vande bharat" in name_lower_trim or "vandebharat" in name_lower_trim: return "VandeBharat"
+    if "sf" in name_lower_trim and "spl" in name_lower_trim: return "Superfast Special"
+    if "sf" in name_lower_trim and ("exp" in name_lower_trim or "ex" in name_lower_trim): return "Superfast Express"
+    if "sf" in name_lower_trim: return "Superfast"
+    if "spl" in name_lower_trim and ("exp" in name_lower_trim or "ex" in name_lower_trim): return "Special Express"
+    if "spl" in name_lower_trim: return "Special"
+    if "exp" in name_lower_trim or "ex" in name_lower_trim: return "Express"
+    return train_name_raw
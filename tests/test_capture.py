@@ -0,0 +1,53 @@
+from bench.corpus import synthetic_payload
+from scraper.abhibus import BUS_COLUMNS, TRAIN_COLUMNS, bus_records_from_json, train_records_from_json
+from scraper.booking import hotel_cards_from_json
+from scraper.capture import clock_text, find_records, pick
+
+def test_bus_records_from_payload():
+    records = bus_records_from_json(synthetic_payload("bus", 30))
+    assert len(records) == 30
+    assert all(len(record) == len(BUS_COLUMNS) - 1 for record in records)
+    for record in records:
+        departure, arrival, fare = record[2], record[3], record[7]
+        assert len(departure) == 5 and departure[2] == ":"
+        assert len(arrival) == 5 and arrival[2] == ":"
+        assert fare != "N/A" and " - " in fare
+
+def test_train_records_from_payload():
+    payload = synthetic_payload("train", 30)
+    records = train_records_from_json(payload)
+    assert len(records) == 30
+    assert all(len(record) == len(TRAIN_COLUMNS) - 1 for record in records)
+    first = payload["trains"][0]
+    assert records[0][0] == f"{first['trainNumber']} {first['trainName']}"
+    assert records[0][7].startswith(first["classes"][0]["classCode"])
+
+def test_hotel_cards_from_payload():
+    cards = hotel_cards_from_json(synthetic_payload("hotel", 12))
+    assert len(cards) == 12
+    assert all(card["title"] and card["price"] for card in cards)
+
+def test_records_need_core_fields():
+    payload = synthetic_payload("bus", 4)
+    services = payload["data"]["services"]
+    del services[0]["fare"]
+    del services[1]["departureTime"]
+    assert len(bus_records_from_json(payload)) == 2
+    payload = synthetic_payload("train", 3)
+    del payload["trains"][0]["arrivalTime"]
+    assert len(train_records_from_json(payload)) == 2
+
+def test_unrelated_json_is_ignored():
+    unrelated = {
+        "users": [{"name": "Asha", "number": "1", "from": "HYD", "to": "BLR"}] * 5,
+        "ads": [{"busName": "Promo", "price": 99}] * 5,
+        "config": {"name": "results", "items": [{"name": "x", "to": "y"}]},
+    }
+    assert bus_records_from_json(unrelated) == []
+    assert train_records_from_json(unrelated) == []
+
+def test_json_helpers():
+    assert pick({"a": {"b": ""}, "c": {"d": 3}}, ["a.b", "c.d"]) == 3
+    assert find_records({"x": [{"k": 1}], "y": {"z": [{"k": 1}, {"k": 2}, {"j": 3}]}}, ["k"]) == [{"k": 1}, {"k": 2}]
+    assert clock_text("2024-05-01T21:30:00") == "21:30"
+    assert clock_text("07:05") == "07:05"
@@ -0,0 +1,76 @@
+import contextlib
+import threading
+import pytest
+from bench.standin import serve
+from scraper import driver_pool, fetcher
+
+@pytest.fixture(scope="module")
+def standin():
+    server = serve()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def browser(monkeypatch):
+    # Stands in for the driver pool: records which URLs needed the browser and returns an empty page for them.
+    loaded = []
+    class Pool:
+        @contextlib.contextmanager
+        def borrow(self):
+            yield None
+    def load(driver, url, capture):
+        loaded.append(url)
+        return None, "<html><body></body></html>"
+    monkeypatch.setattr(driver_pool, "get_driver_pool", lambda: Pool())
+    monkeypatch.setitem(fetcher.BROWSER_LOADERS, "bus", load)
+    monkeypatch.setitem(fetcher.BROWSER_LOADERS, "train", load)
+    monkeypatch.setattr(fetcher, "_host_misses", {})
+    return loaded
+
+@pytest.mark.parametrize("mode", ["bus", "train"])
+def test_server_rendered_page_stays_on_http(standin, mode):
+    records, reason = fetcher.fetch_html(mode, f"{standin}/{mode}?cards=25&api=0")
+    assert reason is None
+    assert len(records) == 25
+
+@pytest.mark.parametrize("query, reason", [
+    ("render=js", "results are rendered client-side"),
+    ("gov=1", "government buses need expanding"),
+    ("cards=0", "results are rendered client-side"),
+])
+def test_escalation_reasons(standin, query, reason):
+    assert fetcher.fetch_html("bus", f"{standin}/bus?{query}") == (None, reason)
+
+def test_page_chrome_alone_is_not_results(standin):
+    # The train marker (.name) also matches page chrome; only complete cards keep a page on the HTTP tier.
+    class Session:
+        def get(self, url, timeout):
+            class Response:
+                status_code = 200
+                headers = {"Content-Type": "text/html"}
+                text = '<html><body><nav><span class="name">Account</span></nav></body></html>'
+                content = text.encode()
+            return Response()
+    assert fetcher.fetch_html("train", f"{standin}/train", Session()) == (None, "no result cards in the server-rendered page")
+
+def test_http_error_escalates(standin):
+    assert fetcher.fetch_html("bus", f"{standin}/missing") == (None, "HTTP 404")
+
+def test_fetch_results_tiers(standin, browser):
+    records, page_source, tier, reason = fetcher.fetch_results("train", f"{standin}/train?cards=10", fast_path=True)
+    assert (len(records), page_source, tier, reason) == (10, None, "http", None)
+    records, page_source, tier, reason = fetcher.fetch_results("bus", f"{standin}/bus?render=js", fast_path=True)
+    assert (records, tier, reason) == (None, "browser", "results are rendered client-side")
+    assert browser == [f"{standin}/bus?render=js"]
+
+def test_host_skips_http_after_repeated_escalations(standin, browser):
+    url = f"{standin}/bus?gov=1"
+    reasons = [fetcher.fetch_results("bus", url, fast_path=True)[3] for _ in range(fetcher.HTTP_SKIP_AFTER + 1)]
+    assert reasons[:-1] == ["government buses need expanding"] * fetcher.HTTP_SKIP_AFTER
+    assert reasons[-1].startswith("fast path skipped")
+    # A success clears the host's count.
+    fetcher._note(url, True)
+    assert fetcher.fetch_results("bus", f"{standin}/bus?cards=5", fast_path=True)[2] == "http"
@@ -0,0 +1,85 @@
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+import pytest
+import requests
+from scraper import geocoding
+from scraper.geocache import GeocodeCache
+
+class NominatimStub(http.server.BaseHTTPRequestHandler):
+    # Answers /search?q=... from `statuses` (one per request, then 200s) and records when each request arrived.
+    statuses = []
+    requests = []
+
+    def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)["q"][0]
+        type(self).requests.append((time.monotonic(), query))
+        status = type(self).statuses.pop(0) if type(self).statuses else 200
+        body = json.dumps([] if query == "Nowhere" else [{"lat": "51.5", "lon": "-0.12"}]).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def nominatim(monkeypatch):
+    NominatimStub.statuses = []
+    NominatimStub.requests = []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), NominatimStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(geocoding, "NOMINATIM_URL", f"http://127.0.0.1:{server.server_port}/search")
+    monkeypatch.setattr(geocoding, "GEOCODE_BACKOFF", 0.01)
+    monkeypatch.setattr(geocoding, "_bucket", geocoding.TokenBucket(1000))
+    yield NominatimStub
+    server.shutdown()
+    server.server_close()
+
+def test_geocode_query(nominatim):
+    session = requests.Session()
+    assert geocoding.geocode_query("Hotel 1, London", session) == ("51.5", "-0.12")
+    assert geocoding.geocode_query("Nowhere", session) is None
+
+def test_retries_server_errors(nominatim):
+    nominatim.statuses = [503, 429]
+    assert geocoding.geocode_query("Hotel 1", requests.Session(), retries=2) == ("51.5", "-0.12")
+    assert len(nominatim.requests) == 3
+
+def test_gives_up_after_retries(nominatim):
+    nominatim.statuses = [503] * 5
+    with pytest.raises(requests.HTTPError):
+        geocoding.geocode_query("Hotel 1", requests.Session(), retries=1)
+    assert len(nominatim.requests) == 2
+
+def test_rate_limit_is_shared_across_threads(nominatim, monkeypatch):
+    monkeypatch.setattr(geocoding, "_bucket", geocoding.TokenBucket(20))
+    threads = [threading.Thread(target=geocoding.geocode_query, args=(f"Hotel {i}", requests.Session())) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    arrivals = sorted(at for at, _ in nominatim.requests)
+    assert len(arrivals) == 6
+    # One token up front, then one every 50 ms.
+    assert arrivals[-1] - arrivals[0] >= 5 * 0.05 * 0.8
+
+def test_batch_fetches_each_query_once(nominatim, monkeypatch, tmp_path):
+    cache = GeocodeCache(str(tmp_path / "geocode.sqlite3"))
+    monkeypatch.setattr(geocoding, "get_geocode_cache", lambda: cache)
+    hotels = [{"Hotel Name": "Hotel 1", "Address": "Soho, London"}, {"Hotel Name": "Hotel 1", "Address": "Soho, London"},
+              {"Hotel Name": "Nowhere", "Address": "N/A"}, {"Hotel Name": "N/A", "Address": "N/A"}]
+    stats = geocoding.add_google_maps_links(hotels, workers=2)
+    assert stats == {"hits": 0, "misses": 2, "failed": 0}
+    assert len(nominatim.requests) == 2
+    assert hotels[0]["Google Maps Link"] == hotels[1]["Google Maps Link"]
+    assert "query_place_id=51.5,-0.12" in hotels[0]["Google Maps Link"]
+    assert hotels[2]["Google Maps Link"].endswith("query=Nowhere")
+    assert hotels[3]["Google Maps Link"] is None
+    assert geocoding.add_google_maps_links(hotels)["hits"] == 2
+    assert len(nominatim.requests) == 2
@@ -0,0 +1,21 @@
+import pandas as pd
+from scraper.abhibus import TRAIN_COLUMNS
+from scraper.booking import HOTEL_COLUMNS
+from scraper.explore import ResultIndex
+from scraper.normalize import categorize, normalize
+
+def test_categorize_all_missing():
+    result = categorize(pd.Series(["N/A", "", None]))
+    assert len(result) == 3
+    assert pd.isna(result).all()
+    assert list(result.categories) == []
+
+def test_normalize_all_missing_columns():
+    hotels = pd.DataFrame([("Hotel 1", "Soho", "N/A", "£ 120", "N/A", "N/A")] * 2, columns=HOTEL_COLUMNS)
+    trains = pd.DataFrame([("12700 SF EXP", "SF", "07:00 SC", "09:00 SBC", "SC", "2h 0m", "SBC", "SL 300 - 450", "N/A", "Train-Route")] * 2,
+                          columns=TRAIN_COLUMNS)
+    assert normalize("hotel", hotels)["Type"].isna().all()
+    assert normalize("train", trains)["Frequency"].isna().all()
+    index = ResultIndex("hotel", hotels)
+    assert index.options("Type") == []
+    assert len(index.filter({"Type": []})) == 2